@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Dict, Generic, List
+from typing import Callable, Dict, Generic, List, Optional
 from problem import HeuristicFunction, Problem, S, A, Solution
+from search_budget import BudgetExceeded
 
 # This is an abstract class for all goal based agents
 class GoalBasedAgent(ABC, Generic[S, A]):
@@ -28,13 +29,16 @@ class UninformedSearchAgent(GoalBasedAgent[S, A]):
         self.search_fn = search_fn
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
+        # If the search ran out of its budget (see search_budget.py), this will store its result
+        self.budget_exceeded: Optional[BudgetExceeded] = None
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
             solution = self.search_fn(problem, state)
-            # if no solution was found, we return None
-            if solution is None:
+            # if no solution was found (or the budget was exceeded), we return None
+            if solution is None or isinstance(solution, BudgetExceeded):
+                if solution is not None: self.budget_exceeded = solution
                 self.policy[state] = None
                 return None
             # Otherwise, we go through the solution path and store the action to do in each state into the policy
@@ -52,13 +56,16 @@ class InformedSearchAgent(GoalBasedAgent[S, A]):
         self.heuristic = heuristic
         # The policy will store the action to do for each state so as not to search again after each observation
         self.policy: Dict[S, A] = {}
+        # If the search ran out of its budget (see search_budget.py), this will store its result
+        self.budget_exceeded: Optional[BudgetExceeded] = None
     
     def act(self, problem: Problem[S, A], state: S) -> A:
         # This state is not stored in the policy, we need to search for a solution 
         if state not in self.policy:
             solution = self.search_fn(problem, state, self.heuristic)
-            # if no solution was found, we return None
-            if solution is None:
+            # if no solution was found (or the budget was exceeded), we return None
+            if solution is None or isinstance(solution, BudgetExceeded):
+                if solution is not None: self.budget_exceeded = solution
                 self.policy[state] = None
                 return None
             # Otherwise, we go through the solution path and store the action to do in each state into the policy
@@ -0,0 +1,289 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+from functools import lru_cache, partial
+import argparse, csv, json, multiprocessing, os, signal, time
+
+try:
+    import resource # Only available on unix
+except ImportError:
+    resource = None
+
+# This file contains a batch solver for sokoban levels
+# It solves many levels concurrently (one worker process per level) and writes a report with one row per level,
+# so the effect of a change in a heuristic or a search can be compared across many levels, for example:
+#   python batch_sokoban.py levels --agent astar --heuristic strong --report report.csv
+#   python batch_sokoban.py collection.xsb --time-limit 60 --memory-limit 2048 --report report.json
+#
+# The inputs can be level files (like the files in the levels folder), directories of level files,
+# or collections in the XSB/SOK format (many levels in one file, separated by titles, comments or empty lines).
+# Every level runs in a fresh process with a time limit and a memory limit (when the platform supports them),
+# so a level that is too hard does not stop the other levels from being solved.
+# The time limit and the optional expansion and explored set limits are given to the search as a SearchBudget (see search_budget.py),
+# so the search stops cleanly and its partial statistics are still reported.
+
+# The characters that can appear in a row of a level (the XSB format also uses '-' and '_' for empty cells)
+LEVEL_CHARACTERS = set("#@+$*. -_")
+
+# A level read from an input file
+class LevelSource(NamedTuple):
+    name: str   # The name of the level (the file name, followed by the title or the index of the level in a collection)
+    text: str   # The grid of the level in the format read by SokobanProblem.from_text
+
+# Returns True if the line is a row of a level grid
+def is_level_row(line: str) -> bool:
+    return "#" in line and all(char in LEVEL_CHARACTERS for char in line.rstrip("\n\r"))
+
+# SokobanProblem.from_text strips every row, so the spaces before the first wall of a row are replaced by walls
+# (they are outside the level, so this does not change it) and the XSB empty cells are replaced by spaces
+def normalize_level_row(line: str) -> str:
+    line = line.rstrip().replace("-", " ").replace("_", " ")
+    stripped = line.lstrip(" ")
+    return "#" * (len(line) - len(stripped)) + stripped
+
+# Read all the levels of a level file or of an XSB/SOK collection
+# A level is a block of consecutive grid rows. Its title is taken from a "Title:" line
+# or from the last non-empty line before the block (such as "; 12" or "Level 12"), otherwise the level is numbered
+def read_levels(path: str) -> List[LevelSource]:
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+    base = os.path.basename(path)
+    blocks: List[List[str]] = []
+    titles: List[Optional[str]] = []
+    rows: List[str] = []
+    title: Optional[str] = None
+    for line in lines:
+        if is_level_row(line):
+            rows.append(normalize_level_row(line))
+            continue
+        if rows:
+            blocks.append(rows)
+            titles.append(title)
+            rows, title = [], None
+        text = line.strip()
+        if text.lower().startswith("title:"):
+            # The title line comes after its level in the XSB format
+            if blocks:
+                titles[-1] = text[6:].strip()
+        elif text and not text.lower().startswith(("author:", "comment")):
+            title = text.lstrip(";").strip() or title
+    if rows:
+        blocks.append(rows)
+        titles.append(title)
+    if len(blocks) == 1:
+        return [LevelSource(base, "\n".join(blocks[0]))]
+    return [
+        LevelSource(f"{base}:{title if title else index + 1}", "\n".join(block))
+        for index, (block, title) in enumerate(zip(blocks, titles))
+    ]
+
+# Find the levels of every input path (the files of a directory are read in sorted order)
+def collect_levels(paths: List[str]) -> List[LevelSource]:
+    levels = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in (".txt", ".xsb", ".sok"):
+                    levels.extend(read_levels(os.path.join(path, name)))
+        else:
+            levels.extend(read_levels(path))
+    return levels
+
+# This exception is raised inside a worker when the level exceeds its time limit
+class LevelTimeout(Exception):
+    pass
+
+def _on_alarm(signum, frame):
+    raise LevelTimeout()
+
+# Returns the search function and the heuristic selected by the user
+def create_search(args: argparse.Namespace):
+    from play_sokoban import get_heuristic
+    import search
+    uninformed = {
+        "bfs": search.BreadthFirstSearch,
+        "dfs": search.DepthFirstSearch,
+        "ucs": search.UniformCostSearch,
+    }
+    informed = {
+        "astar": search.AStarSearch,
+        "gbfs": search.BestFirstSearch,
+        "idastar": search.IterativeDeepeningAStarSearch,
+        "rbfs": search.RecursiveBestFirstSearch,
+        "wastar": partial(search.WeightedAStarSearch, weight=args.weight),
+        "arastar": partial(search.AnytimeRepairingAStarSearch, initial_weight=args.weight, weight_step=args.weight_step),
+        "beam": partial(search.BeamSearch, width=args.width),
+        "bbfs": partial(search.BoundedBestFirstSearch, max_frontier=args.width),
+    }
+    if args.agent in uninformed:
+        return uninformed[args.agent], None
+    search_fn = informed[args.agent]
+    if args.agent in ("idastar", "rbfs") and args.transposition_table:
+        search_fn = partial(search_fn, transposition_table=True)
+    # We cache the heuristic calls like play_sokoban does
+    return search_fn, lru_cache(2**16)(get_heuristic(args.heuristic, args.push_search == "pushes"))
+
+# The peak resident memory of this process in megabytes (or None if it is not available)
+def peak_rss() -> Optional[float]:
+    if resource is None: return None
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    scale = 2**20 if os.uname().sysname == "Darwin" else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+# Solve a single level in the current (worker) process and return its row of the report
+def solve_level(args: argparse.Namespace, level: LevelSource) -> Dict[str, Any]:
+    from sokoban import SokobanProblem
+    from helpers.utils import fetch_tracked_call_count
+    from search_stats import SearchStats
+    from search_budget import SearchBudget, BudgetExceeded, TIME
+    row: Dict[str, Any] = {"level": level.name, "status": "", "length": None, "expanded": None, "wall_time": None, "peak_rss_mb": None, "error": ""}
+    if resource is not None and args.memory_limit:
+        limit = args.memory_limit * 2**20
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    problem = SokobanProblem.from_text(level.text, args.prune_dead_squares)
+    if args.deadlocks:
+        from sokoban_deadlock import DeadlockDetector
+        problem.deadlock_detector = DeadlockDetector(problem.layout)
+    search_fn, heuristic = create_search(args)
+    if args.push_search != "off":
+        from sokoban_push import push_search
+        search_fn = push_search(search_fn, normalize=args.push_search == "pushes")
+    # The search fills the statistics while it runs, so they are also reported (partially) if the level times out
+    stats = SearchStats()
+    search_fn = partial(search_fn, stats=stats)
+    # The search stops by itself once it exceeds its budget (see search_budget.py)
+    budget = SearchBudget(args.max_expansions or None, args.time_limit or None, args.max_closed or None)
+    search_fn = partial(search_fn, budget=budget)
+    # The alarm is only a backstop for the work that is not charged to the budget (such as building the heuristic tables),
+    # so it goes off a little after the time limit of the search
+    use_alarm = bool(args.time_limit) and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, args.time_limit * 1.1 + 1)
+    start = time.perf_counter()
+    try:
+        initial_state = problem.get_initial_state()
+        if heuristic is None:
+            solution = search_fn(problem, initial_state)
+        else:
+            solution = search_fn(problem, initial_state, heuristic)
+        if solution is None:
+            row["status"] = "unsolvable"
+        elif isinstance(solution, BudgetExceeded):
+            row["status"] = "timeout" if solution.reason == TIME else f"budget:{solution.reason}"
+        else:
+            # Replay the solution to make sure that it is valid
+            state = initial_state
+            for action in solution:
+                state = problem.get_successor(state, action)
+            row["status"] = "solved" if problem.is_goal(state) else "invalid"
+            row["length"] = len(solution)
+    except LevelTimeout:
+        row["status"] = "timeout"
+    except MemoryError:
+        row["status"] = "memory"
+    except Exception as error:
+        row["status"] = "error"
+        row["error"] = f"{type(error).__name__}: {error}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    row["wall_time"] = round(time.perf_counter() - start, 4)
+    # The expanded nodes are counted by @track_call_count on get_actions (of the push problem too if the search is over pushes)
+    expanded = fetch_tracked_call_count(SokobanProblem.get_actions)
+    if args.push_search != "off":
+        from sokoban_push import PushSokobanProblem
+        expanded += fetch_tracked_call_count(PushSokobanProblem.get_actions)
+    row["expanded"] = expanded
+    rss = peak_rss()
+    row["peak_rss_mb"] = None if rss is None else round(rss, 1)
+    row["stats"] = stats.to_dict()
+    return row
+
+def _solve_indexed(args: argparse.Namespace, item):
+    index, level = item
+    return index, solve_level(args, level)
+
+# Solve all the levels in a pool of worker processes and yield (index, row) in the order in which the levels finish
+# Every worker solves a single level then exits (maxtasksperchild=1), so the limits and the peak memory are measured per level
+def solve_levels(args: argparse.Namespace, levels: List[LevelSource]) -> Iterator[Any]:
+    processes = args.processes or os.cpu_count() or 1
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        yield from pool.imap_unordered(partial(_solve_indexed, args), enumerate(levels))
+
+REPORT_COLUMNS = ["level", "status", "length", "expanded", "wall_time", "peak_rss_mb", "error"]
+
+# Write the report as a CSV or a JSON file (the format is chosen by the file extension)
+# The search statistics of every level are nested under "stats" in the JSON report and flattened into "stats_" columns in the CSV report
+def write_report(path: str, args: argparse.Namespace, rows: List[Dict[str, Any]]) -> None:
+    if path.lower().endswith(".json"):
+        settings = {key: value for key, value in vars(args).items() if key not in ("inputs", "report")}
+        with open(path, 'w') as f:
+            json.dump({"settings": settings, "levels": rows}, f, indent=2)
+    else:
+        from search_stats import SearchStats
+        stats_columns = [f"stats_{name}" for name in SearchStats().to_dict()]
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS + stats_columns)
+            writer.writeheader()
+            for row in rows:
+                flat = {column: row[column] for column in REPORT_COLUMNS}
+                flat.update((f"stats_{name}", value) for name, value in row["stats"].items())
+                writer.writerow(flat)
+
+def main(args: argparse.Namespace):
+    levels = collect_levels(args.inputs)
+    if not levels:
+        print("No levels were found")
+        exit(-1)
+    print(f"Solving {len(levels)} levels with {args.agent}" + (f" (heuristic: {args.heuristic})" if args.agent not in ("bfs", "dfs", "ucs") else ""))
+    start = time.time()
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(levels)
+    for index, row in solve_levels(args, levels):
+        rows[index] = row
+        details = f"length {row['length']}, " if row["length"] is not None else ""
+        print(f"[{sum(row is not None for row in rows)}/{len(levels)}] {row['level']}: {row['status']} ({details}expanded {row['expanded']}, {row['wall_time']} seconds)" + (f" {row['error']}" if row["error"] else ""))
+    solved = sum(row["status"] == "solved" for row in rows)
+    print(f"Solved {solved}/{len(levels)} levels in {time.time() - start:.2f} seconds")
+    if args.report:
+        write_report(args.report, args, rows)
+        print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Solve many Sokoban levels in parallel and report the results")
+    parser.add_argument("inputs", nargs="+", help="level files, directories of level files or XSB/SOK collections")
+    parser.add_argument("--agent", "-a", default="astar",
+                        choices=['bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'wastar', 'arastar', 'beam', 'bbfs', 'idastar', 'rbfs'],
+                        help="the search used to solve the levels")
+    parser.add_argument("--heuristic", '-hf', default="strong",
+                        choices=["zero", "weak", "strong", "matching"],
+                        help="choose the heuristic to use with A*, Greedy Best First Search, Weighted A*, ARA*, Beam Search, Bounded Best First Search, IDA* or RBFS")
+    parser.add_argument("--weight", "-w", type=float, default=2.0,
+                        help="the weight of the heuristic for Weighted A* (and the initial weight for ARA*)")
+    parser.add_argument("--weight-step", "-ws", type=float, default=0.5,
+                        help="the decrease of the weight after every solution found by ARA*")
+    parser.add_argument("--width", "-bw", type=int, default=1000,
+                        help="the number of nodes kept per depth by Beam Search or in the frontier by Bounded Best First Search")
+    parser.add_argument("--transposition-table", "-tt", action='store_true', default=False,
+                        help="Enable the transposition table for IDA* and RBFS")
+    parser.add_argument("--push-search", "-ps", default="off", choices=["off", "pushes", "moves"],
+                        help="Search over crate pushes (see play_sokoban.py)")
+    parser.add_argument("--prune-dead-squares", "-pd", action='store_true', default=False,
+                        help="Do not generate the pushes that move a crate to a dead square")
+    parser.add_argument("--deadlocks", "-dl", action='store_true', default=False,
+                        help="Detect the freeze and bipartite deadlocks")
+    parser.add_argument("--processes", "-p", type=int, default=None, help="the number of worker processes (all the cores by default)")
+    parser.add_argument("--time-limit", "-t", type=float, default=60, help="the time limit of every level in seconds (0 for no limit)")
+    parser.add_argument("--max-expansions", "-me", type=int, default=0, help="the maximum number of expanded nodes of every level (0 for no limit)")
+    parser.add_argument("--max-closed", "-mc", type=int, default=0, help="the maximum number of explored states of every level (0 for no limit)")
+    parser.add_argument("--memory-limit", "-m", type=int, default=0, help="the memory limit of every level in megabytes (0 for no limit)")
+    parser.add_argument("--report", "-r", default=None, help="the path of the report (.csv or .json)")
+
+    args = parser.parse_args()
+    if args.weight_step <= 0:
+        parser.error("--weight-step must be positive")
+    if args.push_search == "pushes" and args.heuristic == "weak" and args.agent not in ("bfs", "dfs", "ucs"):
+        parser.error("the weak heuristic only counts the walking, so it can not be used with --push-search pushes")
+    try:
+        main(args)
+    except KeyboardInterrupt:
+        print("Goodbye!!")
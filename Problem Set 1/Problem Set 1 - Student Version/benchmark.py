@@ -0,0 +1,540 @@
+from typing import Any, List, Tuple
+import argparse, math, time
+
+# This file contains micro-benchmarks for the data structures and algorithms used by the searches
+# Every benchmark is a sub-command, for example:
+#   python benchmark.py frontier --level levels/level4.txt
+
+# Record the frontier operations done by a uniform cost search on a sokoban level
+# Every operation is either ("push", priority, item) or ("pop", None, None)
+def record_frontier_operations(level: str, max_expansions: int) -> List[Tuple[str, Any, Any]]:
+    from sokoban import SokobanProblem
+    from frontier import PriorityFrontier
+    problem = SokobanProblem.from_file(level)
+    operations = []
+    frontier = PriorityFrontier()
+    initial_state = problem.get_initial_state()
+    frontier.push((0, initial_state), 0)
+    operations.append(("push", 0, initial_state))
+    explored = set()
+    while not frontier.empty() and len(explored) < max_expansions:
+        cost, state = frontier.pop()
+        operations.append(("pop", None, None))
+        if state in explored: continue
+        explored.add(state)
+        for action in problem.get_actions(state):
+            successor = problem.get_successor(state, action)
+            if successor in explored: continue
+            new_cost = cost + problem.get_cost(state, action)
+            frontier.push((new_cost, successor), new_cost)
+            operations.append(("push", new_cost, successor))
+    return operations
+
+# Replay the operations on the old layout: two thread-synchronized priority queues (one for the states and one for the paths)
+def replay_on_priority_queues(operations: List[Tuple[str, Any, Any]]) -> float:
+    from queue import PriorityQueue
+    frontier, paths = PriorityQueue(), PriorityQueue()
+    counter = 0
+    start = time.perf_counter()
+    for operation, priority, item in operations:
+        if operation == "push":
+            frontier.put((priority, counter, item))
+            paths.put((priority, counter, []))
+            counter += 1
+        else:
+            frontier.get()
+            paths.get()
+    return time.perf_counter() - start
+
+# Replay the operations on a single heapq-based frontier
+def replay_on_priority_frontier(operations: List[Tuple[str, Any, Any]]) -> float:
+    from frontier import PriorityFrontier
+    frontier = PriorityFrontier()
+    start = time.perf_counter()
+    for operation, priority, item in operations:
+        if operation == "push":
+            frontier.push(item, priority)
+        else:
+            frontier.pop()
+    return time.perf_counter() - start
+
+def benchmark_frontier(args: argparse.Namespace):
+    operations = record_frontier_operations(args.level, args.expansions)
+    print(f"Recorded {len(operations)} frontier operations on {args.level}")
+    for name, replay in [("queue.PriorityQueue (states + paths)", replay_on_priority_queues), ("frontier.PriorityFrontier", replay_on_priority_frontier)]:
+        elapsed = min(replay(operations) for _ in range(args.repeat))
+        print(f"{name}: {elapsed:.4f} seconds ({len(operations)/elapsed:,.0f} operations per second)")
+
+# Return the heuristic with the given name for the sokoban problem
+def get_sokoban_heuristic(name: str):
+    if name == "zero":
+        return lambda *_: 0
+    if name == "matching":
+        from sokoban_matching import matching_heuristic
+        return matching_heuristic
+    import sokoban_heuristic
+    return getattr(sokoban_heuristic, f"{name}_heuristic")
+
+# Measure the peak frontier size of A* when every successor that is not explored is pushed (without the best-g map)
+def astar_peak_frontier_without_pruning(problem, heuristic) -> int:
+    from frontier import PriorityFrontier
+    frontier = PriorityFrontier()
+    initial_state = problem.get_initial_state()
+    frontier.push((0, initial_state), heuristic(problem, initial_state))
+    explored = set()
+    peak = 1
+    while not frontier.empty():
+        cost, state = frontier.pop()
+        if problem.is_goal(state): break
+        if state in explored: continue
+        explored.add(state)
+        for action in problem.get_actions(state):
+            successor = problem.get_successor(state, action)
+            if successor in explored: continue
+            new_cost = cost + problem.get_cost(state, action)
+            frontier.push((new_cost, successor), new_cost + heuristic(problem, successor))
+        peak = max(peak, len(frontier))
+    return peak
+
+def benchmark_frontier_peak(args: argparse.Namespace):
+    from functools import lru_cache
+    from sokoban import SokobanProblem
+    from search import AStarSearch
+    from search_stats import SearchStats
+    from helpers.utils import fetch_tracked_call_count
+    for level in args.levels:
+        problem = SokobanProblem.from_file(level)
+        heuristic = lru_cache(2**16)(get_sokoban_heuristic(args.heuristic))
+        before = astar_peak_frontier_without_pruning(problem, heuristic)
+        fetch_tracked_call_count(SokobanProblem.get_actions)
+        stats = SearchStats()
+        AStarSearch(problem, problem.get_initial_state(), heuristic, stats=stats)
+        expanded = fetch_tracked_call_count(SokobanProblem.get_actions)
+        print(f"{level}: peak frontier {before} -> {stats.peak_frontier} (skipped {stats.skipped_pushes} pushes, {stats.stale_pops} stale pops, expanded {expanded} nodes)")
+
+# Create a road-like graph routing problem: the nodes lie on a size x size lattice with jittered positions
+# and every node is connected in both directions to its 4 neighbors (some edges are randomly dropped)
+def random_graph_problem(size: int, seed: int = 0, drop: float = 0.2):
+    import random
+    from graph import GraphNode, GraphRoutingProblem
+    from mathutils import Point
+    rng = random.Random(seed)
+    nodes = [[GraphNode(f"{x}_{y}", Point(10*x + rng.randint(-3, 3), 10*y + rng.randint(-3, 3))) for x in range(size)] for y in range(size)]
+    adjacency = {node: [] for row in nodes for node in row}
+    for y in range(size):
+        for x in range(size):
+            for nx, ny in ((x+1, y), (x, y+1)):
+                if nx < size and ny < size and rng.random() >= drop:
+                    adjacency[nodes[y][x]].append(nodes[ny][nx])
+                    adjacency[nodes[ny][nx]].append(nodes[y][x])
+    return GraphRoutingProblem(nodes[0][0], nodes[size-1][size-1], adjacency)
+
+# Load the graph routing problems requested by the user (graph files and/or random graphs)
+def load_graph_problems(args: argparse.Namespace):
+    from graph import GraphRoutingProblem
+    problems = [(path, GraphRoutingProblem.from_file(path)) for path in args.graphs]
+    if args.random:
+        problems.append((f"random {args.random}x{args.random}", random_graph_problem(args.random, args.seed)))
+    return problems
+
+# Write a graph routing problem to a graph file (with the same format as the files in "graphs/")
+def write_graph_file(problem, path: str):
+    import json
+    graph = {node.name: {"position": list(node.position), "adjacent": [adjacent.name for adjacent in adjacent_nodes]} for node, adjacent_nodes in problem.adjacency.items()}
+    with open(path, 'w') as f:
+        json.dump({"graph": graph, "start": problem.start.name, "goal": problem.goal.name}, f)
+
+# Run the given function and return its result, the elapsed time, the memory retained by the result and the peak memory while it ran
+# The time is measured in a separate run since tracing the memory allocations slows the function down
+def measure(fn):
+    import tracemalloc, gc
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained, peak
+
+def benchmark_csr(args: argparse.Namespace):
+    import os, tempfile
+    from graph import GraphRoutingProblem, graphrouting_heuristic
+    from graph_csr import CSRGraphRoutingProblem, csr_graphrouting_heuristic
+    from search import AStarSearch
+    from helpers.utils import fetch_recorded_calls
+    path = args.graph
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "random_graph.json")
+        write_graph_file(random_graph_problem(args.random, args.seed), path)
+    edges = None
+    for name, load in [("GraphNode backend", lambda: GraphRoutingProblem.from_file(path)), ("CSR backend", lambda: CSRGraphRoutingProblem.from_file(path))]:
+        loaded, elapsed, retained, peak = measure(load)
+        if edges is None:
+            problem, edges = loaded, sum(len(adjacent) for adjacent in loaded.adjacency.values())
+            print(f"{path}: {len(problem.adjacency)} nodes and {edges} edges")
+        else:
+            csr_problem = loaded
+        print(f"- {name}: loaded in {elapsed:.3f} seconds, retains {retained/2**20:.1f} MiB ({retained/edges:.1f} bytes per edge), peak {peak/2**20:.1f} MiB while loading")
+    graph = csr_problem.graph
+    print(f"- CSR arrays: {(graph.neighbors.itemsize + graph.weights.itemsize)} bytes per edge, {graph.offsets.itemsize + graph.xs.itemsize + graph.ys.itemsize} bytes per node")
+    start = time.perf_counter()
+    path_nodes = AStarSearch(problem, problem.start, graphrouting_heuristic)
+    dict_search = time.perf_counter() - start
+    fetch_recorded_calls(GraphRoutingProblem.get_actions)
+    start = time.perf_counter()
+    csr_path = AStarSearch(csr_problem, csr_problem.start, csr_graphrouting_heuristic)
+    csr_search = time.perf_counter() - start
+    same = (path_nodes is None and csr_path is None) or [node.name for node in path_nodes] == csr_problem.to_node_names(csr_path)
+    print(f"- A*: GraphNode backend {dict_search:.3f} seconds, CSR backend {csr_search:.3f} seconds (same path: {same})")
+
+def benchmark_landmarks(args: argparse.Namespace):
+    import random
+    from graph import graphrouting_heuristic, GraphRoutingProblem
+    from graph_landmarks import preprocess_landmarks, landmark_heuristic
+    from search import AStarSearch
+    from search_stats import SearchStats
+    from helpers.utils import fetch_recorded_calls
+    for name, problem in load_graph_problems(args):
+        start = time.perf_counter()
+        preprocess_landmarks(problem, args.landmarks, use_disk_cache=not args.no_cache)
+        print(f"{name}: preprocessed {args.landmarks} landmarks in {time.perf_counter() - start:.3f} seconds")
+        # Run the searches on random queries (and the query of the problem)
+        rng = random.Random(args.seed)
+        nodes = list(problem.adjacency.keys())
+        queries = [(problem.start, problem.goal)] + [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.queries)]
+        totals = {}
+        for start_node, goal in queries:
+            problem.goal = goal
+            for heuristic_name, heuristic in [("euclidean", graphrouting_heuristic), ("ALT", landmark_heuristic)]:
+                stats = SearchStats()
+                start = time.perf_counter()
+                AStarSearch(problem, start_node, heuristic, stats=stats)
+                elapsed = time.perf_counter() - start
+                fetch_recorded_calls(GraphRoutingProblem.get_actions)
+                expanded, total_time = totals.get(heuristic_name, (0, 0))
+                totals[heuristic_name] = (expanded + stats.expanded, total_time + elapsed)
+        problem.goal = queries[0][1]
+        for heuristic_name, (expanded, total_time) in totals.items():
+            print(f"- A* with the {heuristic_name} heuristic: expanded {expanded} nodes in {total_time:.3f} seconds over {len(queries)} queries")
+
+def benchmark_hierarchy(args: argparse.Namespace):
+    import random
+    from graph import GraphRoutingProblem
+    from graph_hierarchy import ContractionHierarchy
+    from search import UniformCostSearch
+    from helpers.utils import fetch_recorded_calls
+    for name, problem in load_graph_problems(args):
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(problem, args.witness_limit)
+        original_edges = sum(len(adjacent) for adjacent in problem.adjacency.values())
+        print(f"{name}: built the hierarchy in {time.perf_counter() - start:.3f} seconds ({len(hierarchy.edges) - original_edges} shortcuts for {original_edges} edges)")
+        rng = random.Random(args.seed)
+        nodes = list(problem.adjacency.keys())
+        queries = [(problem.start, problem.goal)] + [(rng.choice(nodes), rng.choice(nodes)) for _ in range(args.queries)]
+        ucs_time, ch_time, same_cost, same_path = 0, 0, 0, 0
+        for start_node, goal in queries:
+            problem.goal = goal
+            start = time.perf_counter()
+            expected = UniformCostSearch(problem, start_node)
+            ucs_time += time.perf_counter() - start
+            fetch_recorded_calls(GraphRoutingProblem.get_actions)
+            start = time.perf_counter()
+            path, cost = hierarchy.query(start_node, goal)
+            ch_time += time.perf_counter() - start
+            expected_cost = None if expected is None else sum(problem.get_cost(a, b) for a, b in zip([start_node] + expected, expected))
+            same_cost += (expected is None and path is None) or (expected is not None and abs(expected_cost - cost) <= 1e-9 * max(1, expected_cost))
+            same_path += expected == path
+        problem.goal = queries[0][1]
+        print(f"- {len(queries)} queries: UCS {ucs_time:.3f} seconds, CH {ch_time:.3f} seconds")
+        print(f"- same cost in {same_cost}/{len(queries)} queries, same path in {same_path}/{len(queries)} queries (paths can differ only between equally short paths)")
+
+def benchmark_bidirectional(args: argparse.Namespace):
+    from search import UniformCostSearch, AStarSearch
+    from graph import graphrouting_heuristic, GraphRoutingProblem
+    from graph_search import BidirectionalUniformCostSearch, BidirectionalAStarSearch
+    from search_stats import SearchStats
+    from helpers.utils import fetch_recorded_calls
+    searches = [
+        ("UCS", lambda problem, stats: UniformCostSearch(problem, problem.start, stats=stats)),
+        ("A*", lambda problem, stats: AStarSearch(problem, problem.start, graphrouting_heuristic, stats=stats)),
+        ("Bidirectional UCS", lambda problem, stats: BidirectionalUniformCostSearch(problem, problem.start, stats=stats)),
+        ("Bidirectional A*", lambda problem, stats: BidirectionalAStarSearch(problem, problem.start, stats=stats)),
+    ]
+    for name, problem in load_graph_problems(args):
+        print(f"{name}:")
+        for search_name, search_fn in searches:
+            stats = SearchStats()
+            start = time.perf_counter()
+            path = search_fn(problem, stats)
+            elapsed = time.perf_counter() - start
+            # get_actions records its calls, so we clear them to free the memory
+            fetch_recorded_calls(GraphRoutingProblem.get_actions)
+            cost = None if path is None else sum(problem.get_cost(a, b) for a, b in zip([problem.start] + path, path))
+            print(f"- {search_name}: cost = {cost}, expanded {stats.expanded} nodes in {elapsed:.4f} seconds")
+
+def benchmark_batch(args: argparse.Namespace):
+    import random
+    from graph import GraphRoutingProblem
+    from search import UniformCostSearch
+    from helpers.utils import fetch_recorded_calls
+    for name, problem in load_graph_problems(args):
+        rng = random.Random(args.seed)
+        nodes = list(problem.adjacency.keys())
+        sources = [rng.choice(nodes) for _ in range(args.sources)]
+        targets = [rng.choice(nodes) for _ in range(args.targets)]
+        print(f"{name}: {len(sources)} sources x {len(targets)} targets")
+        # The baseline runs a separate UCS for every pair
+        start = time.perf_counter()
+        expected = []
+        for source in sources:
+            row = []
+            for target in targets:
+                problem.goal = target
+                path = UniformCostSearch(problem, source)
+                fetch_recorded_calls(GraphRoutingProblem.get_actions)
+                row.append(math.inf if path is None else sum(problem.get_cost(a, b) for a, b in zip([source] + path, path)))
+            expected.append(row)
+        print(f"- UCS per pair: {time.perf_counter() - start:.3f} seconds")
+        for label, processes in (("one search per source", 1), (f"{args.processes or 'all'} processes", args.processes)):
+            start = time.perf_counter()
+            matrix = problem.distance_matrix(sources, targets, processes)
+            elapsed = time.perf_counter() - start
+            same = all(abs(a - b) <= 1e-9 * max(1, a) if a != math.inf else b == math.inf for row_a, row_b in zip(expected, matrix) for a, b in zip(row_a, row_b))
+            print(f"- distance_matrix ({label}): {elapsed:.3f} seconds, same distances: {same}")
+
+def benchmark_loader(args: argparse.Namespace):
+    import os, tempfile
+    from graph import GraphRoutingProblem
+    from graph_csr import CSRGraphRoutingProblem
+    from graph_cache import read_graph_file, graph_cache_path
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.graph
+        if path is None:
+            path = os.path.join(directory, "random.json")
+            write_graph_file(random_graph_problem(args.random, args.seed), path)
+        else:
+            # The graph is copied so the benchmark does not leave a cache next to the original file
+            copy = os.path.join(directory, os.path.basename(path))
+            with open(path, 'rb') as source, open(copy, 'wb') as destination:
+                destination.write(source.read())
+            path = copy
+        print(f"{args.graph or f'random {args.random}x{args.random}'}: {os.path.getsize(path) / 2**20:.1f} MB")
+        loaders = [
+            ("GraphRoutingProblem.from_file", lambda: GraphRoutingProblem.from_file(path)),
+            ("CSRGraphRoutingProblem.from_file", lambda: CSRGraphRoutingProblem.from_file(path)),
+            ("streaming reader", lambda: read_graph_file(path)),
+            ("binary cache (first load)", lambda: (os.path.exists(graph_cache_path(path)) and os.remove(graph_cache_path(path)), CSRGraphRoutingProblem.from_file(path, use_disk_cache=True))),
+            ("binary cache (memory-mapped)", lambda: CSRGraphRoutingProblem.from_file(path, use_disk_cache=True)),
+            ("GraphRoutingProblem from the binary cache", lambda: GraphRoutingProblem.from_file(path, use_disk_cache=True)),
+        ]
+        # The first load of the binary cache removes the cache before loading, so measure() times the write in both of its runs
+        for name, loader in loaders:
+            _, elapsed, retained, peak = measure(loader)
+            print(f"- {name}: {elapsed:.3f} seconds, peak memory {peak / 2**20:.1f} MB")
+
+def benchmark_sokoban_engine(args: argparse.Namespace):
+    from sokoban import SokobanProblem, BitboardSokobanProblem
+    from search import BreadthFirstSearch
+    from helpers.utils import fetch_tracked_call_count
+    for level in args.levels:
+        problem = SokobanProblem.from_file(level)
+        engines = [("SokobanState", problem), ("bitboard", BitboardSokobanProblem.from_problem(problem))]
+        print(f"{level}:")
+        paths = []
+        for name, engine in engines:
+            start = time.perf_counter()
+            paths.append(BreadthFirstSearch(engine, engine.get_initial_state()))
+            elapsed = time.perf_counter() - start
+            expanded = fetch_tracked_call_count(type(engine).get_actions)
+            print(f"- {name}: expanded {expanded} states in {elapsed:.3f} seconds ({expanded / elapsed:,.0f} states per second)")
+        print(f"- same solution: {paths[0] == paths[1]}")
+
+def benchmark_closed_set(args: argparse.Namespace):
+    from sokoban import SokobanProblem
+    from search import BreadthFirstSearch
+    from closed_set import CompactClosedSet, sokoban_key
+    import sys
+    for level in args.levels:
+        problem = SokobanProblem.from_file(level)
+        print(f"{level}:")
+        factories = [
+            ("python set", set),
+            ("compact set", lambda: CompactClosedSet(sokoban_key)),
+            ("compact set (verify)", lambda: CompactClosedSet(sokoban_key, verify=True)),
+        ]
+        paths = []
+        for name, factory in factories:
+            created = []
+            def search():
+                created.append(factory())
+                return BreadthFirstSearch(problem, problem.get_initial_state(), closed_set=lambda: created[-1])
+            path, elapsed, _, peak = measure(search)
+            paths.append(path)
+            closed = created[-1]
+            # The size of the explored set itself (without the states that it references)
+            size = len(closed.table) * closed.table.itemsize if isinstance(closed, CompactClosedSet) else sys.getsizeof(closed)
+            collisions = f", {closed.collisions} collisions" if isinstance(closed, CompactClosedSet) and closed.states is not None else ""
+            print(f"- {name}: {elapsed:.3f} seconds, {len(closed)} explored states, set of {size / 2**20:.2f} MB, peak search memory {peak / 2**20:.1f} MB{collisions}")
+        print(f"- same solution: {all(path == paths[0] for path in paths)}")
+
+def benchmark_parking(args: argparse.Namespace):
+    from parking import ParkingProblem
+    from parking_heuristic import parking_heuristic, parking_pdb_heuristic
+    from search import UniformCostSearch, AStarSearch, BeamSearch, BoundedBestFirstSearch
+    from search_stats import SearchStats
+    searches = [
+        ("UCS", True, lambda problem, stats: UniformCostSearch(problem, problem.get_initial_state(), stats=stats)),
+        ("A* (distance maps)", True, lambda problem, stats: AStarSearch(problem, problem.get_initial_state(), parking_heuristic, stats=stats)),
+        ("A* (distance maps + pair PDB)", True, lambda problem, stats: AStarSearch(problem, problem.get_initial_state(), parking_pdb_heuristic, stats=stats)),
+        # The bounded searches are not optimal, so their costs are not compared with the others
+        (f"Beam search (width {args.width})", False, lambda problem, stats: BeamSearch(problem, problem.get_initial_state(), parking_pdb_heuristic, args.width, stats=stats)),
+        (f"Bounded best first (frontier {args.width})", False, lambda problem, stats: BoundedBestFirstSearch(problem, problem.get_initial_state(), parking_pdb_heuristic, args.width, stats=stats)),
+    ]
+    for park in args.parks:
+        print(f"{park}:")
+        costs = []
+        for name, optimal, search_fn in searches:
+            # A new problem is loaded for every search so the heuristic tables are built (and timed) again
+            problem = ParkingProblem.from_file(park)
+            stats = SearchStats()
+            start = time.perf_counter()
+            path = search_fn(problem, stats)
+            elapsed = time.perf_counter() - start
+            cost = None
+            if path is not None:
+                state, cost = problem.get_initial_state(), 0
+                for action in path:
+                    cost += problem.get_cost(state, action)
+                    state = problem.get_successor(state, action)
+            if optimal: costs.append(cost)
+            print(f"- {name}: cost {cost}, expanded {stats.expanded} nodes (peak frontier {stats.peak_frontier}) in {elapsed:.3f} seconds")
+        print(f"- same cost: {all(cost == costs[0] for cost in costs)}")
+
+def benchmark_grid_kernel(args: argparse.Namespace):
+    from sokoban import SokobanProblem
+    from mathutils import Direction
+    from grid_kernel import NO_CELL
+    for level in args.levels:
+        layout = SokobanProblem.from_file(level).layout
+        walkable, grid = layout.walkable, layout.grid
+        points = sorted(walkable, key=lambda point: (point.y, point.x))
+        cells = [grid.to_index(point) for point in points]
+        vectors = [(direction, direction.to_vector()) for direction in Direction]
+        # Every variant finds the walkable neighbors of every walkable cell and counts them
+        def with_points():
+            count = 0
+            for point in points:
+                for direction, vector in vectors:
+                    if point + vector in walkable: count += 1
+            return count
+        def with_neighbor_tables():
+            count = 0
+            neighbors = grid.neighbors
+            for cell in cells:
+                for direction in Direction:
+                    if neighbors[direction][cell] != NO_CELL: count += 1
+            return count
+        def with_move_lists():
+            count = 0
+            moves = grid.moves
+            for cell in cells:
+                for direction, neighbor in moves[cell]:
+                    count += 1
+            return count
+        print(f"{level} ({len(points)} walkable cells):")
+        baseline = None
+        for name, fn in [("Point arithmetic", with_points), ("kernel neighbor tables", with_neighbor_tables), ("kernel move lists", with_move_lists)]:
+            elapsed = min(timed(fn, args.repeat) for _ in range(3))
+            baseline = baseline or elapsed
+            print(f"- {name}: {elapsed * 1e6 / (args.repeat * len(points)):.3f} us per cell ({baseline / elapsed:.1f}x), {fn()} moves")
+
+# Returns the time taken to call the function the given number of times
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    # Read the arguments from the command line
+    parser = argparse.ArgumentParser(description="Run micro-benchmarks for the search data structures")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    frontier_parser = subparsers.add_parser("frontier", help="compare the push/pop throughput of the frontiers")
+    frontier_parser.add_argument("--level", "-l", default="levels/level4.txt", help="path to the sokoban level used to record the operations")
+    frontier_parser.add_argument("--expansions", "-e", type=int, default=20000, help="the number of nodes expanded while recording the operations")
+    frontier_parser.add_argument("--repeat", "-r", type=int, default=3, help="the number of times every replay is repeated (the fastest is reported)")
+    frontier_parser.set_defaults(run=benchmark_frontier)
+
+    peak_parser = subparsers.add_parser("frontier-peak", help="compare the peak frontier size of A* with and without the best-g map")
+    peak_parser.add_argument("levels", nargs="+", help="paths to the sokoban levels")
+    peak_parser.add_argument("--heuristic", "-hf", default="strong", choices=["zero", "weak", "strong", "matching"], help="the heuristic used by A*")
+    peak_parser.set_defaults(run=benchmark_frontier_peak)
+
+    bidirectional_parser = subparsers.add_parser("bidirectional", help="compare the unidirectional and bidirectional graph searches")
+    bidirectional_parser.add_argument("graphs", nargs="*", help="paths to the graph files")
+    bidirectional_parser.add_argument("--random", type=int, default=0, help="also run on a random road-like graph with the given lattice size")
+    bidirectional_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph")
+    bidirectional_parser.set_defaults(run=benchmark_bidirectional)
+
+    engine_parser = subparsers.add_parser("sokoban-engine", help="compare the BFS throughput of the SokobanState and bitboard sokoban engines")
+    engine_parser.add_argument("levels", nargs="+", help="paths to the sokoban levels")
+    engine_parser.set_defaults(run=benchmark_sokoban_engine)
+
+    grid_parser = subparsers.add_parser("grid-kernel", help="compare the neighbor generation with Point arithmetic and with the grid kernel tables")
+    grid_parser.add_argument("levels", nargs="+", help="paths to the sokoban levels")
+    grid_parser.add_argument("--repeat", "-r", type=int, default=2000, help="the number of times every variant visits all the cells")
+    grid_parser.set_defaults(run=benchmark_grid_kernel)
+
+    closed_parser = subparsers.add_parser("closed-set", help="compare the python set and the compact Zobrist closed set in BFS")
+    closed_parser.add_argument("levels", nargs="+", help="paths to the sokoban levels")
+    closed_parser.set_defaults(run=benchmark_closed_set)
+
+    parking_parser = subparsers.add_parser("parking", help="compare UCS with A*, beam search and bounded best first search using the parking heuristics")
+    parking_parser.add_argument("parks", nargs="*", default=[f"parks/park{i}.txt" for i in range(1, 6)], help="paths to the parking levels (all the parks by default)")
+    parking_parser.add_argument("--width", "-w", type=int, default=100, help="the width of beam search and the frontier size of bounded best first search")
+    parking_parser.set_defaults(run=benchmark_parking)
+
+    csr_parser = subparsers.add_parser("csr", help="compare the GraphNode and CSR graph backends")
+    csr_parser.add_argument("--graph", "-g", default=None, help="path to the graph file (a random graph is generated if not given)")
+    csr_parser.add_argument("--random", type=int, default=300, help="the lattice size of the random graph")
+    csr_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph")
+    csr_parser.set_defaults(run=benchmark_csr)
+
+    landmarks_parser = subparsers.add_parser("landmarks", help="compare the euclidean and ALT heuristics for graph routing")
+    landmarks_parser.add_argument("graphs", nargs="*", help="paths to the graph files")
+    landmarks_parser.add_argument("--landmarks", "-k", type=int, default=4, help="the number of landmarks")
+    landmarks_parser.add_argument("--queries", "-q", type=int, default=20, help="the number of random queries")
+    landmarks_parser.add_argument("--no-cache", action="store_true", help="do not load or save the landmarks next to the graph files")
+    landmarks_parser.add_argument("--random", type=int, default=0, help="also run on a random road-like graph with the given lattice size")
+    landmarks_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph and queries")
+    landmarks_parser.set_defaults(run=benchmark_landmarks)
+
+    hierarchy_parser = subparsers.add_parser("hierarchy", help="compare UCS with contraction hierarchy queries")
+    hierarchy_parser.add_argument("graphs", nargs="*", help="paths to the graph files")
+    hierarchy_parser.add_argument("--queries", "-q", type=int, default=100, help="the number of random queries")
+    hierarchy_parser.add_argument("--witness-limit", type=int, default=64, help="the maximum number of nodes settled by a witness search")
+    hierarchy_parser.add_argument("--random", type=int, default=0, help="also run on a random road-like graph with the given lattice size")
+    hierarchy_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph and queries")
+    hierarchy_parser.set_defaults(run=benchmark_hierarchy)
+
+    batch_parser = subparsers.add_parser("batch", help="compare a UCS per pair with the one-to-many and many-to-many routing API")
+    batch_parser.add_argument("graphs", nargs="*", help="paths to the graph files")
+    batch_parser.add_argument("--sources", type=int, default=8, help="the number of random sources")
+    batch_parser.add_argument("--targets", type=int, default=8, help="the number of random targets")
+    batch_parser.add_argument("--processes", "-p", type=int, default=None, help="the number of worker processes (all the cores by default)")
+    batch_parser.add_argument("--random", type=int, default=0, help="also run on a random road-like graph with the given lattice size")
+    batch_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph and queries")
+    batch_parser.set_defaults(run=benchmark_batch)
+
+    loader_parser = subparsers.add_parser("loader", help="compare the graph file loaders and the binary cache")
+    loader_parser.add_argument("--graph", "-g", default=None, help="path to the graph file (a random graph is generated if not given)")
+    loader_parser.add_argument("--random", type=int, default=200, help="the lattice size of the random graph")
+    loader_parser.add_argument("--seed", type=int, default=0, help="the seed of the random graph")
+    loader_parser.set_defaults(run=benchmark_loader)
+
+    args = parser.parse_args()
+    args.run(args)
@@ -0,0 +1,97 @@
+from array import array
+from typing import Callable, Dict, Generic, List, Optional
+from problem import S
+
+# This file contains a compact closed set (explored set) for the searches
+# A python set of states keeps every state object alive (with its frozensets and points), which is most of the memory of a large search.
+# The compact set only stores a 64-bit key per state in an open-addressing hash table backed by an array('Q'),
+# so a state costs 8 bytes (up to 16 bytes since the table is kept at most half full).
+# The key of a state is given by a key function; for the sokoban and parking states, it is their Zobrist key (see mathutils.ZobristTable).
+#
+# Two different states with the same key are a collision: the compact set will wrongly report the second state as explored.
+# With 64-bit random keys, this is very unlikely (around n^2 / 2^65 for n states) but it is not impossible, so there is a
+# verification mode (verify=True) that also keeps the full states of every key and counts the collisions.
+# The verification mode uses more memory than a python set, so it is only meant to check that a key function is good enough.
+#
+# To use it in a search, pass a factory to the closed_set argument of the search function, for example:
+#   AStarSearch(problem, initial_state, heuristic, closed_set=lambda: CompactClosedSet(sokoban_key))
+
+KEY_MASK = (1 << 64) - 1
+
+# The key function that is used if none is given: the hash of the state (which is the Zobrist key for the sokoban states)
+def default_key(state) -> int:
+    return hash(state) & KEY_MASK
+
+# The key function of the sokoban states: their full 64-bit Zobrist key
+def sokoban_key(state) -> int:
+    return state.key
+
+# The key function of the parking states: their full 64-bit Zobrist key
+def parking_key(state) -> int:
+    return state.key
+
+class CompactClosedSet(Generic[S]):
+    # The table is grown (doubled) when it becomes more than half full
+    MAX_LOAD = 0.5
+
+    def __init__(self, key: Callable[[S], int] = default_key, capacity: int = 1 << 10, verify: bool = False) -> None:
+        self.key = key
+        # The capacity is a power of two so that the slot of a key is found with a mask
+        size = 1
+        while size < capacity: size <<= 1
+        # A slot is empty if it holds 0, so the key 0 is stored as 1 (this only adds a collision between the keys 0 and 1)
+        self.table = array('Q', bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+        # In the verification mode, states[key] holds the states that were added with this key
+        self.states: Optional[Dict[int, List[S]]] = {} if verify else None
+        self.collisions = 0
+
+    # Returns the slot that holds the key or the empty slot where it should be inserted (linear probing)
+    def _find(self, key: int) -> int:
+        table, mask = self.table, self.mask
+        # The high bits of the key are mixed in since the low bits alone choose the first slot
+        slot = (key ^ (key >> 32)) & mask
+        while True:
+            value = table[slot]
+            if value == 0 or value == key:
+                return slot
+            slot = (slot + 1) & mask
+
+    def _grow(self) -> None:
+        old = self.table
+        self.table = array('Q', bytes(16 * len(old)))
+        self.mask = len(self.table) - 1
+        for value in old:
+            if value != 0:
+                self.table[self._find(value)] = value
+
+    def _key(self, state: S) -> int:
+        return (self.key(state) & KEY_MASK) or 1
+
+    def add(self, state: S) -> None:
+        key = self._key(state)
+        slot = self._find(key)
+        if self.table[slot] == 0:
+            self.table[slot] = key
+            self.count += 1
+            if self.count > self.MAX_LOAD * len(self.table):
+                self._grow()
+        if self.states is not None:
+            states = self.states.setdefault(key, [])
+            if state not in states:
+                if states: self.collisions += 1
+                states.append(state)
+
+    def __contains__(self, state: S) -> bool:
+        key = self._key(state)
+        if self.table[self._find(key)] == 0:
+            return False
+        # In the verification mode, a state is only explored if it was actually added
+        if self.states is not None:
+            return state in self.states[key]
+        return True
+
+    # The number of distinct keys in the set (in the verification mode, the number of states is this count plus the collisions)
+    def __len__(self) -> int:
+        return self.count
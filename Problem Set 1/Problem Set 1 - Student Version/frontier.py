@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Generic, List, Tuple, TypeVar
+import heapq
+
+# T is used for generic typing where T represents the type of the items stored in the frontier
+T = TypeVar("T")
+
+# This file contains the frontiers used by the search functions
+# Unlike queue.Queue and queue.PriorityQueue, these frontiers are not thread-synchronized
+# so every push and pop is a single deque/list/heap operation without acquiring any lock.
+# Each frontier stores one entry per node (the search functions push node indices from the node store).
+
+# Frontier is a generic abstract class for the containers of the nodes that wait to be expanded
+class Frontier(ABC, Generic[T]):
+    # Add an item to the frontier (the priority is ignored by the frontiers that do not need it)
+    @abstractmethod
+    def push(self, item: T, priority: float = 0) -> None:
+        pass
+
+    # Remove and return the next item to be expanded
+    @abstractmethod
+    def pop(self) -> T:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def empty(self) -> bool:
+        return len(self) == 0
+
+# A first-in first-out frontier (used by breadth first search)
+class FifoFrontier(Frontier[T]):
+    def __init__(self) -> None:
+        self.items: Deque[T] = deque()
+
+    def push(self, item: T, priority: float = 0) -> None:
+        self.items.append(item)
+
+    def pop(self) -> T:
+        return self.items.popleft()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+# A last-in first-out frontier (used by depth first search)
+class LifoFrontier(Frontier[T]):
+    def __init__(self) -> None:
+        self.items: List[T] = []
+
+    def push(self, item: T, priority: float = 0) -> None:
+        self.items.append(item)
+
+    def pop(self) -> T:
+        return self.items.pop()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+# A frontier that pops the item with the lowest priority first (used by UCS, A* and best first search)
+# Every entry is (priority, counter, item). The counter breaks the ties between equal priorities
+# such that the item that was pushed first is popped first (first in first out)
+# and it guarantees that the items themselves are never compared.
+class PriorityFrontier(Frontier[T]):
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, T]] = []
+        self.counter: int = 0
+
+    def push(self, item: T, priority: float = 0) -> None:
+        heapq.heappush(self.heap, (priority, self.counter, item))
+        self.counter += 1
+
+    def pop(self) -> T:
+        return heapq.heappop(self.heap)[2]
+
+    # Remove and return the next item with its priority
+    def pop_with_priority(self) -> Tuple[float, T]:
+        priority, _, item = heapq.heappop(self.heap)
+        return priority, item
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+# A priority frontier that keeps at most max_size of its best items (used by bounded best first search)
+# Removing the worst item of a heap costs a linear scan, so the frontier is allowed to grow to twice its size
+# before it is trimmed back to its max_size best items, which keeps the push cost amortized O(log n)
+# and the memory bounded by 2 * max_size entries. The ties are still broken first in first out.
+class BoundedPriorityFrontier(PriorityFrontier[T]):
+    def __init__(self, max_size: int) -> None:
+        super().__init__()
+        self.max_size = max(max_size, 1)
+        # The number of items that were dropped by the trims
+        self.dropped: int = 0
+
+    def push(self, item: T, priority: float = 0) -> None:
+        super().push(item, priority)
+        if len(self.heap) > 2 * self.max_size:
+            # A sorted list is a valid heap
+            self.dropped += len(self.heap) - self.max_size
+            self.heap = heapq.nsmallest(self.max_size, self.heap)
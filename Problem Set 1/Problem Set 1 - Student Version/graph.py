@@ -1,8 +1,10 @@
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
-import json
+from concurrent.futures import ProcessPoolExecutor
+import json, math, os
 
 from problem import Problem
+from frontier import PriorityFrontier
 from mathutils import Point, euclidean_distance
 from helpers.utils import record_calls
 
@@ -19,13 +21,75 @@ class GraphNode:
     def __str__(self) -> str:
         return self.name
 
+# Given the adjacency of a graph, this function returns the adjacency of the graph with every edge reversed
+def build_reverse_adjacency(adjacency: Dict[GraphNode, List[GraphNode]]) -> Dict[GraphNode, List[GraphNode]]:
+    reverse_adjacency: Dict[GraphNode, List[GraphNode]] = {node: [] for node in adjacency}
+    for node, adjacent in adjacency.items():
+        for next_node in adjacent:
+            reverse_adjacency.setdefault(next_node, []).append(node)
+    return reverse_adjacency
+
+# A shortest path tree holds the result of a single Dijkstra search from a source node
+# It contains the distance and the parent of every node that was reached and settled by the search,
+# and the path to any of them is rebuilt from the parents only when it is requested
+class ShortestPathTree:
+    def __init__(self, source: GraphNode, distances: Dict[GraphNode, float], parents: Dict[GraphNode, GraphNode], reverse: bool = False) -> None:
+        self.source = source
+        self.distances = distances  # The distance of every settled node (from the source, or to the source if reverse is True)
+        self.parents = parents      # The node before every settled node on its shortest path from the source (or after it if reverse is True)
+        self.reverse = reverse
+
+    def __contains__(self, node: GraphNode) -> bool:
+        return node in self.distances
+
+    # Returns the distance of the node (or inf if it was not reached)
+    def distance(self, node: GraphNode) -> float:
+        return self.distances.get(node, math.inf)
+
+    # Returns the list of nodes from the source (excluded) to the node, like the search functions, or None if it was not reached
+    # If the tree is reversed, it returns the list of nodes from the node to the source (excluding the node)
+    def path(self, node: GraphNode) -> Optional[List[GraphNode]]:
+        if node not in self.distances:
+            return None
+        path = []
+        while node != self.source:
+            path.append(node)
+            node = self.parents[node]
+        if self.reverse:
+            path.append(self.source)
+            return path[1:]
+        path.reverse()
+        return path
+
+# A worker process of distance_matrix keeps its own copy of the graph (it is sent once when the process starts)
+# GraphNode and Point are frozen dataclasses with __slots__ which pickle cannot restore,
+# so the graph is sent as plain tuples (name, x, y) with the adjacency as node indices and rebuilt in the worker
+_worker_problem: 'GraphRoutingProblem' = None
+_worker_nodes: List[GraphNode] = []
+
+def _initialize_worker(nodes: List[tuple], adjacency: List[List[int]]) -> None:
+    global _worker_problem, _worker_nodes
+    _worker_nodes = [GraphNode(name, Point(x, y)) for name, x, y in nodes]
+    graph = {_worker_nodes[node]: [_worker_nodes[next_node] for next_node in adjacent] for node, adjacent in enumerate(adjacency)}
+    _worker_problem = GraphRoutingProblem(_worker_nodes[0], _worker_nodes[0], graph)
+
+def _distance_row(source: int, targets: Sequence[int]) -> List[float]:
+    target_nodes = [_worker_nodes[target] for target in targets]
+    tree = _worker_problem.shortest_path_tree(_worker_nodes[source], target_nodes)
+    return [tree.distance(target) for target in target_nodes]
+
 # This is the implementation of the graph routing problem
 class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
-    def __init__(self, start: GraphNode, goal: GraphNode, adjacency: Dict[GraphNode, List[GraphNode]]) -> None:
+    # The reverse adjacency holds the nodes from which we can reach each node (it is used by the bidirectional searches)
+    # If it is not given, it is built from the adjacency
+    def __init__(self, start: GraphNode, goal: GraphNode, adjacency: Dict[GraphNode, List[GraphNode]], reverse_adjacency: Optional[Dict[GraphNode, List[GraphNode]]] = None) -> None:
         super().__init__()
         self.start = start
         self.goal = goal
         self.adjacency = adjacency
+        self.reverse_adjacency = reverse_adjacency if reverse_adjacency is not None else build_reverse_adjacency(adjacency)
+        # The path of the file from which the problem was read (if any), it is used to store preprocessing results next to it
+        self.source_path: Optional[str] = None
     
     def get_initial_state(self) -> GraphNode:
         return self.start
@@ -45,22 +109,120 @@ class GraphRoutingProblem(Problem[GraphNode, GraphNode]):
     
     # The cost of an action is the distance between the current node and the next node 
     def get_cost(self, state: GraphNode, action: GraphNode) -> float:
-        return euclidean_distance(state.position, action.position)
+        return self._move_cost(state, action)
+
+    # The cost of an action (used by both get_cost and get_successors)
+    # It is computed like euclidean_distance without creating the difference Point
+    def _move_cost(self, state: GraphNode, action: GraphNode) -> float:
+        dx, dy = state.position.x - action.position.x, state.position.y - action.position.y
+        return math.sqrt(dx * dx + dy * dy)
     
+    # Generate all the successors in one call (see Problem.get_successors)
+    def get_successors(self, state: GraphNode) -> List[Tuple[GraphNode, GraphNode, float]]:
+        if self.successor_methods_replaced():
+            return super().get_successors(state)
+        move_cost = self._move_cost
+        return [(action, action, move_cost(state, action)) for action in self.get_actions(state)]
+
+    # Run a single Dijkstra search from the source (the start by default) and return its shortest path tree
+    # If targets are given, the search stops as soon as all of them are settled, otherwise it settles every reachable node
+    # If reverse is True, the edges are followed backward so the tree holds the distances to the source
+    # The search uses the adjacency directly (not get_actions) so it is not recorded as a traversal
+    def shortest_path_tree(self, source: Optional[GraphNode] = None, targets: Optional[Iterable[GraphNode]] = None, reverse: bool = False) -> ShortestPathTree:
+        source = self.start if source is None else source
+        adjacency = self.reverse_adjacency if reverse else self.adjacency
+        remaining = None if targets is None else set(targets)
+        costs: Dict[GraphNode, float] = {source: 0}
+        parents: Dict[GraphNode, GraphNode] = {}
+        distances: Dict[GraphNode, float] = {}
+        frontier: PriorityFrontier[GraphNode] = PriorityFrontier()
+        frontier.push(source, 0)
+        while not frontier.empty():
+            cost, node = frontier.pop_with_priority()
+            if node in distances: continue
+            distances[node] = cost
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining: break
+            for neighbor in adjacency.get(node, []):
+                if neighbor in distances: continue
+                # The edge cost is the distance between its nodes (in both directions)
+                new_cost = cost + euclidean_distance(node.position, neighbor.position)
+                if new_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = new_cost
+                    parents[neighbor] = node
+                    frontier.push(neighbor, new_cost)
+        return ShortestPathTree(source, distances, parents, reverse)
+
+    # Returns the distance from the source to every target (inf if it is not reachable) using a single search
+    def distances_from(self, source: GraphNode, targets: Iterable[GraphNode]) -> Dict[GraphNode, float]:
+        targets = list(targets)
+        tree = self.shortest_path_tree(source, targets)
+        return {target: tree.distance(target) for target in targets}
+
+    # Returns a matrix where matrix[i][j] is the distance from sources[i] to targets[j] (inf if it is not reachable)
+    # Every row is computed by one search, and the rows are computed in parallel by a pool of processes
+    # If processes is 1 (or there is only one source), the rows are computed in this process
+    def distance_matrix(self, sources: Sequence[GraphNode], targets: Sequence[GraphNode], processes: Optional[int] = None) -> List[List[float]]:
+        targets = list(targets)
+        if processes == 1 or len(sources) <= 1:
+            return [[tree.distance(target) for target in targets] for tree in (self.shortest_path_tree(source, targets) for source in sources)]
+        workers = processes or os.cpu_count() or 1
+        # Every worker receives a few chunks of rows so the work stays balanced without sending every row separately
+        chunksize = max(1, len(sources) // (4 * workers))
+        index: Dict[GraphNode, int] = {}
+        for node in (*self.adjacency, *self.reverse_adjacency, *sources, *targets):
+            index.setdefault(node, len(index))
+        nodes = list(index)
+        node_defs = [(node.name, node.position.x, node.position.y) for node in nodes]
+        adjacency = [[index[next_node] for next_node in self.adjacency.get(node, [])] for node in nodes]
+        target_ids = [index[target] for target in targets]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(node_defs, adjacency)) as executor:
+            return list(executor.map(_distance_row, [index[source] for source in sources], [target_ids] * len(sources), chunksize=chunksize))
+
     # Read a graph routing problem from file
+    # If use_disk_cache is True, the graph is loaded from its binary cache (which is written on the first load), see graph_cache.py
     @staticmethod
-    def from_file(path: str) -> 'GraphRoutingProblem':
+    def from_file(path: str, use_disk_cache: bool = False) -> 'GraphRoutingProblem':
+        if use_disk_cache:
+            return GraphRoutingProblem.from_csr_graph(path)
         problem_def: Dict[str, Dict] = json.load(open(path, 'r'))
         graph_def: Dict[str, Dict] = problem_def.get("graph", {})
         node_dict = {name: GraphNode(name, Point(*item.get("position", [0,0]))) for name, item in graph_def.items()}
         adjacency: Dict[GraphNode, List[GraphNode]] = {}
+        # The reverse adjacency is built in the same pass over the edges
+        reverse_adjacency: Dict[GraphNode, List[GraphNode]] = {node: [] for node in node_dict.values()}
         for name, item in graph_def.items():
             node = node_dict[name]
             adjacent = [node_dict[adjacent] for adjacent in sorted(item.get("adjacent", [])) if adjacent in node_dict]
             adjacency[node] = adjacent
+            for next_node in adjacent:
+                reverse_adjacency[next_node].append(node)
         start = node_dict[problem_def.get("start", "")]
         goal = node_dict[problem_def.get("goal", "")]
-        return GraphRoutingProblem(start, goal, adjacency)
+        problem = GraphRoutingProblem(start, goal, adjacency, reverse_adjacency)
+        problem.source_path = path
+        return problem
+
+    # Load a graph file through its binary cache and convert it to GraphNodes
+    # The nodes and the adjacent lists are in the same order as the ones created by from_file
+    @staticmethod
+    def from_csr_graph(path: str) -> 'GraphRoutingProblem':
+        # imported here since graph_cache depends on this module
+        from graph_cache import load_graph
+        graph, start, goal = load_graph(path)
+        nodes = [graph.to_graph_node(node) for node in range(graph.node_count)]
+        adjacency: Dict[GraphNode, List[GraphNode]] = {}
+        reverse_adjacency: Dict[GraphNode, List[GraphNode]] = {node: [] for node in nodes}
+        neighbors, offsets = graph.neighbors, graph.offsets
+        for u, node in enumerate(nodes):
+            adjacent = [nodes[neighbors[edge]] for edge in range(offsets[u], offsets[u+1])]
+            adjacency[node] = adjacent
+            for next_node in adjacent:
+                reverse_adjacency[next_node].append(node)
+        problem = GraphRoutingProblem(nodes[start], nodes[goal], adjacency, reverse_adjacency)
+        problem.source_path = path
+        return problem
 
 def graphrouting_heuristic(problem: GraphRoutingProblem, state: GraphNode) -> float:
     return euclidean_distance(state.position, problem.goal.position)
\ No newline at end of file
@@ -0,0 +1,232 @@
+from array import array
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+import hashlib, json, math, mmap, os, struct
+
+from graph_csr import CSRGraph
+
+# This file contains two faster ways to load a graph file:
+#
+# 1- A streaming reader (iter_graph_file, read_graph_file) that reads the JSON file in chunks and decodes one graph entry at a time,
+#    so the whole problem dictionary is never built in memory.
+#
+# 2- A binary cache (load_graph) that stores the graph in the CSR format (see graph_csr.py) next to the graph file.
+#    It is written the first time a graph file is loaded and after that, the file is memory-mapped and the arrays are used directly
+#    from the mapped memory (so nothing is parsed, sorted or copied except the node names).
+#    The cache remembers the modification time, the size and the SHA-1 hash of the graph file. If the time or the size changed,
+#    the hash is compared and the cache is rebuilt only if the content changed.
+#
+# The binary cache layout (all the numbers are in the byte order of the machine that wrote it) is:
+#   header: magic, version, source mtime_ns, source size, source sha1, node count N, edge count E, start, goal, names size
+#   xs: N doubles | ys: N doubles | offsets: N+1 int64 | weights: E doubles | name offsets: N+1 int64 | neighbors: E int32 | names: utf-8 bytes
+# Every section before the neighbors has 8-byte items, so all the sections are aligned without any padding.
+
+CACHE_MAGIC = b"GRAPHCSR"
+CACHE_VERSION = 1
+_HEADER = struct.Struct("=8sIqq20sqqqqq")
+
+#################################
+# The streaming JSON reader
+#################################
+
+# A minimal pull parser over a JSON text file
+# The containers that we want to walk through (the top-level object and the "graph" object) are parsed one key at a time,
+# and every other value is decoded at once with the standard decoder
+class _JsonStream:
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    # Read the next chunk into the buffer (and drop the part that was already consumed)
+    def _fill(self) -> bool:
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    # Skip the whitespace and return the next character (or "" at the end of the file) without consuming it
+    def peek(self) -> str:
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    # Consume the next character, it must be one of the given characters
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char == "" or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at offset {self.position} but found {char!r}")
+        self.position += 1
+        return char
+
+    # Decode the next value
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # The value may be cut by the end of the buffer, so we read more and try again
+                if self._fill(): continue
+                raise
+            # A number that ends exactly at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.position = end
+            return value
+
+    # Walk through an object and yield its keys
+    # The caller must consume the value of every key (using value() or keys()) before asking for the next key
+    def keys(self) -> Iterator[str]:
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key but found {key!r}")
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+# Read a graph file incrementally
+# It yields ("node", (name, item)) for every entry of the "graph" object (where item is the dictionary of the node)
+# and (key, value) for every other top-level key (for example: ("start", "a") and ("goal", "g"))
+def iter_graph_file(path: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, Any]]:
+    with open(path, 'r') as f:
+        stream = _JsonStream(f, chunk_size)
+        for key in stream.keys():
+            if key == "graph":
+                for name in stream.keys():
+                    yield "node", (name, stream.value())
+            else:
+                yield key, stream.value()
+
+# Read a graph file incrementally into a CSR graph and return the graph with the names of the start and the goal
+# The result is the same as CSRGraph.from_graph_def (same node ids, same edge order and same costs)
+def read_graph_file(path: str, chunk_size: int = 1 << 16) -> Tuple[CSRGraph, str, str]:
+    names: List[str] = []
+    xs, ys = array('d'), array('d')
+    # The adjacent nodes may appear later in the file, so the names are kept until all the nodes are known
+    adjacent_names: List[List[str]] = []
+    start, goal = "", ""
+    for key, value in iter_graph_file(path, chunk_size):
+        if key == "node":
+            name, item = value
+            x, y = item.get("position", [0,0])
+            names.append(name)
+            xs.append(x)
+            ys.append(y)
+            adjacent_names.append(sorted(item.get("adjacent", [])))
+        elif key == "start":
+            start = value
+        elif key == "goal":
+            goal = value
+    index = {name: i for i, name in enumerate(names)}
+    offsets, neighbors, weights = array('q', [0]), array('i'), array('d')
+    for u, adjacent in enumerate(adjacent_names):
+        for adjacent_name in adjacent:
+            v = index.get(adjacent_name)
+            if v is None: continue
+            dx, dy = xs[u] - xs[v], ys[u] - ys[v]
+            neighbors.append(v)
+            weights.append(math.sqrt(dx * dx + dy * dy))
+        offsets.append(len(neighbors))
+    return CSRGraph(names, xs, ys, offsets, neighbors, weights), start, goal
+
+#################################
+# The binary cache
+#################################
+
+# Returns the path of the binary cache of a graph file (for example: graphs/graph1.json -> graphs/graph1.csr.bin)
+def graph_cache_path(graph_path: str) -> str:
+    root, _ = os.path.splitext(graph_path)
+    return root + ".csr.bin"
+
+def _file_hash(path: str) -> bytes:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+# Write the graph to a binary cache file
+# The file is written under a temporary name then renamed so a reader never sees a partially written cache
+def write_graph_cache(path: str, graph: CSRGraph, start: int, goal: int, source_path: str) -> None:
+    stat = os.stat(source_path)
+    encoded = [name.encode("utf-8") for name in graph.names]
+    name_offsets = array('q', [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    header = _HEADER.pack(
+        CACHE_MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size, _file_hash(source_path),
+        graph.node_count, graph.edge_count, start, goal, name_offsets[-1]
+    )
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'wb') as f:
+        f.write(header)
+        for section, typecode in ((graph.xs, 'd'), (graph.ys, 'd'), (graph.offsets, 'q'), (graph.weights, 'd'), (name_offsets, 'q'), (graph.neighbors, 'i')):
+            f.write(section if isinstance(section, array) and section.typecode == typecode else array(typecode, section))
+        f.write(b"".join(encoded))
+    os.replace(temporary_path, path)
+
+# Read a binary cache file
+# It returns None if the file does not exist, if it has another format or if it was built from another version of the graph file
+def read_graph_cache(path: str, source_path: str) -> Optional[Tuple[CSRGraph, int, int]]:
+    if not os.path.exists(path) or os.path.getsize(path) < _HEADER.size: return None
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, mtime_ns, size, sha1, node_count, edge_count, start, goal, names_size = _HEADER.unpack_from(mapping, 0)
+    # A cache written on a machine with another byte order is rejected here since its version will not match
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        mapping.close()
+        return None
+    stat = os.stat(source_path)
+    if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+        if _file_hash(source_path) != sha1:
+            mapping.close()
+            return None
+        # The content did not change (the file was only touched or copied), so the new time and size are saved to skip hashing next time
+        with open(path, 'r+b') as f:
+            f.write(_HEADER.pack(magic, version, stat.st_mtime_ns, stat.st_size, sha1, node_count, edge_count, start, goal, names_size))
+    view = memoryview(mapping)
+    position = _HEADER.size
+    def section(typecode: str, count: int) -> memoryview:
+        nonlocal position
+        begin = position
+        position += count * struct.calcsize(typecode)
+        return view[begin:position].cast(typecode)
+    xs = section('d', node_count)
+    ys = section('d', node_count)
+    offsets = section('q', node_count + 1)
+    weights = section('d', edge_count)
+    name_offsets = section('q', node_count + 1)
+    neighbors = section('i', edge_count)
+    names_bytes = view[position:position + names_size]
+    names = [str(names_bytes[name_offsets[i]:name_offsets[i+1]], "utf-8") for i in range(node_count)]
+    # The memory views keep the mapping open as long as the graph uses them
+    return CSRGraph(names, xs, ys, offsets, neighbors, weights), start, goal
+
+# Load a graph file into a CSR graph and return the graph with the ids of the start and the goal
+# If use_disk_cache is True, the binary cache is used if it is valid, otherwise the file is read and the cache is written
+def load_graph(path: str, use_disk_cache: bool = True) -> Tuple[CSRGraph, int, int]:
+    cache_path = graph_cache_path(path)
+    if use_disk_cache:
+        cached = read_graph_cache(cache_path, path)
+        if cached is not None: return cached
+    graph, start, goal = read_graph_file(path)
+    start, goal = graph.index[start], graph.index[goal]
+    if use_disk_cache:
+        write_graph_cache(cache_path, graph, start, goal, path)
+    return graph, start, goal
@@ -0,0 +1,156 @@
+from array import array
+from typing import Dict, Iterable, List, Tuple
+import json, math
+
+from problem import Problem
+from graph import GraphNode, GraphRoutingProblem
+from mathutils import Point
+from helpers.utils import track_call_count
+
+# This file contains a compact backend for the graph routing problem
+# The nodes are numbered from 0 to N-1 and the edges are stored in the compressed sparse row (CSR) format:
+#   the outgoing edges of node u are the edges offsets[u] to offsets[u+1]-1,
+#   the destination of edge e is neighbors[e] and its cost (the euclidean distance) is weights[e]
+# All the data is kept in typed arrays (from the standard "array" module) so an edge takes 12 bytes
+# (4 bytes for the neighbor and 8 bytes for the weight) instead of a GraphNode reference in a python list,
+# and the edge costs are computed once while loading instead of on every get_cost call.
+class CSRGraph:
+    def __init__(self, names: List[str], xs: array, ys: array, offsets: array, neighbors: array, weights: array) -> None:
+        self.names = names                                          # The name of every node
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(names)} # The id of every node name
+        self.xs = xs                                                # The x coordinate of every node
+        self.ys = ys                                                # The y coordinate of every node
+        self.offsets = offsets                                      # The index of the first outgoing edge of every node (and the edge count at the end)
+        self.neighbors = neighbors                                  # The destination node of every edge
+        self.weights = weights                                      # The cost of every edge
+
+    @property
+    def node_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.neighbors)
+
+    # Returns the range of edge indices that go out of the given node
+    def edges(self, node: int) -> range:
+        return range(self.offsets[node], self.offsets[node+1])
+
+    # Returns the euclidean distance between two nodes
+    # It uses the same formula as mathutils.euclidean_distance so the costs are exactly the same as the GraphNode backend
+    def distance(self, u: int, v: int) -> float:
+        dx, dy = self.xs[u] - self.xs[v], self.ys[u] - self.ys[v]
+        return math.sqrt(dx * dx + dy * dy)
+
+    # Create a graph from the "graph" dictionary of a graph file
+    # The adjacent nodes are sorted by name like GraphRoutingProblem.from_file so the searches visit them in the same order
+    @staticmethod
+    def from_graph_def(graph_def: Dict[str, Dict]) -> 'CSRGraph':
+        names = list(graph_def.keys())
+        index = {name: i for i, name in enumerate(names)}
+        xs, ys = array('d'), array('d')
+        for item in graph_def.values():
+            x, y = item.get("position", [0,0])
+            xs.append(x)
+            ys.append(y)
+        offsets, neighbors, weights = array('q', [0]), array('i'), array('d')
+        for u, item in enumerate(graph_def.values()):
+            for adjacent in sorted(item.get("adjacent", [])):
+                v = index.get(adjacent)
+                if v is None: continue
+                dx, dy = xs[u] - xs[v], ys[u] - ys[v]
+                neighbors.append(v)
+                weights.append(math.sqrt(dx * dx + dy * dy))
+            offsets.append(len(neighbors))
+        return CSRGraph(names, xs, ys, offsets, neighbors, weights)
+
+    # Create a graph from the adjacency of a GraphRoutingProblem
+    @staticmethod
+    def from_problem(problem: GraphRoutingProblem) -> 'CSRGraph':
+        # The nodes that only appear as destinations are added after the nodes with outgoing edges
+        nodes = list(problem.adjacency.keys())
+        known = set(nodes)
+        for adjacent in problem.adjacency.values():
+            for node in adjacent:
+                if node not in known:
+                    known.add(node)
+                    nodes.append(node)
+        index = {node: i for i, node in enumerate(nodes)}
+        xs = array('d', (node.position.x for node in nodes))
+        ys = array('d', (node.position.y for node in nodes))
+        offsets, neighbors, weights = array('q', [0]), array('i'), array('d')
+        for node in nodes:
+            for adjacent in problem.adjacency.get(node, []):
+                neighbors.append(index[adjacent])
+                weights.append(problem.get_cost(node, adjacent))
+            offsets.append(len(neighbors))
+        return CSRGraph([node.name for node in nodes], xs, ys, offsets, neighbors, weights)
+
+    # Convert a node id to a GraphNode
+    def to_graph_node(self, node: int) -> GraphNode:
+        x, y = self.xs[node], self.ys[node]
+        return GraphNode(self.names[node], Point(int(x) if x.is_integer() else x, int(y) if y.is_integer() else y))
+
+# This is a thin adapter that exposes a CSR graph through the Problem interface so the search functions in search.py can run unchanged
+# The state is a node id and the action is the index of the edge to follow,
+# so get_successor and get_cost are just array lookups
+class CSRGraphRoutingProblem(Problem[int, int]):
+    def __init__(self, graph: CSRGraph, start: int, goal: int) -> None:
+        super().__init__()
+        self.graph = graph
+        self.start = start
+        self.goal = goal
+
+    def get_initial_state(self) -> int:
+        return self.start
+
+    def is_goal(self, state: int) -> bool:
+        return state == self.goal
+
+    # The actions are the indices of the outgoing edges of the node
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def get_actions(self, state: int) -> Iterable[int]:
+        return range(self.graph.offsets[state], self.graph.offsets[state+1])
+
+    def get_successor(self, state: int, action: int) -> int:
+        return self.graph.neighbors[action]
+
+    def get_cost(self, state: int, action: int) -> float:
+        return self.graph.weights[action]
+
+    # Generate all the successors in one call (see Problem.get_successors)
+    def get_successors(self, state: int) -> List[Tuple[int, int, float]]:
+        if self.successor_methods_replaced():
+            return super().get_successors(state)
+        neighbors, weights = self.graph.neighbors, self.graph.weights
+        return [(action, neighbors[action], weights[action]) for action in self.get_actions(state)]
+
+    # Convert a solution (a list of edge indices) to the list of GraphNodes that the GraphRoutingProblem searches return
+    def to_graph_nodes(self, path: List[int]) -> List[GraphNode]:
+        return [self.graph.to_graph_node(self.graph.neighbors[edge]) for edge in path]
+
+    # Convert a solution (a list of edge indices) to the list of visited node names
+    def to_node_names(self, path: List[int]) -> List[str]:
+        return [self.graph.names[self.graph.neighbors[edge]] for edge in path]
+
+    # Read a graph routing problem from file into the CSR backend
+    # If use_disk_cache is True, the graph is loaded from its binary cache (which is written on the first load), see graph_cache.py
+    @staticmethod
+    def from_file(path: str, use_disk_cache: bool = False) -> 'CSRGraphRoutingProblem':
+        if use_disk_cache:
+            from graph_cache import load_graph
+            return CSRGraphRoutingProblem(*load_graph(path))
+        with open(path, 'r') as f:
+            problem_def: Dict[str, Dict] = json.load(f)
+        graph = CSRGraph.from_graph_def(problem_def.get("graph", {}))
+        return CSRGraphRoutingProblem(graph, graph.index[problem_def.get("start", "")], graph.index[problem_def.get("goal", "")])
+
+    # Create the CSR version of a GraphRoutingProblem
+    @staticmethod
+    def from_problem(problem: GraphRoutingProblem) -> 'CSRGraphRoutingProblem':
+        graph = CSRGraph.from_problem(problem)
+        return CSRGraphRoutingProblem(graph, graph.index[problem.start.name], graph.index[problem.goal.name])
+
+def csr_graphrouting_heuristic(problem: CSRGraphRoutingProblem, state: int) -> float:
+    return problem.graph.distance(state, problem.goal)
@@ -0,0 +1,202 @@
+from typing import Dict, List, Optional, Tuple
+import heapq, math
+
+from graph import GraphNode, GraphRoutingProblem
+from problem import Solution
+
+# This file contains a contraction hierarchy (CH) for answering many routing queries on the same graph
+# In the preprocessing, the nodes are contracted one by one (from the least important to the most important).
+# Contracting a node removes it from the graph and adds a shortcut edge u->w for every pair of neighbors u->node->w
+# unless a path from u to w that is at most as cheap exists without the node (a witness path).
+# A query is then a bidirectional search where the forward search only follows edges to higher ranked nodes
+# and the backward search only follows (reversed) edges from higher ranked nodes. Both searches are tiny compared to UCS.
+# The shortcuts remember the node they skip so they can be unpacked into the original nodes.
+# The returned path cost is always the optimal cost. If many shortest paths exist, the returned path may be a different one
+# from the path returned by UniformCostSearch (with the same cost).
+
+# An edge of the hierarchy is stored as (cost, middle) where middle is the contracted node skipped by a shortcut (or -1 for an original edge)
+NO_MIDDLE = -1
+
+class ContractionHierarchy:
+    def __init__(self, nodes: List[GraphNode], rank: List[int], upward: List[List[Tuple[int, float]]], downward: List[List[Tuple[int, float]]], edges: Dict[Tuple[int, int], Tuple[float, int]]) -> None:
+        self.nodes = nodes                                  # The graph node of every node id
+        self.index = {node: i for i, node in enumerate(nodes)} # The id of every graph node
+        self.rank = rank                                    # The contraction order of every node
+        self.upward = upward                                # upward[u] = [(w, cost)] for the edges u->w where rank[w] > rank[u]
+        self.downward = downward                            # downward[w] = [(u, cost)] for the edges u->w where rank[u] > rank[w]
+        self.edges = edges                                  # edges[(u, w)] = (cost, middle) for every edge and shortcut
+
+    # Build the hierarchy of the graph of the given problem
+    # witness_limit is the maximum number of nodes settled by a witness search (a lower limit makes the preprocessing faster but adds more shortcuts)
+    @staticmethod
+    def build(problem: GraphRoutingProblem, witness_limit: int = 64) -> 'ContractionHierarchy':
+        nodes = list(problem.adjacency.keys())
+        nodes.extend(node for node in problem.reverse_adjacency if node not in problem.adjacency)
+        index = {node: i for i, node in enumerate(nodes)}
+        count = len(nodes)
+        # The remaining graph (without the contracted nodes) is stored as outgoing and incoming edge dictionaries
+        outgoing: List[Dict[int, float]] = [{} for _ in range(count)]
+        incoming: List[Dict[int, float]] = [{} for _ in range(count)]
+        edges: Dict[Tuple[int, int], Tuple[float, int]] = {}
+        for node, adjacent in problem.adjacency.items():
+            u = index[node]
+            for next_node in adjacent:
+                w = index[next_node]
+                if u == w: continue
+                cost = problem.get_cost(node, next_node)
+                if cost < outgoing[u].get(w, math.inf):
+                    outgoing[u][w] = incoming[w][u] = cost
+                    edges[(u, w)] = (cost, NO_MIDDLE)
+
+        # Search from the source in the remaining graph without passing through the excluded node
+        # It stops once every target is settled, the cost exceeds the limit or too many nodes are settled
+        def witness_search(source: int, excluded: int, targets: Dict[int, float], limit: float) -> Dict[int, float]:
+            distances = {source: 0}
+            heap = [(0, source)]
+            settled, remaining = 0, len(targets)
+            while heap and settled < witness_limit and remaining > 0:
+                cost, u = heapq.heappop(heap)
+                if cost > distances[u]: continue
+                if cost > limit: break
+                settled += 1
+                if u in targets: remaining -= 1
+                for w, edge_cost in outgoing[u].items():
+                    if w == excluded: continue
+                    new_cost = cost + edge_cost
+                    if new_cost < distances.get(w, math.inf):
+                        distances[w] = new_cost
+                        heapq.heappush(heap, (new_cost, w))
+            return distances
+
+        # Find the shortcuts needed to contract the node
+        def find_shortcuts(node: int) -> List[Tuple[int, int, float]]:
+            shortcuts = []
+            for u, in_cost in incoming[node].items():
+                targets = {w: in_cost + out_cost for w, out_cost in outgoing[node].items() if w != u}
+                if not targets: continue
+                distances = witness_search(u, node, targets, max(targets.values()))
+                for w, cost in targets.items():
+                    if distances.get(w, math.inf) > cost:
+                        shortcuts.append((u, w, cost))
+            return shortcuts
+
+        # The priority of a node is its edge difference (the added shortcuts minus the removed edges)
+        # plus the number of its contracted neighbors (to contract the nodes uniformly across the graph)
+        contracted_neighbors = [0] * count
+        def priority(node: int) -> int:
+            return len(find_shortcuts(node)) - len(incoming[node]) - len(outgoing[node]) + contracted_neighbors[node]
+
+        # After contracting a node, the priorities of its neighbors are updated (the outdated heap entries are skipped when popped)
+        # and a popped node is only contracted if its updated priority is still the lowest (lazy update)
+        priorities = [priority(node) for node in range(count)]
+        heap = [(priorities[node], node) for node in range(count)]
+        heapq.heapify(heap)
+        rank = [-1] * count
+        order = 0
+        while heap:
+            popped, node = heapq.heappop(heap)
+            if rank[node] != -1 or popped != priorities[node]: continue
+            priorities[node] = priority(node)
+            if heap and priorities[node] > heap[0][0]:
+                heapq.heappush(heap, (priorities[node], node))
+                continue
+            for u, w, cost in find_shortcuts(node):
+                if cost < outgoing[u].get(w, math.inf):
+                    outgoing[u][w] = incoming[w][u] = cost
+                    edges[(u, w)] = (cost, node)
+            # remove the node from the remaining graph
+            neighbors = set(incoming[node]) | set(outgoing[node])
+            for u in incoming[node]:
+                del outgoing[u][node]
+            for w in outgoing[node]:
+                del incoming[w][node]
+            incoming[node].clear()
+            outgoing[node].clear()
+            rank[node] = order
+            order += 1
+            for neighbor in neighbors:
+                contracted_neighbors[neighbor] += 1
+                priorities[neighbor] = priority(neighbor)
+                heapq.heappush(heap, (priorities[neighbor], neighbor))
+
+        # Split the edges and shortcuts into the upward and downward search graphs
+        upward: List[List[Tuple[int, float]]] = [[] for _ in range(count)]
+        downward: List[List[Tuple[int, float]]] = [[] for _ in range(count)]
+        for (u, w), (cost, _) in edges.items():
+            if rank[w] > rank[u]:
+                upward[u].append((w, cost))
+            else:
+                downward[w].append((u, cost))
+        return ContractionHierarchy(nodes, rank, upward, downward, edges)
+
+    # Returns the list of nodes from the start (excluded) to the goal and the path cost, or (None, inf) if there is no path
+    def query(self, start: GraphNode, goal: GraphNode) -> Tuple[Solution, float]:
+        if start == goal:
+            return [], 0
+        s, t = self.index.get(start), self.index.get(goal)
+        if s is None or t is None:
+            return None, math.inf
+        # Index 0 is the forward search and index 1 is the backward search
+        graphs = (self.upward, self.downward)
+        distances: List[Dict[int, float]] = [{s: 0}, {t: 0}]
+        parents: List[Dict[int, int]] = [{s: -1}, {t: -1}]
+        heaps = [[(0, s)], [(0, t)]]
+        best_cost, meeting = math.inf, -1
+        while True:
+            # Continue with the side that has the lowest key as long as it can still improve the best path
+            side = -1
+            for candidate in (0, 1):
+                if heaps[candidate] and heaps[candidate][0][0] < best_cost and (side == -1 or heaps[candidate][0][0] < heaps[side][0][0]):
+                    side = candidate
+            if side == -1: break
+            cost, u = heapq.heappop(heaps[side])
+            if cost > distances[side][u]: continue
+            other_cost = distances[1 - side].get(u)
+            if other_cost is not None and cost + other_cost < best_cost:
+                best_cost, meeting = cost + other_cost, u
+            for w, edge_cost in graphs[side][u]:
+                new_cost = cost + edge_cost
+                if new_cost < distances[side].get(w, math.inf):
+                    distances[side][w] = new_cost
+                    parents[side][w] = u
+                    heapq.heappush(heaps[side], (new_cost, w))
+        if meeting == -1:
+            return None, math.inf
+        # Collect the hierarchy edges on the path then unpack the shortcuts
+        forward = []
+        node = meeting
+        while node != s:
+            forward.append((parents[0][node], node))
+            node = parents[0][node]
+        forward.reverse()
+        node = meeting
+        while node != t:
+            forward.append((node, parents[1][node]))
+            node = parents[1][node]
+        path = []
+        for u, w in forward:
+            self._unpack(u, w, path)
+        return [self.nodes[node] for node in path], best_cost
+
+    # Append the original nodes (excluding u) of the edge u->w to the path
+    def _unpack(self, u: int, w: int, path: List[int]) -> None:
+        stack = [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            _, middle = self.edges[(u, w)]
+            if middle == NO_MIDDLE:
+                path.append(w)
+            else:
+                # the first half must be unpacked first so it is pushed last
+                stack.append((middle, w))
+                stack.append((u, middle))
+
+# This function has the same interface as the uninformed search functions
+# It builds the hierarchy once per problem (and keeps it in the problem cache) then runs a query from the state to the goal
+def ContractionHierarchySearch(problem: GraphRoutingProblem, initial_state: GraphNode) -> Solution:
+    hierarchy: Optional[ContractionHierarchy] = problem.cache().get("contraction_hierarchy")
+    if hierarchy is None:
+        hierarchy = ContractionHierarchy.build(problem)
+        problem.cache()["contraction_hierarchy"] = hierarchy
+    path, _ = hierarchy.query(initial_state, problem.goal)
+    return path
@@ -0,0 +1,125 @@
+from typing import Dict, List, Optional
+import json, math, os
+
+from graph import GraphNode, GraphRoutingProblem, graphrouting_heuristic
+
+# This file contains the ALT (A*, Landmarks and Triangle inequality) heuristic for the graph routing problem
+# In a preprocessing step, we pick a few landmark nodes and compute the exact distances from and to every landmark.
+# Then for any node n, goal t and landmark L, the triangle inequality gives two lower bounds on the distance d(n, t):
+#   d(n, t) >= d(L, t) - d(L, n)    and    d(n, t) >= d(n, L) - d(t, L)
+# The heuristic is the maximum of these bounds (and the euclidean distance). It is consistent since each bound is.
+
+# A distance table maps every node reachable from (or reaching) a landmark to its distance
+DistanceTable = Dict[GraphNode, float]
+
+# Compute the exact distance from the source to every reachable node
+# If reverse is True, the edges are followed backward so the result is the distance from every node to the source
+def shortest_distances(problem: GraphRoutingProblem, source: GraphNode, reverse: bool = False) -> DistanceTable:
+    return problem.shortest_path_tree(source, reverse=reverse).distances
+
+class LandmarkTable:
+    def __init__(self, landmarks: List[GraphNode], from_landmarks: List[DistanceTable], to_landmarks: List[DistanceTable]) -> None:
+        self.landmarks = landmarks              # The landmark nodes
+        self.from_landmarks = from_landmarks    # from_landmarks[i][n] = d(landmarks[i], n)
+        self.to_landmarks = to_landmarks        # to_landmarks[i][n] = d(n, landmarks[i])
+
+    # Pick the landmarks using the farthest-point selection:
+    # the first landmark is the node farthest from an arbitrary node, then every new landmark
+    # is the node whose distance to its nearest landmark is the largest (unreachable nodes are picked first)
+    @staticmethod
+    def build(problem: GraphRoutingProblem, count: int) -> 'LandmarkTable':
+        nodes = list(problem.adjacency.keys())
+        nodes.extend(node for node in problem.reverse_adjacency if node not in problem.adjacency)
+        landmarks, from_landmarks, to_landmarks = [], [], []
+        if not nodes: return LandmarkTable(landmarks, from_landmarks, to_landmarks)
+        # nearest holds the distance of every node to its nearest landmark (in either direction)
+        # before picking the first landmark, it holds the distance from the first node
+        seed_distances = shortest_distances(problem, nodes[0])
+        nearest = {node: seed_distances.get(node, math.inf) for node in nodes}
+        for _ in range(min(count, len(nodes))):
+            landmark = max(nodes, key=lambda node: nearest[node])
+            if landmark in landmarks: break
+            landmarks.append(landmark)
+            from_landmarks.append(shortest_distances(problem, landmark))
+            to_landmarks.append(shortest_distances(problem, landmark, reverse=True))
+            for node in nodes:
+                distance = min(from_landmarks[-1].get(node, math.inf), to_landmarks[-1].get(node, math.inf))
+                nearest[node] = distance if len(landmarks) == 1 else min(nearest[node], distance)
+        return LandmarkTable(landmarks, from_landmarks, to_landmarks)
+
+    # Compute the lower bound on the distance from the node to the goal
+    def lower_bound(self, node: GraphNode, goal: GraphNode) -> float:
+        bound = 0
+        for from_landmark, to_landmark in zip(self.from_landmarks, self.to_landmarks):
+            # d(n, t) >= d(L, t) - d(L, n)
+            landmark_to_node, landmark_to_goal = from_landmark.get(node), from_landmark.get(goal)
+            if landmark_to_node is not None:
+                # If L reaches n but not t, then n does not reach t
+                if landmark_to_goal is None: return math.inf
+                bound = max(bound, landmark_to_goal - landmark_to_node)
+            # d(n, t) >= d(n, L) - d(t, L)
+            node_to_landmark, goal_to_landmark = to_landmark.get(node), to_landmark.get(goal)
+            if goal_to_landmark is not None:
+                # If t reaches L but n does not, then n does not reach t
+                if node_to_landmark is None: return math.inf
+                bound = max(bound, node_to_landmark - goal_to_landmark)
+        return bound
+
+    # Save the table to a JSON file (the nodes are stored by name)
+    def save(self, path: str, source_path: Optional[str] = None) -> None:
+        data = {
+            "source": _file_signature(source_path),
+            "landmarks": [landmark.name for landmark in self.landmarks],
+            "from_landmarks": [{node.name: distance for node, distance in table.items()} for table in self.from_landmarks],
+            "to_landmarks": [{node.name: distance for node, distance in table.items()} for table in self.to_landmarks],
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    # Load a table from a JSON file, it returns None if the file does not exist or if it was computed for another version of the graph file
+    @staticmethod
+    def load(path: str, problem: GraphRoutingProblem, source_path: Optional[str] = None) -> Optional['LandmarkTable']:
+        if not os.path.exists(path): return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get("source") != _file_signature(source_path): return None
+        nodes = {node.name: node for node in problem.reverse_adjacency}
+        nodes.update((node.name, node) for node in problem.adjacency)
+        to_nodes = lambda table: {nodes[name]: distance for name, distance in table.items()}
+        return LandmarkTable(
+            [nodes[name] for name in data["landmarks"]],
+            [to_nodes(table) for table in data["from_landmarks"]],
+            [to_nodes(table) for table in data["to_landmarks"]]
+        )
+
+# The signature of a file is its modification time and its size (it is used to detect outdated caches)
+def _file_signature(path: Optional[str]):
+    if path is None or not os.path.exists(path): return None
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+# Returns the path of the landmark cache of a graph file (for example: graphs/graph1.json -> graphs/graph1.landmarks4.json)
+def landmark_cache_path(graph_path: str, count: int) -> str:
+    return f"{os.path.splitext(graph_path)[0]}.landmarks{count}.json"
+
+# Preprocess the landmarks of the problem and store them in the problem cache so that landmark_heuristic can use them
+# If use_disk_cache is True and the problem was read from a file, the table is loaded from (or saved to) a file next to the graph file
+def preprocess_landmarks(problem: GraphRoutingProblem, count: int = 4, use_disk_cache: bool = True) -> LandmarkTable:
+    table = None
+    cache_path = None
+    if use_disk_cache and problem.source_path is not None:
+        cache_path = landmark_cache_path(problem.source_path, count)
+        table = LandmarkTable.load(cache_path, problem, problem.source_path)
+    if table is None:
+        table = LandmarkTable.build(problem, count)
+        if cache_path is not None:
+            table.save(cache_path, problem.source_path)
+    problem.cache()["landmarks"] = table
+    return table
+
+# The ALT heuristic, it uses the landmarks stored by preprocess_landmarks (they are computed without a disk cache if missing)
+def landmark_heuristic(problem: GraphRoutingProblem, state: GraphNode) -> float:
+    table: LandmarkTable = problem.cache().get("landmarks")
+    if table is None:
+        table = preprocess_landmarks(problem, use_disk_cache=False)
+    return max(table.lower_bound(state, problem.goal), graphrouting_heuristic(problem, state))
@@ -0,0 +1,106 @@
+from typing import Callable, Dict, List, Optional
+import math
+
+from graph import GraphNode, GraphRoutingProblem
+from frontier import PriorityFrontier
+from mathutils import euclidean_distance
+from problem import Solution
+from search_stats import SearchStats
+from search_budget import SearchBudget
+
+# This file contains bidirectional searches for the graph routing problem
+# They run a forward search from the start and a backward search (over the reverse adjacency) from the goal
+# and stop once the two searches prove that no path through the unexplored nodes can be cheaper than the best meeting point.
+# Like the searches in search.py, they return the list of nodes from the start (excluded) to the goal or None if there is no solution
+# (or a BudgetExceeded result if a budget is given and it runs out, see search_budget.py).
+
+# A potential function maps a node to a number that is added to the path cost when ordering the forward frontier
+# The backward search uses the negated potential so both searches work on the same reduced edge costs
+PotentialFunction = Callable[[GraphNode], float]
+
+def _bidirectional_search(problem: GraphRoutingProblem, initial_state: GraphNode, potential: PotentialFunction, stats: Optional[SearchStats], budget: Optional[SearchBudget]) -> Solution:
+    goal = problem.goal
+    if initial_state == goal:
+        return []
+    # Index 0 is the forward search and index 1 is the backward search
+    costs: List[Dict[GraphNode, float]] = [{initial_state: 0}, {goal: 0}]
+    parents: List[Dict[GraphNode, GraphNode]] = [{initial_state: None}, {goal: None}]
+    explored = [set(), set()]
+    frontiers = [PriorityFrontier(), PriorityFrontier()]
+    frontiers[0].push(initial_state, potential(initial_state))
+    frontiers[1].push(goal, -potential(goal))
+    # meter to charge the expansions of both searches to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # best_cost and meeting hold the cheapest path found so far and the node where the two searches met on it
+    best_cost, meeting = math.inf, None
+    while not frontiers[0].empty() and not frontiers[1].empty():
+        forward_top, backward_top = frontiers[0].heap[0][0], frontiers[1].heap[0][0]
+        # With the forward potential p and the backward potential -p, the keys of the two searches sum up to
+        # a lower bound on the cost of any path that was not found yet, so we can stop once it reaches the best cost
+        if forward_top + backward_top >= best_cost:
+            break
+        # Expand the side with the lower key
+        side = 0 if forward_top <= backward_top else 1
+        sign = 1 if side == 0 else -1
+        key, node = frontiers[side].pop_with_priority()
+        cost = costs[side][node]
+        # skip the stale entries (the node was pushed again with a lower cost or was already expanded)
+        if node in explored[side] or key > cost + sign * potential(node):
+            if stats is not None: stats.stale_pops += 1
+            continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored[0]) + len(explored[1])):
+            return meter.exceeded(stats)
+        explored[side].add(node)
+        if stats is not None: stats.expanded += 1
+        other_costs = costs[1 - side]
+        if side == 0:
+            # The forward search expands through get_actions so the expansions are recorded like the other searches
+            neighbors = problem.get_actions(node)
+        else:
+            neighbors = problem.reverse_adjacency.get(node, [])
+        for neighbor in neighbors:
+            if neighbor in explored[side]:
+                continue
+            # The cost of the edge in its original direction
+            edge_cost = problem.get_cost(node, neighbor) if side == 0 else problem.get_cost(neighbor, node)
+            new_cost = cost + edge_cost
+            if new_cost < costs[side].get(neighbor, math.inf):
+                costs[side][neighbor] = new_cost
+                parents[side][neighbor] = node
+                frontiers[side].push(neighbor, new_cost + sign * potential(neighbor))
+            elif stats is not None:
+                stats.skipped_pushes += 1
+            # If the other search already reached this node, we found a path through it
+            if neighbor in other_costs and costs[side][neighbor] + other_costs[neighbor] < best_cost:
+                best_cost = costs[side][neighbor] + other_costs[neighbor]
+                meeting = neighbor
+        if stats is not None: stats.peak_frontier = max(stats.peak_frontier, len(frontiers[0]) + len(frontiers[1]))
+    # return None if there is no solution
+    if meeting is None:
+        return None
+    # Rebuild the path from the start to the meeting node then from the meeting node to the goal
+    path = []
+    node = meeting
+    while node != initial_state:
+        path.append(node)
+        node = parents[0][node]
+    path.reverse()
+    node = parents[1][meeting]
+    while node is not None:
+        path.append(node)
+        node = parents[1][node]
+    return path
+
+# Bidirectional uniform cost search (bidirectional Dijkstra)
+def BidirectionalUniformCostSearch(problem: GraphRoutingProblem, initial_state: GraphNode, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None) -> Solution:
+    return _bidirectional_search(problem, initial_state, lambda _: 0, stats, budget)
+
+# Bidirectional A* with the average potential: p(n) = (h_goal(n) - h_start(n)) / 2
+# where h_goal is the euclidean distance to the goal and h_start is the euclidean distance from the start
+# Since every edge costs the euclidean distance between its nodes, both heuristics are consistent and so is their average
+def BidirectionalAStarSearch(problem: GraphRoutingProblem, initial_state: GraphNode, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None) -> Solution:
+    goal_position, start_position = problem.goal.position, initial_state.position
+    def potential(node: GraphNode) -> float:
+        return (euclidean_distance(node.position, goal_position) - euclidean_distance(start_position, node.position)) / 2
+    return _bidirectional_search(problem, initial_state, potential, stats, budget)
@@ -1,8 +1,10 @@
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Iterator
+from typing import Iterable, Iterator, List, Tuple
 import math
 
+from helpers.mt19937 import RandomGenerator
+
 # the class Point will hold a 2D coordinate on a discrete grid
 # We use dataclass with frozen=True to automatically implement:
 #   the constructor, the == operator, the hash function and to make the class immutable
@@ -75,4 +77,35 @@ Direction._Vectors = [
     Point( 0, -1),
     Point(-1,  0),
     Point( 0,  1)
-]
\ No newline at end of file
+]
+
+# A Zobrist table assigns a random 64-bit key to every (piece, cell) pair of a width x height grid
+# The hash of a grid position is the XOR of the keys of its (piece, cell) pairs, so when a piece moves from one cell to another,
+# the new hash is found in O(1) by XORing out the old key and XORing in the new one (instead of hashing the whole position again).
+# The keys are generated by the project's RandomGenerator with a fixed seed, so the hashes are the same in every run and every process.
+class ZobristTable:
+    def __init__(self, width: int, height: int, pieces: int = 1, seed: int = 0) -> None:
+        self.width = width
+        self.height = height
+        rng = RandomGenerator(seed)
+        # keys[piece][y * width + x] = the key of the piece at the cell (x, y)
+        self.keys: List[List[int]] = [
+            [(rng.generate() << 32) | rng.generate() for _ in range(width * height)]
+            for _ in range(pieces)
+        ]
+
+    # Returns the key of a piece at the given cell
+    def key(self, piece: int, point: Point) -> int:
+        return self.keys[piece][point.y * self.width + point.x]
+
+    # Returns the hash of a position given as (piece, cell) pairs
+    def hash(self, pieces: Iterable[Tuple[int, Point]]) -> int:
+        value = 0
+        for piece, point in pieces:
+            value ^= self.keys[piece][point.y * self.width + point.x]
+        return value
+
+    # Returns the hash after moving a piece from the source cell to the destination cell
+    def move(self, value: int, piece: int, source: Point, destination: Point) -> int:
+        keys, width = self.keys[piece], self.width
+        return value ^ keys[source.y * width + source.x] ^ keys[destination.y * width + destination.x]
@@ -0,0 +1,46 @@
+from typing import Generic, List, Optional
+from problem import S, A
+
+# The node store keeps one record per search node: the state, the index of its parent node,
+# the action that generated it from its parent and its path cost g(n).
+# Instead of copying the whole action list for every generated successor (which is O(depth) per node),
+# the searches store the node once and only rebuild the path (by following the parent indices) when a goal is found.
+# The records are stored in parallel lists (structure of arrays) so a node is just an integer index.
+class NodeStore(Generic[S, A]):
+    # This index is used as the parent of the root node
+    NO_PARENT = -1
+
+    def __init__(self) -> None:
+        self.states: List[S] = []
+        self.parents: List[int] = []
+        self.actions: List[Optional[A]] = []
+        self.costs: List[float] = []
+
+    # Add a node to the store and return its index
+    def add(self, state: S, parent: int = NO_PARENT, action: Optional[A] = None, cost: float = 0) -> int:
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+        self.costs.append(cost)
+        return len(self.states) - 1
+
+    # Returns the state stored in the given node
+    def state(self, node: int) -> S:
+        return self.states[node]
+
+    # Returns the path cost g(n) stored in the given node
+    def cost(self, node: int) -> float:
+        return self.costs[node]
+
+    # Rebuild the list of actions from the root to the given node by following the parent indices
+    def path(self, node: int) -> List[A]:
+        parents, actions = self.parents, self.actions
+        path: List[A] = []
+        while parents[node] != NodeStore.NO_PARENT:
+            path.append(actions[node])
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def __len__(self) -> int:
+        return len(self.states)
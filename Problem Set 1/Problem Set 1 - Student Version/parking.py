@@ -1,10 +1,23 @@
-from typing import Any, Dict, Set, Tuple, List
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 from problem import Problem
-from mathutils import Direction, Point
+from mathutils import Direction, Point, ZobristTable
+from grid_kernel import GridKernel
 from helpers.utils import NotImplemented
 
-#TODO: (Optional) Instead of Any, you can define a type for the parking state
-ParkingState = Dict[int, Point]
+# The parking state is immutable and hashable, so it can be stored in the explored sets and used as a dictionary key
+# Every cell is stored as its linear index in the grid kernel (see grid_kernel.py)
+#   cars: a tuple where cars[i] is the cell index of car 'i'
+#   occupied: a bitmask where the bit of every cell that contains a car is set
+#   key: the Zobrist key of the cars (see mathutils.ZobristTable), which is used as the hash of the state
+# The occupancy bitmask and the key are updated in get_successor, so get_actions does not rebuild the set of occupied cells
+# and the state is hashed without hashing the tuple of cars. The key only depends on the cars, so it does not change the equality.
+class ParkingState(NamedTuple):
+    cars: Tuple[int, ...]
+    occupied: int
+    key: int
+
+    def __hash__(self) -> int:
+        return self.key
 
 # An action of the parking problem is a tuple containing an index 'i' and a direction 'd' where car 'i' should move in the direction 'd'.
 ParkingAction = Tuple[int, Direction]
@@ -17,62 +30,114 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
                             # if a position does not contain a parking slot, it will not be in this dictionary.
     width: int              # The width of the parking lot.
     height: int             # The height of the parking lot.
+    # The following are precomputed from the fields above by build_index (see ParkingState for the cell indices)
+    grid: GridKernel        # The grid kernel of the passages.
+    stride: int             # The distance between the indices of two vertically adjacent cells (width + 1).
+    offsets: List[int]      # The index offset of a move in every direction (in the order of Direction).
+    passage_mask: int       # The bitmask of the passages.
+    cell_slots: Dict[int, int]          # The slot index of every cell index that contains a parking slot.
+    goal_cars: Tuple[Optional[int], ...] # The cell index of the slot of every car (None if the car has no slot).
+    zobrist: ZobristTable   # The key of every car at every cell (the table is stride cells wide, so keys[car][cell index] is the key).
+
+    # Precompute the cell indices and the bitmasks used by the states
+    # It must be called again if the passages, the cars or the slots are changed
+    def build_index(self) -> None:
+        self.grid = GridKernel(self.width, self.height, self.passages)
+        self.stride = self.grid.stride
+        self.offsets = self.grid.offsets
+        self.passage_mask = self.grid.walkable_mask
+        self.cell_slots = {self.to_index(position): index for position, index in self.slots.items()}
+        slot_cells = {index: cell for cell, index in self.cell_slots.items()}
+        self.goal_cars = tuple(slot_cells.get(index) for index in range(len(self.cars)))
+        self.zobrist = ZobristTable(self.stride, self.height, len(self.cars))
+
+    # Convert a point to a cell index and back
+    def to_index(self, point: Point) -> int:
+        return self.grid.to_index(point)
+
+    def to_point(self, index: int) -> Point:
+        return self.grid.to_point(index)
+
+    # Returns the positions of the cars in the given state
+    def car_positions(self, state: ParkingState) -> Tuple[Point, ...]:
+        return tuple(self.to_point(cell) for cell in state.cars)
 
     # This function should return the initial state
     def get_initial_state(self) -> ParkingState:
         #TODO: ADD YOUR CODE HERE
-        initial_state : ParkingState = {}
-        # assign each car to its initial position
-        for index, value in enumerate(self.cars):
-            initial_state[index] = value
-        return initial_state
+        cars = tuple(self.to_index(position) for position in self.cars)
+        occupied, key = 0, 0
+        for index, cell in enumerate(cars):
+            occupied |= 1 << cell
+            key ^= self.zobrist.keys[index][cell]
+        return ParkingState(cars, occupied, key)
 
     
     # This function should return True if the given state is a goal. Otherwise, it should return False.
     def is_goal(self, state: ParkingState) -> bool:
         #TODO: ADD YOUR CODE HERE
         # check if all cars are in their slots
-        for key,val in state.items():
-            if ((val not in self.slots) or (key != self.slots[val])):
-                return False
-        return True
+        return state.cars == self.goal_cars
     
     # This function returns a list of all the possible actions that can be applied to the given state
     def get_actions(self, state: ParkingState) -> List[ParkingAction]:
         #TODO: ADD YOUR CODE HERE
         actions : List[ParkingAction] = []
-        # get all locations of cars
-        locations_with_cars = set(state.values())
+        occupied = state.occupied
+        moves = self.grid.moves
         # iterate over all cars
-        for index, value in state.items():
-            for direction in Direction:
-                new_pos = value + direction.to_vector()
-                # check if the new position is a passage and does not contain a car
+        for index, cell in enumerate(state.cars):
+            # the kernel gives the neighbors of the cell that are passages
+            for direction, new_cell in moves[cell]:
+                # check if the new position does not contain a car
                 # then it is a valid action
-                if ((new_pos in self.passages) and (new_pos not in locations_with_cars)):
+                if not (occupied >> new_cell) & 1:
                     actions.append((index,direction))
         return actions
     
     # This function returns a new state which is the result of applying the given action to the given state
     def get_successor(self, state: ParkingState, action: ParkingAction) -> ParkingState:
         #TODO: ADD YOUR CODE HERE
-        new_state = dict(state)
         car_index, direction = action
-        new_state[car_index] += direction.to_vector()
-        return new_state
+        cell = state.cars[car_index]
+        new_cell = cell + self.offsets[direction]
+        cars = state.cars[:car_index] + (new_cell,) + state.cars[car_index+1:]
+        # the car leaves its cell and occupies the new cell
+        keys = self.zobrist.keys[car_index]
+        return ParkingState(cars, state.occupied ^ (1 << cell) ^ (1 << new_cell), state.key ^ keys[cell] ^ keys[new_cell])
     
     # This function returns the cost of applying the given action to the given state
     def get_cost(self, state: ParkingState, action: ParkingAction) -> float:
         #TODO: ADD YOUR CODE HERE
         index, direction = action
-        new_pos = state[index] + direction.to_vector()
+        return self._move_cost(index, state.cars[index] + self.offsets[direction])
+
+    # The cost of moving the car 'index' to the cell new_cell (used by both get_cost and get_successors)
+    def _move_cost(self, index: int, new_cell: int) -> float:
         # if the index is 0 (A) then the cost is 26 if the index is 25 (Z) then the cost is 1 (least ranking employee)
         cost = 26 - index
         # if the new position is a slot and it is not the slot of the current car then add 100 to the cost
-        if(new_pos in self.slots  and self.slots[new_pos] != index):
+        slot = self.cell_slots.get(new_cell)
+        if(slot is not None and slot != index):
             cost+=100
         return cost
     
+    # Generate all the successors in one call (see Problem.get_successors)
+    def get_successors(self, state: ParkingState) -> List[Tuple[ParkingAction, ParkingState, float]]:
+        if self.successor_methods_replaced():
+            return super().get_successors(state)
+        cars, occupied, key = state
+        offsets, zobrist_keys, move_cost = self.offsets, self.zobrist.keys, self._move_cost
+        successors = []
+        for action in self.get_actions(state):
+            index, direction = action
+            cell = cars[index]
+            new_cell = cell + offsets[direction]
+            keys = zobrist_keys[index]
+            new_state = ParkingState(cars[:index] + (new_cell,) + cars[index+1:], occupied ^ (1 << cell) ^ (1 << new_cell), key ^ keys[cell] ^ keys[new_cell])
+            successors.append((action, new_state, move_cost(index, new_cell)))
+        return successors
+
     # Read a parking problem from text containing a grid of tiles
     @staticmethod
     def from_text(text: str) -> 'ParkingProblem':
@@ -96,6 +161,7 @@ class ParkingProblem(Problem[ParkingState, ParkingAction]):
         problem.slots = {position:index for index, position in slots.items()}
         problem.width = width
         problem.height = height
+        problem.build_index()
         return problem
 
     # Read a parking problem from file containing a grid of tiles
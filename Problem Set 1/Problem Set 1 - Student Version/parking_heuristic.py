@@ -0,0 +1,152 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import heapq, math
+
+from parking import ParkingProblem, ParkingState
+
+# This file contains heuristics for the parking problem (see parking.py)
+#
+# 1- parking_heuristic: for every car, a BFS from its slot over the passages (ignoring the other cars) gives the number of moves
+#    that the car needs to reach its slot from every cell. Moving the car 'i' costs at least 26 - i, so the heuristic is
+#        sum over the cars of (26 - i) * distance(car i, slot i)
+#    It is consistent: an action moves a single car 'i' by one cell, so it changes the sum by at most 26 - i which is at most its cost.
+#
+# 2- parking_pdb_heuristic: the cars can block each other (for example, when they are in the same corridor) and the distance maps
+#    ignore that. For some pairs of interfering cars, a pattern database stores the exact cost to move both cars to their slots
+#    when they are the only cars in the parking lot (with the same costs as ParkingProblem.get_cost, including the penalty
+#    for entering the slot of another car). The cars are split into disjoint pairs and singles, and the heuristic is the sum of
+#    the pattern database of every pair and of the weighted distance of every single car.
+#    Every action moves a car of a single group, and the value of every group is the exact cost of a relaxed problem
+#    (removing the other cars only removes obstacles), so the sum stays consistent.
+#
+# A car without a slot (or whose slot cannot be reached) can never be parked, so the heuristic returns infinity.
+
+# Returns the neighbors of every passage cell (as cell indices)
+def passage_graph(problem: ParkingProblem) -> Dict[int, List[int]]:
+    cache = problem.cache()
+    graph = cache.get("parking_passage_graph")
+    if graph is None:
+        cells = {problem.to_index(position) for position in problem.passages}
+        graph = cache["parking_passage_graph"] = {
+            cell: [cell + offset for offset in problem.offsets if cell + offset in cells]
+            for cell in cells
+        }
+    return graph
+
+# Returns the number of moves from every passage cell to the source cell (a missing cell cannot reach it)
+def bfs_distances(graph: Dict[int, List[int]], source: int) -> Dict[int, int]:
+    distances = {source: 0}
+    queue = deque([source])
+    while queue:
+        cell = queue.popleft()
+        for neighbor in graph[cell]:
+            if neighbor not in distances:
+                distances[neighbor] = distances[cell] + 1
+                queue.append(neighbor)
+    return distances
+
+# Returns the distance map from the slot of every car (None if the car has no slot)
+def slot_distance_maps(problem: ParkingProblem) -> List[Optional[Dict[int, int]]]:
+    cache = problem.cache()
+    maps = cache.get("parking_distance_maps")
+    if maps is None:
+        graph = passage_graph(problem)
+        maps = cache["parking_distance_maps"] = [
+            None if slot is None else bfs_distances(graph, slot) for slot in problem.goal_cars
+        ]
+    return maps
+
+# The weighted distance of a single car to its slot
+def car_estimate(maps: List[Optional[Dict[int, int]]], index: int, cell: int) -> float:
+    distances = maps[index]
+    if distances is None: return math.inf
+    distance = distances.get(cell)
+    return math.inf if distance is None else (26 - index) * distance
+
+def parking_heuristic(problem: ParkingProblem, state: ParkingState) -> float:
+    maps = slot_distance_maps(problem)
+    return sum(car_estimate(maps, index, cell) for index, cell in enumerate(state.cars))
+
+# The exact cost to park two cars when they are the only cars in the parking lot, for every pair of their cells
+# It is computed by a backward Dijkstra search from the state where both cars are in their slots
+class PairPatternDatabase:
+    def __init__(self, problem: ParkingProblem, first: int, second: int) -> None:
+        self.first = first
+        self.second = second
+        graph = passage_graph(problem)
+        cars = (first, second)
+        # The cost of moving a car into a cell (see ParkingProblem.get_cost)
+        def cost(car: int, cell: int) -> int:
+            slot = problem.cell_slots.get(cell)
+            return 26 - car + (100 if slot is not None and slot != car else 0)
+        goal = (problem.goal_cars[first], problem.goal_cars[second])
+        self.costs: Dict[Tuple[int, int], int] = {goal: 0}
+        queue = [(0, goal)]
+        while queue:
+            value, cells = heapq.heappop(queue)
+            if value > self.costs[cells]: continue
+            # Undo a move of one of the cars: the car came to its cell from a neighbor that is not the cell of the other car
+            for moved in range(2):
+                cell, other = cells[moved], cells[1 - moved]
+                move_cost = value + cost(cars[moved], cell)
+                for previous in graph[cell]:
+                    if previous == other: continue
+                    previous_cells = (previous, other) if moved == 0 else (other, previous)
+                    if move_cost < self.costs.get(previous_cells, math.inf):
+                        self.costs[previous_cells] = move_cost
+                        heapq.heappush(queue, (move_cost, previous_cells))
+
+    def estimate(self, state: ParkingState) -> float:
+        return self.costs.get((state.cars[self.first], state.cars[self.second]), math.inf)
+
+# Returns True if the shortest paths of the cars cross the start or the slot of each other
+def cars_interfere(problem: ParkingProblem, maps: List[Optional[Dict[int, int]]], first: int, second: int) -> bool:
+    graph = passage_graph(problem)
+    starts = [problem.to_index(position) for position in problem.cars]
+    def path_cells(car: int) -> set:
+        from_start = bfs_distances(graph, starts[car])
+        to_slot = maps[car]
+        length = to_slot.get(starts[car], math.inf)
+        return {cell for cell, distance in from_start.items() if distance + to_slot.get(cell, math.inf) == length}
+    first_path, second_path = path_cells(first), path_cells(second)
+    return (
+        starts[second] in first_path or problem.goal_cars[second] in first_path or
+        starts[first] in second_path or problem.goal_cars[first] in second_path
+    )
+
+# Choose the disjoint pairs of interfering cars and build their pattern databases
+# The pairs are picked greedily by how much their pattern database improves on the distance maps in the initial state
+def pair_pattern_databases(problem: ParkingProblem) -> List[PairPatternDatabase]:
+    cache = problem.cache()
+    databases = cache.get("parking_pair_databases")
+    if databases is not None: return databases
+    maps = slot_distance_maps(problem)
+    initial_state = problem.get_initial_state()
+    parkable = [index for index, distances in enumerate(maps) if distances is not None and initial_state.cars[index] in distances]
+    candidates = []
+    for i, first in enumerate(parkable):
+        for second in parkable[i+1:]:
+            if not cars_interfere(problem, maps, first, second): continue
+            database = PairPatternDatabase(problem, first, second)
+            gain = database.estimate(initial_state) - car_estimate(maps, first, initial_state.cars[first]) - car_estimate(maps, second, initial_state.cars[second])
+            if gain > 0:
+                candidates.append((gain, first, second, database))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+    databases, paired = [], set()
+    for _, first, second, database in candidates:
+        if first in paired or second in paired: continue
+        paired.update((first, second))
+        databases.append(database)
+    cache["parking_pair_databases"] = databases
+    return databases
+
+def parking_pdb_heuristic(problem: ParkingProblem, state: ParkingState) -> float:
+    maps = slot_distance_maps(problem)
+    databases = pair_pattern_databases(problem)
+    # The cars that are not in any pair are estimated by their distance maps
+    singles = problem.cache().get("parking_single_cars")
+    if singles is None:
+        paired = {car for database in databases for car in (database.first, database.second)}
+        singles = problem.cache()["parking_single_cars"] = [index for index in range(len(state.cars)) if index not in paired]
+    total = sum(database.estimate(state) for database in databases)
+    return total + sum(car_estimate(maps, index, state.cars[index]) for index in singles)
@@ -3,7 +3,9 @@ from sokoban import SokobanProblem, Direction, SokobanState, SokobanTile
 from agents import HumanAgent, UninformedSearchAgent, InformedSearchAgent
 from helpers.utils import fetch_tracked_call_count
 from helpers.heuristic_checks import test_heuristic_consistency
-from functools import lru_cache
+from search_stats import SearchStats
+from search_budget import SearchBudget
+from functools import lru_cache, partial
 import argparse, time
 
 def colored_sokoban(level: str):
@@ -18,18 +20,63 @@ def colored_sokoban(level: str):
     return level
 
 # Return the heuristic selected by the user
-def get_heuristic(name: str):
+# If pushes_only is True (for the push search with --push-search pushes, where the walking is free), the heuristics only count
+# the pushes: strong and matching are replaced by their pushes part and weak (which only counts the walking) is refused
+def get_heuristic(name: str, pushes_only: bool = False):
     if name == "zero":
         return lambda *_: 0
+    if pushes_only:
+        if name == "strong":
+            from sokoban_heuristic import strong_push_heuristic
+            return strong_push_heuristic
+        if name == "matching":
+            from sokoban_matching import matching_cost
+            return matching_cost
+        print(f"Heuristic '{name}' counts the walking of the player, so it can not be used to minimize the pushes")
+        exit(-1)
     if name == "weak":
         from sokoban_heuristic import weak_heuristic
         return weak_heuristic
     if name == "strong":
         from sokoban_heuristic import strong_heuristic
         return strong_heuristic
+    if name == "matching":
+        from sokoban_matching import matching_heuristic
+        return matching_heuristic
     print(f"Requested Heuristic '{name}' is invalid")
     exit(-1)
 
+# Create the search function of an informed agent (or return None if the agent is not informed)
+def create_informed_search(args: argparse.Namespace):
+    agent_type: str = args.agent
+    if agent_type == "astar":
+        from search import AStarSearch
+        return AStarSearch
+    if agent_type == "gbfs":
+        from search import BestFirstSearch
+        return BestFirstSearch
+    if agent_type in ("beam", "bbfs"):
+        from search import BeamSearch, BoundedBestFirstSearch
+        # The width bounds the number of nodes kept per depth (beam) or in the whole frontier (bbfs), so the search may fail to find a solution
+        return partial(BeamSearch, width=args.width) if agent_type == "beam" else partial(BoundedBestFirstSearch, max_frontier=args.width)
+    if agent_type == "wastar":
+        from search import WeightedAStarSearch
+        return partial(WeightedAStarSearch, weight=args.weight)
+    if agent_type == "arastar":
+        from search import AnytimeRepairingAStarSearch
+        # ARA* reports every improved solution while it keeps searching for a better one
+        def report(solution: List[Direction], cost: float, bound: float):
+            print(f"ARA* found a solution of cost {cost} (at most {bound:.3f} times the optimal cost)")
+        return partial(AnytimeRepairingAStarSearch, initial_weight=args.weight, weight_step=args.weight_step, on_solution=report)
+    if agent_type in ("idastar", "rbfs"):
+        from search import IterativeDeepeningAStarSearch, RecursiveBestFirstSearch
+        search_fn = IterativeDeepeningAStarSearch if agent_type == "idastar" else RecursiveBestFirstSearch
+        # If desired by the user, the search will prune the states that were already reached with a lower cost
+        if args.transposition_table:
+            search_fn = partial(search_fn, transposition_table=True)
+        return search_fn
+    return None
+
 # Create an agent based on the user selections
 def create_agent(args: argparse.Namespace):
     agent_type: str = args.agent
@@ -59,22 +106,15 @@ def create_agent(args: argparse.Namespace):
     if agent_type == "ucs":
         from search import UniformCostSearch
         return UninformedSearchAgent(UniformCostSearch)
-    if agent_type == "astar":
-        from search import AStarSearch
+    # The informed agents share the same heuristic setup (see create_informed_search)
+    search_fn = create_informed_search(args)
+    if search_fn is not None:
         # We cache the heuristic calls to speed up the search process if the heuristic is not fast
-        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
+        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic, args.push_search == "pushes"))
         # If desired by the user, we track every transition and check for the heuristic consistency for each transition
         if args.checks:
             SokobanProblem.get_successor = test_heuristic_consistency(heuristic)(SokobanProblem.get_successor)
-        return InformedSearchAgent(AStarSearch, heuristic)
-    if agent_type == "gbfs":
-        from search import BestFirstSearch
-        # We cache the heuristic calls to speed up the search process if the heuristic is not fast
-        heuristic = lru_cache(2**16)(get_heuristic(args.heuristic))
-        # If desired by the user, we track every transition and check for the heuristic consistency for each transition
-        if args.checks:
-            SokobanProblem.get_successor = test_heuristic_consistency(heuristic)(SokobanProblem.get_successor)
-        return InformedSearchAgent(BestFirstSearch, heuristic)
+        return InformedSearchAgent(search_fn, heuristic)
     print(f"Requested Agent '{agent_type}' is invalid")
     exit(-1)
 
@@ -82,11 +122,32 @@ def main(args: argparse.Namespace):
     state_printer = lambda state: print(state)
     if args.ansicolors: state_printer = lambda state: print(colored_sokoban(str(state)))
     start = time.time() # Track run time
-    problem = SokobanProblem.from_file(args.level) # create the problem
+    # If desired by the user, the pushes into dead squares are not generated
+    problem = SokobanProblem.from_file(args.level, args.prune_dead_squares) # create the problem
     state = problem.get_initial_state() # Get the initial state
     print("Initial State:")
     state_printer(state)
+    # If desired by the user, the freeze and bipartite deadlocks are pruned by the search and detected by the strong heuristic
+    if args.deadlocks:
+        from sokoban_deadlock import DeadlockDetector
+        problem.deadlock_detector = DeadlockDetector(problem.layout)
     agent = create_agent(args)
+    # If desired by the user, the search agents search over crate pushes instead of player steps
+    if args.push_search != "off" and not isinstance(agent, HumanAgent):
+        from sokoban_push import push_search
+        agent.search_fn = push_search(agent.search_fn, normalize=args.push_search == "pushes")
+        # The push search does not call SokobanProblem.get_successor, so the consistency checks also track the pushes
+        if args.checks and isinstance(agent, InformedSearchAgent):
+            from sokoban_push import PushSokobanProblem, push_heuristic
+            PushSokobanProblem.get_successor = test_heuristic_consistency(push_heuristic(agent.heuristic, problem))(PushSokobanProblem.get_successor)
+    # The search agents fill a SearchStats object which is printed at the end (see search_stats.py)
+    stats = SearchStats()
+    if not isinstance(agent, HumanAgent):
+        agent.search_fn = partial(agent.search_fn, stats=stats)
+        # If desired by the user, the search stops once it exceeds its budget (see search_budget.py)
+        if args.max_expansions or args.time_limit or args.max_closed:
+            budget = SearchBudget(args.max_expansions or None, args.time_limit or None, args.max_closed or None)
+            agent.search_fn = partial(agent.search_fn, budget=budget)
     step = 0 # This will store the current step
     total_explored_nodes = 0 # This will store the number of traversed nodes during search
     unsolvable = False # This will store whether the problem is unsolvable or not
@@ -95,7 +156,11 @@ def main(args: argparse.Namespace):
         action = agent.act(problem, state) # Request an action from the agent
         # If no solution was found, break
         if action is None:
-            print("Agent cannot find a solution, exiting...")
+            if getattr(agent, "budget_exceeded", None) is not None:
+                exceeded = agent.budget_exceeded
+                print(f"Search budget exceeded ({exceeded.reason}) after {exceeded.expanded} expansions and {exceeded.elapsed:.2f} seconds, exiting...")
+            else:
+                print("Agent cannot find a solution, exiting...")
             unsolvable = True
             break
         # Get the number of traversed nodes
@@ -117,6 +182,11 @@ def main(args: argparse.Namespace):
     # This was a search agent, display the number of traversed nodes
     if not isinstance(agent, HumanAgent):
         print(f"Search explored {total_explored_nodes} nodes")
+        print(f"Search statistics: {stats.summary()}")
+    if problem.deadlock_detector is not None:
+        stats = problem.deadlock_detector.stats
+        print(f"Deadlock detector: {stats.checks} checks, {stats.deadlocks} deadlocks "
+              f"({stats.dead_square_deadlocks} dead squares, {stats.freeze_deadlocks} freeze, {stats.bipartite_deadlocks} bipartite), {stats.cache_hits} cache hits")
     # Finally print the elapsed time for the whole process
     print(f"Elapsed time: {time.time() - start} seconds")
 
@@ -126,17 +196,42 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Play Sokoban as Human or AI")
     parser.add_argument("level", help="path to the sokoban level to play")
     parser.add_argument("--agent", "-a", default="human",
-                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs'],
+                        choices=['human', 'bfs', 'dfs', 'ucs', 'astar', 'gbfs', 'wastar', 'arastar', 'beam', 'bbfs', 'idastar', 'rbfs'],
                         help="the agent that will play the game")
     parser.add_argument("--heuristic", '-hf', default="zero",
-                        choices=["zero", "weak", "strong"],
-                        help="choose the heuristic to use with A* or Greedy Best First Search")
+                        choices=["zero", "weak", "strong", "matching"],
+                        help="choose the heuristic to use with A*, Greedy Best First Search, Weighted A*, ARA*, Beam Search, Bounded Best First Search, IDA* or RBFS")
+    parser.add_argument("--weight", "-w", type=float, default=2.0,
+                        help="the weight of the heuristic for Weighted A* (and the initial weight for ARA*)")
+    parser.add_argument("--weight-step", "-ws", type=float, default=0.5,
+                        help="the decrease of the weight after every solution found by ARA*")
+    parser.add_argument("--width", "-bw", type=int, default=1000,
+                        help="the number of nodes kept per depth by Beam Search or in the frontier by Bounded Best First Search")
+    parser.add_argument("--transposition-table", "-tt", action='store_true', default=False,
+                        help="Enable the transposition table for IDA* and RBFS (uses more memory but prunes repeated states)")
+    parser.add_argument("--push-search", "-ps", default="off",
+                        choices=["off", "pushes", "moves"],
+                        help="Search over crate pushes: 'pushes' normalizes the player and minimizes the pushes (the heuristics only count the pushes, so 'weak' can not be used), 'moves' keeps the walking cost and minimizes the moves")
+    parser.add_argument("--prune-dead-squares", "-pd", action='store_true', default=False,
+                        help="Do not generate the pushes that move a crate to a square from which it can never reach a goal")
+    parser.add_argument("--deadlocks", "-dl", action='store_true', default=False,
+                        help="Detect the freeze and bipartite deadlocks to prune the search and to improve the strong heuristic")
+    parser.add_argument("--max-expansions", "-me", type=int, default=0,
+                        help="Stop the search after expanding this number of nodes (0 for no limit)")
+    parser.add_argument("--time-limit", "-t", type=float, default=0,
+                        help="Stop the search after this number of seconds (0 for no limit)")
+    parser.add_argument("--max-closed", "-mc", type=int, default=0,
+                        help="Stop the search once its explored set holds this number of states (0 for no limit)")
     parser.add_argument("--checks", "-c", action='store_true', default=False,
                         help="Enable consistency checks for the heuristic")
     parser.add_argument("--ansicolors", "-ac", action="store_true",
                         help="Print the level on the console with ANSI colors (only works on some terminals)")
 
     args = parser.parse_args()
+    if args.weight_step <= 0:
+        parser.error("--weight-step must be positive")
+    if args.push_search == "pushes" and args.heuristic == "weak" and args.agent not in ("human", "bfs", "dfs", "ucs"):
+        parser.error("the weak heuristic only counts the walking, so it can not be used with --push-search pushes")
     try:
         main(args)
     except KeyboardInterrupt:
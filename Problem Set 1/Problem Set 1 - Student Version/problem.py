@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Generic, Iterable, List, TypeVar, Union
+from typing import Callable, Generic, Iterable, List, Tuple, TypeVar, Union
 from helpers.utils import CacheContainer, with_cache
 
 # S and A are used for generic typing where S represents the state type and A represents the action type
@@ -10,6 +10,14 @@ A = TypeVar("A")
 # It also implements 'CacheContainer' which allows you to call the "cache" method
 # which returns a dictionary in which you can store any data you want to cache
 class Problem(ABC, Generic[S, A], CacheContainer):
+    # Every problem class that defines its own get_successors remembers the get_successor and get_cost that it was written for
+    # (see successor_methods_replaced). Its subclasses inherit this record, so overriding get_cost or get_successor in a subclass
+    # that inherits get_successors also counts as a replacement.
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "get_successors" in cls.__dict__ or not hasattr(cls, "_defined_successor_methods"):
+            cls._defined_successor_methods = (getattr(cls, "get_successor", None), getattr(cls, "get_cost", None))
+
     # This function returns the initial state
     @abstractmethod
     def get_initial_state(self) -> S:
@@ -34,6 +42,25 @@ class Problem(ABC, Generic[S, A], CacheContainer):
     def get_cost(self, state: S, action: A) -> float:
         return 1.0
 
+    # This function returns a list of (action, next state, action cost) for all the possible actions from the given state
+    # The searches use it to generate the successors of a node with a single call instead of three calls per action.
+    # The default implementation is built from get_actions, get_successor and get_cost, and a problem can override it
+    # to generate the successors directly. An override must still call get_actions since the expanded nodes
+    # are counted on it (with @track_call_count or @record_calls), and it should fall back to this implementation
+    # if successor_methods_replaced returns True so that the wrappers of get_successor and get_cost are still called.
+    def get_successors(self, state: S) -> List[Tuple[A, S, float]]:
+        return [(action, self.get_successor(state, action), self.get_cost(state, action)) for action in self.get_actions(state)]
+
+    # Returns True if get_successor or get_cost was replaced after the class that defines get_successors was defined
+    # (for example, by the heuristic consistency checks which wrap get_successor, or by a subclass which overrides get_cost)
+    # or if they were replaced on the problem object itself
+    def successor_methods_replaced(self) -> bool:
+        if "get_successor" in self.__dict__ or "get_cost" in self.__dict__:
+            return True
+        cls = type(self)
+        get_successor, get_cost = cls._defined_successor_methods
+        return cls.get_successor is not get_successor or cls.get_cost is not get_cost
+
 # These are type aliases for:
 # A solution which is a list of actions (or None if no solution is found)
 Solution = Union[List[A], None]
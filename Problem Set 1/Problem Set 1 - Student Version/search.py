@@ -1,11 +1,16 @@
 from problem import HeuristicFunction, Problem, S, A, Solution
 from collections import deque
 from helpers.utils import NotImplemented
+from node_store import NodeStore
+from frontier import BoundedPriorityFrontier, FifoFrontier, LifoFrontier, PriorityFrontier
+from search_stats import SearchStats, TimedFrontier
+from search_budget import SearchBudget
+from typing import Any, Callable, Dict, List, Optional
+import heapq, math
 
 
 
 #TODO: Import any modules you want to use
-from queue import Queue,PriorityQueue
 
 # All search functions take a problem and a state
 # If it is an informed search function, it will also receive a heuristic function
@@ -15,229 +20,656 @@ from queue import Queue,PriorityQueue
 # 1. A list of actions which represent the path from the initial state to the final state
 # 2. None if there is no solution
 
-def BreadthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+# The frontiers (see frontier.py) hold one entry per node and do not store paths. Every generated successor is added once to a node store
+# which records its parent and the action that generated it, then the path is rebuilt only when a goal is found.
+# The priority frontiers break ties between equal priorities by picking the node that was pushed first (first in first out).
+# UCS and A* also keep the best known path cost of every generated state, so a successor is not pushed
+# unless it improves on the copy already in the frontier, and the outdated (stale) entries are skipped when popped.
+# The successors of a node are generated by a single call to problem.get_successors (see problem.py).
+# Every search accepts an optional SearchStats object (see search_stats.py) that it fills while searching.
+# When it is given, the successor generation, the heuristic and the frontier are wrapped to be timed,
+# otherwise the search runs without any wrapper so the statistics cost nothing when they are not requested.
+# Every search also accepts an optional SearchBudget (see search_budget.py). Once the budget is exceeded, the search stops
+# before its next expansion and returns a BudgetExceeded result (which is falsy and holds the partial statistics) instead of a solution.
+# The explored set is created by the closed_set factory (a python set by default). It can be replaced by a set that uses
+# less memory such as closed_set.CompactClosedSet which only stores a 64-bit key per explored state.
+
+# A function that creates an empty explored set (any object with the add and the in operations)
+ClosedSetFactory = Callable[[], Any]
+
+def BreadthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    # frontier to hold the states
-    frontier: Queue[S] = Queue()
-    # paths to hold the paths
-    paths : Queue[list[A]] = Queue()
-    # put the initial state in the frontier and paths
-    frontier.put(initial_state)
-    paths.put([])
+    # nodes to hold the state, parent and action of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the nodes
+    frontier: FifoFrontier[int] = FifoFrontier()
+    # get_successors generates the successors (it is timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state))
     # explored to keep track of the explored states
-    explored = set()
+    explored = closed_set()
     while not frontier.empty():
-        # get the state
-        state = frontier.get()
-        # get the path
-        path = paths.get()
+        # get the node and its state
+        node = frontier.pop()
+        state = nodes.state(node)
         # if the state is in the explored set then continue (if it pushed multiple times to the frontier)
         if state in explored:
+            if stats is not None: stats.stale_pops += 1
             continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
         # add the state to the explored set
         explored.add(state)
-        # return the path if the state is the goal
-        actions = problem.get_actions(state)
-        for action in actions:
-            # get the successor of the state
-            successor = problem.get_successor(state, action)
-            # get the old path
-            new_path = list(path)
-            # add the action to the new path
-            new_path.append(action)
-            # if the successor is the goal then return the path
+        # goal_node to hold the goal if it is generated (the expansion is recorded before returning its path)
+        goal_node = None
+        # generate all the successors of the state (see Problem.get_successors)
+        for action, successor, _ in get_successors(state):
+            # if the successor is the goal then stop generating the successors
             if problem.is_goal(successor):
-                return new_path
-            # if the successor is not explored then add it to the frontier and paths
+                goal_node = nodes.add(successor, node, action)
+                break
+            # if the successor is not explored then add it to the frontier
             if successor not in explored:
-                frontier.put(successor)
-                paths.put(new_path)
+                frontier.push(nodes.add(successor, node, action))
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None: stats.expand(len(frontier), len(explored))
+        # return the path if the goal was generated
+        if goal_node is not None:
+            return nodes.path(goal_node)
     # return None if there is no solution
     return None
 
-def DepthFirstSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def DepthFirstSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    # frontier to hold the states (stack)
-    frontier: list[S] = []
-    # paths to hold the paths (stack)
-    paths : list[A] = []
-    # put the initial state in the frontier and paths
-    frontier.append(initial_state)
-    paths.append([])
+    # nodes to hold the state, parent and action of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the nodes (stack)
+    frontier: LifoFrontier[int] = LifoFrontier()
+    # get_successors generates the successors (it is timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state))
     # explored to keep track of the explored states
-    explored = set()
-    while len(frontier) > 0:
-        # get the state
-        state = frontier.pop()
-        # get the path
-        path = paths.pop()
+    explored = closed_set()
+    while not frontier.empty():
+        # get the node and its state
+        node = frontier.pop()
+        state = nodes.state(node)
         # if the state is the goal then return the path
         if problem.is_goal(state):
-            return path
+            return nodes.path(node)
         # if the state is in the explored set then continue (if it pushed multiple times to the frontier)
         if state in explored:
+            if stats is not None: stats.stale_pops += 1
             continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
         # add the state to the explored set
         explored.add(state)
-        # get all actions of the state
-        actions = problem.get_actions(state)
-        for action in actions:
-            # get the successor of the state
-            successor = problem.get_successor(state, action)
-            # get the old path
-            new_path = list(path)
-            # add the action to the new path
-            new_path.append(action)
-            # if the successor is not explored then add it to the frontier and paths
+        # generate all the successors of the state (see Problem.get_successors)
+        for action, successor, _ in get_successors(state):
+            # if the successor is not explored then add it to the frontier
             if successor not in explored:
-                frontier.append(successor)
-                paths.append(new_path)
+                frontier.push(nodes.add(successor, node, action))
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None: stats.expand(len(frontier), len(explored))
     # return None if there is no solution
     return None
 
-def UniformCostSearch(problem: Problem[S, A], initial_state: S) -> Solution:
+def UniformCostSearch(problem: Problem[S, A], initial_state: S, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    counter:int =0
-    # frontier to hold the states
-    frontier: PriorityQueue[(float,int,S)] = PriorityQueue()
-    # paths to hold the paths
-    paths : PriorityQueue[(float,int,list[A])] = PriorityQueue()
-    # put the initial state in the frontier and paths
-    frontier.put((0,counter,initial_state))
-    paths.put((0,counter,[]))
-    # counter to handle when there are multiple states at the queue's front with the same priority, pick the state that was enqueued first (first in first out).
-    counter+=1
+    # nodes to hold the state, parent, action and path cost of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the nodes ordered by g(n)
+    frontier: PriorityFrontier[int] = PriorityFrontier()
+    # get_successors generates the successors (it is timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state), 0)
+    # best_g to hold the lowest path cost found so far for every generated state
+    best_g: Dict[S, float] = {initial_state: 0}
     # explored to keep track of the explored states
-    explored = set()
+    explored = closed_set()
     while not frontier.empty():
-        # get the state , cost and ignore counter
-        cost,_,state = frontier.get()
-        # get the path only as the first element is the priority and the second is the counter
-        _,_,path = paths.get()
+        # get the node and its cost
+        cost,node = frontier.pop_with_priority()
+        state = nodes.state(node)
+        # if a cheaper copy of the state was pushed after this entry then this entry is stale
+        if cost > best_g[state]:
+            if stats is not None: stats.stale_pops += 1
+            continue
         # return the path if the state is the goal
         if problem.is_goal(state):
-            return path
+            return nodes.path(node)
         # if the state is explored then continue (if it pushed multiple times to the frontier)
         if state in explored:
+            if stats is not None: stats.stale_pops += 1
             continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
         # add the state to the explored set
         explored.add(state)
-        # get all actions of the state
-        actions = problem.get_actions(state)
-        for action in actions:
-            # get the successor of the state
-            successor = problem.get_successor(state, action)
-            # get the old path
-            new_path = list(path)
-            # add the action to the new path
-            new_path.append(action)
-            # if the successor is not explored then add it to the frontier and paths
+        # generate all the successors of the state with their arc costs (see Problem.get_successors)
+        for action, successor, step_cost in get_successors(state):
+            # if the successor is not explored then add it to the frontier
             if successor not in explored:
-                #calculate the cost of the action
-                curr_cost = problem.get_cost(state,action)
                 # add the current arc cost to the the total cost
-                frontier.put((cost+curr_cost,counter,successor))
-                paths.put((cost+curr_cost,counter,new_path))
-                counter+=1
+                new_cost = cost+step_cost
+                # do not push the successor if it is not cheaper than the copy in the frontier
+                if new_cost >= best_g.get(successor, math.inf):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                best_g[successor] = new_cost
+                frontier.push(nodes.add(successor, node, action, new_cost), new_cost)
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None: stats.expand(len(frontier), len(explored))
     # return None if there is no solution
     return None
 
 
-def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def AStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    counter:int =0
-    # frontier to hold the states
-    frontier: PriorityQueue[(float,int,S)] = PriorityQueue()
-    # paths to hold the paths
-    paths : PriorityQueue[(float,int,list[A])] = PriorityQueue()
-    # put the initial state in the frontier and paths
-    frontier.put((0+heuristic(problem,initial_state),counter,initial_state))
-    paths.put((0+heuristic(problem,initial_state),counter,[]))
-    # counter to handle when there are multiple states at the queue's front with the same priority, pick the state that was enqueued first (first in first out).
-    counter+=1
+    # nodes to hold the state, parent, action and path cost g(n) of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the nodes ordered by f(n) = g(n) + h(n)
+    frontier: PriorityFrontier[int] = PriorityFrontier()
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state), 0+heuristic(problem,initial_state))
+    # best_g to hold the lowest path cost found so far for every generated state
+    best_g: Dict[S, float] = {initial_state: 0}
     # explored to keep track of the explored states
-    explored = set()
+    explored = closed_set()
     while not frontier.empty():
-        # get the state , cost and ignore counter
-        cost,_,state = frontier.get()
-        # get the path only as the first element is the priority and the second is the counter
-        _,_,path = paths.get()
+        # get the node with the lowest priority
+        node = frontier.pop()
+        state = nodes.state(node)
+        # the actual path cost g(n) of the node is stored in the node store
+        cost = nodes.cost(node)
+        # if a cheaper copy of the state was pushed after this entry then this entry is stale
+        if cost > best_g[state]:
+            if stats is not None: stats.stale_pops += 1
+            continue
         # return the path if the state is the goal
         if problem.is_goal(state):
-            return path
+            return nodes.path(node)
         # if the state is explored then continue (if it pushed multiple times to the frontier)
         if state in explored:
+            if stats is not None: stats.stale_pops += 1
             continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
         # add the state to the explored set
         explored.add(state)
-        # get all actions of the state
-        actions = problem.get_actions(state)
-        # calculate the heuristic for the state
-        h = heuristic(problem,state)
-        for action in actions:
-            # get the successor of the state
-            successor = problem.get_successor(state, action)
-            # get the old path
-            new_path = list(path)
-            # add the action to the new path
-            new_path.append(action)
+        # generate all the successors of the state with their arc costs (see Problem.get_successors)
+        for action, successor, step_cost in get_successors(state):
             if successor not in explored:
-                #calculate the cost of the action
-                curr_cost = problem.get_cost(state,action)
-                # calculate the heuristic for the successor
-                curr_h = heuristic(problem,successor)
+                # calculate the path cost of the successor
+                new_cost = cost+step_cost
+                # do not push the successor if it is not cheaper than the copy in the frontier
+                if new_cost >= best_g.get(successor, math.inf):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                best_g[successor] = new_cost
                 # calculate the f(n) = g(n) + h(n)
-                # we minus the heuristic of the current state as it we need only the actual cost g(n)
-                curr_f = cost+curr_cost+curr_h-h
-                frontier.put((curr_f,counter,successor))
-                paths.put((curr_f,counter,new_path))
-                counter+=1
+                curr_f = new_cost+heuristic(problem,successor)
+                frontier.push(nodes.add(successor, node, action, new_cost), curr_f)
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None: stats.expand(len(frontier), len(explored))
     # return None if there is no solution
     return None
     
 
 
-def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction) -> Solution:
+def BestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
     #TODO: ADD YOUR CODE HERE
-    counter:int =0
-    # frontier to hold the states
-    frontier: PriorityQueue[(float,int,S)] = PriorityQueue()
-    # paths to hold the paths
-    paths : PriorityQueue[(float,int,list[A])] = PriorityQueue()
-    # put the initial state in the frontier and paths
-    frontier.put((heuristic(problem,initial_state),counter,initial_state))
-    paths.put((heuristic(problem,initial_state),counter,[]))
-    # counter to handle when there are multiple states at the queue's front with the same priority, pick the state that was enqueued first (first in first out).
-    counter+=1
+    # nodes to hold the state, parent and action of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the nodes ordered by h(n)
+    frontier: PriorityFrontier[int] = PriorityFrontier()
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state), heuristic(problem,initial_state))
     # explored to keep track of the explored states
-    explored = set()
+    explored = closed_set()
     while not frontier.empty():
-        # get the state only as the first element is the priority and the second is the counter
-        _,_,state = frontier.get()
-        # get the path only as the first element is the priority and the second is the counter
-        _,_,path = paths.get()
+        # get the node with the lowest priority
+        node = frontier.pop()
+        state = nodes.state(node)
         # return the path if the state is the goal
         if problem.is_goal(state):
-            return path
+            return nodes.path(node)
         # if the state is explored then continue (if it pushed multiple times to the frontier)
         if state in explored:
+            if stats is not None: stats.stale_pops += 1
             continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
         # add the state to the explored set
         explored.add(state)
-        # get all actions of the state
-        actions = problem.get_actions(state)
-        for action in actions:
-            # get the successor of the state
-            successor = problem.get_successor(state, action)
-            # get the old path
-            new_path = list(path)
-            # add the action to the new path
-            new_path.append(action)
-            # if the successor is not explored then add it to the frontier and paths
+        # generate all the successors of the state (see Problem.get_successors)
+        for action, successor, _ in get_successors(state):
+            # if the successor is not explored then add it to the frontier
+            if successor not in explored:
+                curr_h = heuristic(problem,successor)
+                frontier.push(nodes.add(successor, node, action), curr_h)
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None: stats.expand(len(frontier), len(explored))
+    # return None if there is no solution
+    return None
+
+# The following searches trade optimality for speed with a weight w >= 1 on the heuristic: f(n) = g(n) + w * h(n)
+# With a consistent heuristic, the cost of the solution that they return is at most w times the optimal cost (w is the suboptimality bound)
+# and a higher weight usually finds a solution after much fewer expansions. With w = 1, they are the same as A*.
+
+# Weighted A*: A* with the weighted heuristic (the explored states are never reopened, which keeps the bound for a consistent heuristic)
+def WeightedAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, weight: float = 2.0, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
+    weighted_heuristic = lambda problem, state: weight*heuristic(problem, state)
+    return AStarSearch(problem, initial_state, weighted_heuristic, stats, budget, closed_set)
+
+# A function that is called by ARA* with every improved solution, its cost and its suboptimality bound
+SolutionCallback = Callable[[List[A], float, float], None]
+
+# Anytime repairing A* (ARA*): it runs a weighted A* with the initial weight to find a first solution quickly,
+# then it decreases the weight by weight_step (which must be positive) and improves the solution until the weight reaches 1
+# (or the bound proves that the solution is optimal).
+# Every iteration reuses the path costs of the previous ones: the states whose cost decreased after they were explored
+# are kept in an inconsistent set and they are the only explored states that are put back in the frontier for the next iteration.
+# on_solution is called every time the solution or its bound improves. The bound is the lowest of the current weight
+# and the cost of the solution divided by the lowest g(n) + h(n) of the states that could still be expanded.
+# If the budget is exceeded, the best solution found so far is returned (or a BudgetExceeded result if there is none).
+def AnytimeRepairingAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, initial_weight: float = 3.0, weight_step: float = 0.5, on_solution: Optional[SolutionCallback] = None, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
+    # the weight would never reach 1, so the search would never end
+    if weight_step <= 0:
+        raise ValueError(f"weight_step must be positive, got {weight_step}")
+    # nodes to hold the state, parent, action and path cost g(n) of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # best_g to hold the lowest path cost found so far for every generated state
+    best_g: Dict[S, float] = {initial_state: 0}
+    # h_values to hold h(n) of every generated state since the priorities are recomputed whenever the weight changes
+    h_values: Dict[S, float] = {initial_state: heuristic(problem,initial_state)}
+    # open_nodes to hold the latest node of every state in the frontier (the other entries of the frontier are stale)
+    open_nodes: Dict[S, int] = {initial_state: nodes.add(initial_state)}
+    # goal_node and goal_cost to hold the best solution found so far
+    goal_node, goal_cost = None, math.inf
+    reported_cost, reported_bound = math.inf, math.inf
+    weight = max(initial_weight, 1.0)
+    while True:
+        # an iteration can end without expanding any node, so the budget is also checked before every iteration
+        if meter is not None and meter.check():
+            return meter.exceeded(stats) if goal_node is None else nodes.path(goal_node)
+        # frontier to hold the nodes ordered by f(n) = g(n) + weight * h(n)
+        frontier: PriorityFrontier[int] = PriorityFrontier()
+        if stats is not None: frontier = TimedFrontier(frontier, stats)
+        for node in open_nodes.values():
+            frontier.push(node, nodes.cost(node)+weight*h_values[nodes.state(node)])
+        # explored to keep track of the states explored in this iteration
+        explored = closed_set()
+        # inconsistent to hold the latest node of the explored states whose path cost decreased in this iteration
+        inconsistent: Dict[S, int] = {}
+        while not frontier.empty():
+            priority, node = frontier.pop_with_priority()
+            state = nodes.state(node)
+            # skip the entry if a cheaper copy of the state was pushed after it
+            if open_nodes.get(state) != node:
+                if stats is not None: stats.stale_pops += 1
+                continue
+            # no node left in the frontier can improve on the solution for this weight
+            if priority >= goal_cost:
+                break
+            del open_nodes[state]
+            cost = nodes.cost(node)
+            # the goal is not expanded, its successors can not lead to a cheaper goal
+            if problem.is_goal(state):
+                if cost < goal_cost:
+                    goal_node, goal_cost = node, cost
+                continue
+            # stop before the expansion if the budget is exceeded
+            if meter is not None and meter.charge(len(explored)):
+                return meter.exceeded(stats) if goal_node is None else nodes.path(goal_node)
+            explored.add(state)
+            # generate all the successors of the state with their arc costs (see Problem.get_successors)
+            for action, successor, step_cost in get_successors(state):
+                new_cost = cost+step_cost
+                # do not update the successor if it is not cheaper than its current path
+                if new_cost >= best_g.get(successor, math.inf):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                best_g[successor] = new_cost
+                child = nodes.add(successor, node, action, new_cost)
+                if successor not in h_values:
+                    h_values[successor] = heuristic(problem,successor)
+                # an explored state is not expanded again in this iteration, it waits for the next one
+                if successor in explored:
+                    inconsistent[successor] = child
+                else:
+                    open_nodes[successor] = child
+                    frontier.push(child, new_cost+weight*h_values[successor])
+            if stats is not None: stats.expand(len(frontier), len(explored))
+        # if no solution was found then there is none (every reachable state was explored)
+        if goal_node is None:
+            return None
+        # no solution can cost less than the lowest g(n) + h(n) of the states that could still be expanded
+        lowest = min((nodes.cost(node)+h_values[nodes.state(node)] for node in (*open_nodes.values(), *inconsistent.values())), default=math.inf)
+        bound = weight if lowest <= 0 else max(1.0, min(weight, goal_cost/lowest))
+        if on_solution is not None and (goal_cost < reported_cost or bound < reported_bound):
+            reported_cost, reported_bound = goal_cost, bound
+            on_solution(nodes.path(goal_node), goal_cost, bound)
+        # the solution is optimal or the weight can not be decreased any more
+        if bound <= 1.0 or weight <= 1.0:
+            return nodes.path(goal_node)
+        # decrease the weight and put the inconsistent states back in the frontier
+        weight = max(1.0, weight-weight_step)
+        open_nodes.update(inconsistent)
+
+# The following searches bound the size of their frontier by dropping the worst nodes, so their memory does not grow exponentially
+# with the depth of the search. The price is completeness: they can miss every solution (and return None) even if one exists,
+# and the solution they find is not optimal. A larger width keeps more nodes and makes them closer to the unbounded searches.
+# The explored set and the node store still grow with the number of expanded nodes (which is at most the width times the depth for beam search);
+# the explored set can be made smaller with closed_set.CompactClosedSet.
+
+# Beam search: the nodes are expanded depth by depth and only the best width successors of every depth are kept for the next one
+# The successors are ordered by f(n) = g(n) + h(n) (the ties are broken by the order in which they were generated)
+def BeamSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, width: int = 100, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
+    # nodes to hold the state, parent, action and path cost g(n) of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    if problem.is_goal(initial_state):
+        return []
+    # beam to hold the nodes of the current depth
+    beam = [nodes.add(initial_state)]
+    # explored to keep track of the explored states
+    explored = closed_set()
+    while beam:
+        # candidates to hold the cheapest node of every successor state of the current depth
+        candidates: Dict[S, int] = {}
+        # goal_node to hold the cheapest goal among the candidates
+        goal_node = None
+        for node in beam:
+            state = nodes.state(node)
+            # stop before the expansion if the budget is exceeded
+            if meter is not None and meter.charge(len(explored)):
+                return meter.exceeded(stats)
+            explored.add(state)
+            cost = nodes.cost(node)
+            for action, successor, step_cost in get_successors(state):
+                if successor in explored:
+                    if stats is not None: stats.duplicates += 1
+                    continue
+                new_cost = cost+step_cost
+                # keep a single node per state: the one with the lowest path cost
+                previous = candidates.get(successor)
+                if previous is not None and new_cost >= nodes.cost(previous):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                candidates[successor] = child = nodes.add(successor, node, action, new_cost)
+                if problem.is_goal(successor) and (goal_node is None or new_cost < nodes.cost(goal_node)):
+                    goal_node = child
+            if stats is not None: stats.expand(len(candidates), len(explored))
+        # the goal is checked before the candidates are pruned so that it can not be dropped
+        if goal_node is not None:
+            return nodes.path(goal_node)
+        # drop the candidates that were explored after they were generated (a successor of one node of the beam can be
+        # another node of the same beam that is expanded later), so that no state is expanded twice
+        for state in [state for state in candidates if state in explored]:
+            del candidates[state]
+            if stats is not None: stats.duplicates += 1
+        # keep the best width candidates for the next depth
+        scored = [(nodes.cost(node)+heuristic(problem,state), order, node) for order, (state, node) in enumerate(candidates.items())]
+        beam = [node for _, _, node in heapq.nsmallest(width, scored)]
+        if stats is not None: stats.dropped += len(scored) - len(beam)
+    # return None if no solution was found
+    return None
+
+# Bounded best first search: a greedy best first search (ordered by h(n) like BestFirstSearch) whose frontier only keeps its best max_frontier nodes
+# (it is trimmed back to max_frontier nodes when it holds twice as many, see frontier.BoundedPriorityFrontier)
+def BoundedBestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, max_frontier: int = 10000, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None, closed_set: ClosedSetFactory = set) -> Solution:
+    # nodes to hold the state, parent and action of every generated node
+    nodes: NodeStore[S, A] = NodeStore()
+    # frontier to hold the best nodes ordered by h(n)
+    bounded_frontier: BoundedPriorityFrontier[int] = BoundedPriorityFrontier(max_frontier)
+    frontier = bounded_frontier
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+        frontier = TimedFrontier(frontier, stats)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # put the initial node in the frontier
+    frontier.push(nodes.add(initial_state), heuristic(problem,initial_state))
+    # explored to keep track of the explored states
+    explored = closed_set()
+    while not frontier.empty():
+        # get the node with the lowest priority
+        node = frontier.pop()
+        state = nodes.state(node)
+        # return the path if the state is the goal
+        if problem.is_goal(state):
+            return nodes.path(node)
+        # if the state is explored then continue (if it pushed multiple times to the frontier)
+        if state in explored:
+            if stats is not None: stats.stale_pops += 1
+            continue
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(explored)):
+            return meter.exceeded(stats)
+        # add the state to the explored set
+        explored.add(state)
+        # generate all the successors of the state (see Problem.get_successors)
+        for action, successor, _ in get_successors(state):
+            # if the successor is not explored then add it to the frontier (which may drop its worst nodes)
             if successor not in explored:
                 curr_h = heuristic(problem,successor)
-                frontier.put((curr_h,counter,successor))
-                paths.put((curr_h,counter,new_path))
-                counter+=1
+                frontier.push(nodes.add(successor, node, action), curr_h)
+            elif stats is not None:
+                stats.duplicates += 1
+        if stats is not None:
+            stats.expand(len(frontier), len(explored))
+            stats.dropped = bounded_frontier.dropped
+    # return None if no solution was found
+    return None
+
+# The following searches are memory-bounded alternatives to A* for the problems where the explored set does not fit in memory
+# They only keep the current path in memory, so they can re-expand the same state many times
+# If transposition_table is True, they also remember some information for every visited state to prune repeated work
+# (this uses memory proportional to the number of visited states, but it is still much less than A*)
+
+# A sentinel that marks the end of the actions iterator of a node
+_NO_ACTION = object()
+
+def IterativeDeepeningAStarSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, transposition_table: bool = False, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None) -> Solution:
+    # if the initial state is the goal then the path is empty
+    if problem.is_goal(initial_state):
+        return []
+    # get_successor generates a successor (it and the heuristic are timed if the statistics are requested)
+    get_successor = problem.get_successor
+    if stats is not None:
+        get_successor = stats.timed_successor(get_successor)
+        heuristic = stats.timed_heuristic(heuristic)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+    # the first bound is f(initial state) = h(initial state)
+    bound = heuristic(problem,initial_state)
+    while bound != math.inf:
+        # next_bound will hold the lowest f(n) that exceeded the current bound
+        next_bound = math.inf
+        # path holds the actions from the initial state to the node at the top of the stack
+        path = []
+        # on_path holds the states on the current path so that cycles are not followed
+        on_path = {initial_state}
+        # table holds the lowest g(n) with which every state was reached in this iteration
+        table: Dict[S, float] = {initial_state: 0}
+        # stack to hold the (state, g(n), remaining actions) of the nodes on the current path
+        # (the actions are consumed one at a time instead of using get_successors, so only the successors on the path are created)
+        if meter is not None and meter.charge(len(table) if transposition_table else len(on_path)):
+            return meter.exceeded(stats)
+        stack = [(initial_state, 0, iter(problem.get_actions(initial_state)))]
+        # the frontier of IDA* is its stack and its explored set is the transposition table (or the current path without it)
+        if stats is not None: stats.expand(len(stack), len(table) if transposition_table else len(on_path))
+        while stack:
+            state, cost, actions = stack[-1]
+            action = next(actions, _NO_ACTION)
+            # if all the actions of the node are tried then backtrack
+            if action is _NO_ACTION:
+                stack.pop()
+                on_path.remove(state)
+                if path: path.pop()
+                continue
+            # get the successor of the state
+            successor = get_successor(state, action)
+            if successor in on_path:
+                if stats is not None: stats.duplicates += 1
+                continue
+            # calculate the path cost of the successor
+            new_cost = cost+problem.get_cost(state,action)
+            # if the successor was already reached with a lower or equal cost in this iteration then it cannot lead to a new solution
+            if transposition_table:
+                if new_cost >= table.get(successor, math.inf):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                table[successor] = new_cost
+            # calculate the f(n) = g(n) + h(n) and prune the successor if it exceeds the bound
+            curr_f = new_cost+heuristic(problem,successor)
+            if curr_f > bound:
+                next_bound = min(next_bound, curr_f)
+                continue
+            path.append(action)
+            # since f(n) <= bound <= the optimal cost, the first goal found is optimal
+            if problem.is_goal(successor):
+                return path
+            # stop before the expansion if the budget is exceeded
+            if meter is not None and meter.charge(len(table) if transposition_table else len(on_path)):
+                return meter.exceeded(stats)
+            on_path.add(successor)
+            stack.append((successor, new_cost, iter(problem.get_actions(successor))))
+            if stats is not None: stats.expand(len(stack), len(table) if transposition_table else len(on_path))
+        bound = next_bound
     # return None if there is no solution
-    return None
\ No newline at end of file
+    return None
+
+def RecursiveBestFirstSearch(problem: Problem[S, A], initial_state: S, heuristic: HeuristicFunction, transposition_table: bool = False, stats: Optional[SearchStats] = None, budget: Optional[SearchBudget] = None) -> Solution:
+    # if the initial state is the goal then the path is empty
+    if problem.is_goal(initial_state):
+        return []
+    # path holds the actions from the initial state to the node at the top of the stack
+    path = []
+    # on_path holds the states on the current path so that cycles are not followed
+    on_path = {initial_state}
+    # table holds the lowest g(n) with which every state was reached
+    table: Dict[S, float] = {initial_state: 0}
+    # get_successors generates the successors (it and the heuristic are timed if the statistics are requested)
+    get_successors = problem.get_successors
+    if stats is not None:
+        get_successors = stats.timed_successors(get_successors)
+        heuristic = stats.timed_heuristic(heuristic)
+    # meter to charge the expansions to the budget (if any)
+    meter = budget.start() if budget is not None else None
+
+    # Expand the state and return [F(n), order, state, action, g(n)] for every successor
+    def expand(state: S, cost: float, f_value: float) -> List[list]:
+        successors = []
+        for order, (action, successor, step_cost) in enumerate(get_successors(state)):
+            if successor in on_path:
+                if stats is not None: stats.duplicates += 1
+                continue
+            new_cost = cost+step_cost
+            # if the successor was already reached with a lower cost then it is explored through the cheaper path instead
+            if transposition_table:
+                if new_cost > table.get(successor, math.inf):
+                    if stats is not None: stats.skipped_pushes += 1
+                    continue
+                table[successor] = new_cost
+            # the F value of a successor can not be lower than that of its parent
+            curr_f = max(new_cost+heuristic(problem,successor), f_value)
+            successors.append([curr_f, order, successor, action, new_cost])
+        # the frontier of RBFS is the current path and its explored set is the transposition table (or the current path without it)
+        if stats is not None: stats.expand(len(path), len(table) if transposition_table else len(on_path))
+        return successors
+
+    # stop before the expansion if the budget is exceeded
+    if meter is not None and meter.charge(len(table) if transposition_table else len(on_path)):
+        return meter.exceeded(stats)
+    # stack to hold the (state, successors, f_limit) of the nodes on the current path
+    # (an explicit stack instead of recursion, so the depth of the solution is not limited by the recursion limit of python)
+    stack = [(initial_state, expand(initial_state, 0, heuristic(problem,initial_state)), math.inf)]
+    while stack:
+        state, successors, f_limit = stack[-1]
+        # pick the best successor (ties are broken by the order of the actions)
+        successors.sort(key=lambda item: (item[0], item[1]))
+        best = successors[0] if successors else [math.inf]
+        # if no successor can be explored below the limit then backtrack and back up the F value of the best successor to the parent
+        if best[0] > f_limit or best[0] == math.inf:
+            stack.pop()
+            if stack:
+                on_path.remove(state)
+                path.pop()
+                stack[-1][1][0][0] = best[0]
+            continue
+        # the best successor can only be explored until its F value exceeds that of the second best
+        alternative = successors[1][0] if len(successors) > 1 else math.inf
+        f_value, _, successor, action, new_cost = best
+        path.append(action)
+        on_path.add(successor)
+        if problem.is_goal(successor):
+            return path
+        # stop before the expansion if the budget is exceeded
+        if meter is not None and meter.charge(len(table) if transposition_table else len(on_path)):
+            return meter.exceeded(stats)
+        stack.append((successor, expand(successor, new_cost, f_value), min(f_limit, alternative)))
+    # return None if there is no solution
+    return None
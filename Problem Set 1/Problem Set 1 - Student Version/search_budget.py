@@ -0,0 +1,98 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from time import perf_counter
+
+from search_stats import SearchStats
+
+# This file contains the budgets that limit how much work a search can do
+# A search that receives a SearchBudget stops once it has expanded max_expansions nodes, once its explored set holds
+# max_closed states, once time_limit seconds have passed since it started, or once the budget is cancelled.
+# It then returns a BudgetExceeded result instead of a solution, for example:
+#   budget = SearchBudget(max_expansions=100000, time_limit=10)
+#   result = AStarSearch(problem, initial_state, heuristic, budget=budget)
+#   if isinstance(result, BudgetExceeded): print(result.reason)
+#
+# The budget is checked by the search itself once per expansion (the clock is only read every check_interval expansions),
+# so the search always stops at a clean point and its statistics (if any) are complete up to that point.
+# Unlike interrupting a search with an exception from another thread, this never leaves a frontier or a cache half updated.
+# Another thread (or a signal handler) can stop a running search by calling budget.cancel().
+
+# The reasons why a search can stop before finding a solution
+EXPANSIONS = "expansions"
+TIME = "time"
+CLOSED = "closed"
+CANCELLED = "cancelled"
+
+# The result of a search that ran out of its budget
+# It is falsy and it is not a list, so it can not be mistaken for a solution (an empty list is the solution of a goal state)
+@dataclass
+class BudgetExceeded:
+    reason: str                             # One of EXPANSIONS, TIME, CLOSED or CANCELLED
+    expanded: int                           # The number of nodes that were expanded before the search stopped
+    elapsed: float                          # The seconds since the search started
+    stats: Optional[SearchStats] = None     # The (partial) statistics of the search if they were requested
+
+    def __bool__(self) -> bool:
+        return False
+
+@dataclass
+class SearchBudget:
+    max_expansions: Optional[int] = None    # The maximum number of expanded nodes
+    time_limit: Optional[float] = None      # The maximum number of seconds (measured from the start of every search)
+    max_closed: Optional[int] = None        # The maximum number of states in the explored set
+    check_interval: int = 64                # The number of expansions between two readings of the clock
+    cancelled: bool = field(default=False, compare=False)
+
+    # Request every search that uses this budget to stop at its next expansion
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    # Start measuring a search (a budget can be reused by many searches, each one gets its own meter)
+    def start(self) -> "BudgetMeter":
+        return BudgetMeter(self)
+
+# The budget spent by a single search
+class BudgetMeter:
+    def __init__(self, budget: SearchBudget) -> None:
+        self.budget = budget
+        self.start = perf_counter()
+        self.deadline = None if budget.time_limit is None else self.start + budget.time_limit
+        self.max_expansions = budget.max_expansions
+        self.max_closed = budget.max_closed
+        self.expanded = 0
+        self.reason: Optional[str] = None
+
+    # Charge the next expansion with the current size of the explored set (before the expanded state is added to it)
+    # and return True if the budget is exceeded, in which case the node must not be expanded
+    def charge(self, closed_size: int = 0) -> bool:
+        self.expanded += 1
+        if self.budget.cancelled:
+            self.reason = CANCELLED
+        elif self.max_expansions is not None and self.expanded > self.max_expansions:
+            self.reason = EXPANSIONS
+        elif self.max_closed is not None and closed_size >= self.max_closed:
+            self.reason = CLOSED
+        elif self.deadline is not None and self.expanded % self.budget.check_interval == 0 and perf_counter() > self.deadline:
+            self.reason = TIME
+        # the refused expansion is not counted
+        if self.reason is not None:
+            self.expanded -= 1
+        return self.reason is not None
+
+    # Check the budget without charging an expansion and return True if it is exceeded
+    # It always reads the clock, so it is meant for the points where a search can loop without expanding any node
+    # (for example, between two iterations of ARA*)
+    def check(self, closed_size: int = 0) -> bool:
+        if self.budget.cancelled:
+            self.reason = CANCELLED
+        elif self.max_expansions is not None and self.expanded >= self.max_expansions:
+            self.reason = EXPANSIONS
+        elif self.max_closed is not None and closed_size >= self.max_closed:
+            self.reason = CLOSED
+        elif self.deadline is not None and perf_counter() > self.deadline:
+            self.reason = TIME
+        return self.reason is not None
+
+    # The result that the search returns once the budget is exceeded
+    def exceeded(self, stats: Optional[SearchStats] = None) -> BudgetExceeded:
+        return BudgetExceeded(self.reason, self.expanded, perf_counter() - self.start, stats)
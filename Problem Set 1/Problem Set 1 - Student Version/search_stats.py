@@ -0,0 +1,105 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Tuple
+from time import perf_counter
+
+from frontier import Frontier, T
+
+# The search functions can optionally fill a SearchStats object with some statistics about the search
+# To collect them, create an object and pass it to the search function, for example:
+#   stats = SearchStats()
+#   path = AStarSearch(problem, initial_state, heuristic, stats=stats)
+#   print(stats.summary())
+#
+# The counters are updated by the searches themselves. The timers are collected by wrapping the successor generation,
+# the heuristic and the frontier of the search (see timed_successors, timed_heuristic and TimedFrontier) only when
+# a stats object is given, so a search without stats runs exactly the same code as before.
+# The timers use time.perf_counter which costs a few tens of nanoseconds per call, but they still add some overhead,
+# so the timings of a search with stats are a little slower than the same search without stats.
+@dataclass
+class SearchStats:
+    expanded: int = 0           # The number of expanded nodes
+    generated: int = 0          # The number of generated successors
+    duplicates: int = 0         # The generated successors that were dropped since their state was already explored (or on the current path)
+    peak_frontier: int = 0      # The maximum number of entries in the frontier at any time
+    peak_closed: int = 0        # The maximum number of states in the explored set (or the transposition table) at any time
+    skipped_pushes: int = 0     # The successors that were not pushed since a copy with an equal or lower cost was already in the frontier
+    stale_pops: int = 0         # The popped entries that were skipped since their state was already explored or a cheaper copy was pushed after them
+    dropped: int = 0            # The nodes that were dropped to bound the memory (by beam search and bounded best first search)
+    successor_time: float = 0.0 # The seconds spent generating the successors
+    heuristic_time: float = 0.0 # The seconds spent computing the heuristic
+    queue_time: float = 0.0     # The seconds spent pushing to and popping from the frontier
+
+    # Record the expansion of a node with the current sizes of the frontier and the explored set
+    def expand(self, frontier_size: int, closed_size: int) -> None:
+        self.expanded += 1
+        if frontier_size > self.peak_frontier: self.peak_frontier = frontier_size
+        if closed_size > self.peak_closed: self.peak_closed = closed_size
+
+    # Wrap problem.get_successors so that its calls are timed and the generated successors are counted
+    def timed_successors(self, get_successors: Callable[[Any], List[Tuple[Any, Any, float]]]) -> Callable[[Any], List[Tuple[Any, Any, float]]]:
+        def wrapper(state):
+            start = perf_counter()
+            successors = get_successors(state)
+            self.successor_time += perf_counter() - start
+            self.generated += len(successors)
+            return successors
+        return wrapper
+
+    # Wrap problem.get_successor (for the searches that generate one successor at a time)
+    def timed_successor(self, get_successor: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+        def wrapper(state, action):
+            start = perf_counter()
+            successor = get_successor(state, action)
+            self.successor_time += perf_counter() - start
+            self.generated += 1
+            return successor
+        return wrapper
+
+    # Wrap a heuristic so that its calls are timed
+    def timed_heuristic(self, heuristic: Callable[[Any, Any], float]) -> Callable[[Any, Any], float]:
+        def wrapper(problem, state):
+            start = perf_counter()
+            value = heuristic(problem, state)
+            self.heuristic_time += perf_counter() - start
+            return value
+        return wrapper
+
+    # The statistics as a dictionary (for example, to write them to a JSON report)
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    # A short human readable summary
+    def summary(self) -> str:
+        return (
+            f"expanded {self.expanded}, generated {self.generated}, duplicates {self.duplicates}, "
+            f"skipped pushes {self.skipped_pushes}, stale pops {self.stale_pops}, dropped {self.dropped}, "
+            f"peak frontier {self.peak_frontier}, peak closed {self.peak_closed}\n"
+            f"time in successors {self.successor_time:.3f}s, heuristic {self.heuristic_time:.3f}s, queue {self.queue_time:.3f}s"
+        )
+
+# A frontier that forwards every operation to another frontier and adds the time spent in push and pop to the stats
+class TimedFrontier(Frontier[T]):
+    def __init__(self, frontier: Frontier[T], stats: SearchStats) -> None:
+        self.frontier = frontier
+        self.stats = stats
+
+    def push(self, item: T, priority: float = 0) -> None:
+        start = perf_counter()
+        self.frontier.push(item, priority)
+        self.stats.queue_time += perf_counter() - start
+
+    def pop(self) -> T:
+        start = perf_counter()
+        item = self.frontier.pop()
+        self.stats.queue_time += perf_counter() - start
+        return item
+
+    # Only available if the wrapped frontier is a PriorityFrontier
+    def pop_with_priority(self) -> Tuple[float, T]:
+        start = perf_counter()
+        entry = self.frontier.pop_with_priority()
+        self.stats.queue_time += perf_counter() - start
+        return entry
+
+    def __len__(self) -> int:
+        return len(self.frontier)
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from typing import FrozenSet, Iterable
+from typing import FrozenSet, Iterable, List, Optional, Tuple
 from enum import Enum
 
-from mathutils import Direction, Point
+from mathutils import Direction, Point, ZobristTable
+from grid_kernel import NO_CELL, GridKernel, iterate_cells
 from problem import Problem
 from helpers.utils import track_call_count
 
@@ -25,26 +26,73 @@ class SokobanTile(str, Enum):
 # We disable the automatic equality implementation since we don't need it;
 # we only need the default equality which compares objects by pointers.
 # The layout contains the problem details that are unchangeable across states such as:
-#   The walkable area (locations without walls) and the locations of the goals
+#   The walkable area (locations without walls), the locations of the goals
+#   the dead squares (the walkable locations from which a crate can never be pushed to any goal, see compute_dead_squares)
+#   the Zobrist table used to hash the states (piece 0 is the player and piece 1 is a crate)
+#   which is as wide as the stride of the grid kernel, so keys[piece][cell index] is the key of the piece at a cell
+#   and the grid kernel used to generate the moves on cell indices (see grid_kernel.py)
 @dataclass(eq=False, frozen=True)
 class SokobanLayout:
-    __slots__ = ("width", "height", "walkable", "goals")
+    __slots__ = ("width", "height", "walkable", "goals", "dead_squares", "zobrist", "grid")
     width: int
     height: int
     walkable: FrozenSet[Point]
     goals: FrozenSet[Point]
+    dead_squares: FrozenSet[Point]
+    zobrist: ZobristTable
+    grid: GridKernel
+
+# The pieces of the Zobrist table of the sokoban layout
+ZOBRIST_PLAYER = 0
+ZOBRIST_CRATE = 1
+
+# Find the dead squares of a layout: the walkable locations from which a crate cannot reach any goal even if it is the only crate
+# We start from the goals and pull a crate backward: a crate at "position" can be pulled to "position + direction"
+# if the player can stand there and step back to "position + 2 * direction". Every location reached by pulling can be pushed to a goal,
+# so the dead squares are the walkable locations that were never reached.
+# A crate that is pushed to a dead square makes the level unsolvable, so these pushes can be pruned.
+def compute_dead_squares(walkable: FrozenSet[Point], goals: FrozenSet[Point]) -> FrozenSet[Point]:
+    alive = set(goals)
+    stack = list(goals)
+    while stack:
+        position = stack.pop()
+        for direction in Direction:
+            vector = direction.to_vector()
+            pulled, player = position + vector, position + vector + vector
+            if pulled in walkable and player in walkable and pulled not in alive:
+                alive.add(pulled)
+                stack.append(pulled)
+    return frozenset(walkable - alive)
 
 # For the sokoban state, we use dataclass with frozen=True to automatically implement:
-#   the constructor, the == operator, the hash function and to make the class immutable
+#   the == operator and to make the class immutable
 # Now it can be added to sets and used as keys in dictionaries
 # This will contain a reference to the sokoban layout and it will contain environment details that change across states such as:
 #   The player location and the locations of the crates 
-@dataclass(frozen=True)
+# The state also holds its Zobrist key (see mathutils.ZobristTable) which is used as its hash.
+# The key is computed from scratch only for the initial state, then get_successor updates it with the moved pieces,
+# so hashing a state does not hash the frozenset of crates again. The == operator still compares the player and the crates
+# (two states with the same player and crates always have the same key, but two different states may share a key).
+@dataclass(frozen=True, init=False)
 class SokobanState:
-    __slots__ = ("layout", "player", "crates")
+    __slots__ = ("layout", "player", "crates", "key")
     layout: SokobanLayout
     player: Point
     crates: FrozenSet[Point]
+    key: int
+
+    # If the key is not given, it is computed from the player and the crates
+    def __init__(self, layout: SokobanLayout, player: Point, crates: FrozenSet[Point], key: Optional[int] = None) -> None:
+        if key is None:
+            zobrist = layout.zobrist
+            key = zobrist.hash((ZOBRIST_CRATE, crate) for crate in crates) ^ zobrist.key(ZOBRIST_PLAYER, player)
+        object.__setattr__(self, "layout", layout)
+        object.__setattr__(self, "player", player)
+        object.__setattr__(self, "crates", crates)
+        object.__setattr__(self, "key", key)
+
+    def __hash__(self) -> int:
+        return self.key
 
     # This operator will convert the state to a string containing the grid representation of the level at the current state
     def __str__(self) -> str:
@@ -73,6 +121,13 @@ class SokobanProblem(Problem[SokobanState, Direction]):
     # The problem will contain the sokoban layout and the inital state
     layout: SokobanLayout
     initial_state: SokobanState
+    # If True, get_actions does not return the pushes that move a crate to a dead square
+    # It is disabled by default since it changes the number of expanded nodes of the searches
+    # It is a setting of every problem (see from_text), this class attribute is only the default
+    prune_dead_squares: bool = False
+    # If set, get_actions does not return the pushes that lead to a deadlock found by this detector (see sokoban_deadlock.py)
+    # and the strong heuristic returns infinity for the deadlocked states
+    deadlock_detector: Optional['DeadlockDetector'] = None
 
     def get_initial_state(self) -> SokobanState:
         return self.initial_state
@@ -83,42 +138,95 @@ class SokobanProblem(Problem[SokobanState, Direction]):
     # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
     @track_call_count
     def get_actions(self, state: SokobanState) -> Iterable[Direction]:
+        # The moves are generated on cell indices using the tables of the grid kernel
+        # (the walls are checked without creating any Point, and the neighbor Points are the ones stored in the kernel)
+        grid = self.layout.grid
+        neighbors, points = grid.neighbors, grid.points
+        crates = state.crates
+        cell = grid.to_index(state.player)
         actions = []
         for direction in Direction:
-            position = state.player + direction.to_vector()
+            position_cell = neighbors[direction][cell]
             # Disallow walking into walls
-            if position not in self.layout.walkable: continue
+            if position_cell == NO_CELL: continue
+            position = points[position_cell]
             # Check if walking into a crate
-            if position in state.crates:
+            if position in crates:
                 # make sure that the crate is not pushed into a wall or another crate
-                crate_position = position + direction.to_vector()
-                if crate_position not in self.layout.walkable or crate_position in state.crates:
+                crate_cell = neighbors[direction][position_cell]
+                if crate_cell == NO_CELL: continue
+                crate_position = points[crate_cell]
+                if crate_position in crates:
                     continue
+                # If enabled, skip the pushes into dead squares since the level cannot be solved after them
+                if self.prune_dead_squares and crate_position in self.layout.dead_squares:
+                    continue
+                # If enabled, skip the pushes that lead to a freeze or a bipartite deadlock
+                if self.deadlock_detector is not None:
+                    pushed_crates = crates.symmetric_difference({position, crate_position})
+                    if self.deadlock_detector.is_deadlock(pushed_crates, crate_position):
+                        continue
             actions.append(direction)
         return actions
 
     def get_successor(self, state: SokobanState, action: Direction) -> SokobanState:
-        player = state.player + action.to_vector()
+        grid = self.layout.grid
+        neighbors = grid.neighbors[action]
+        player_cell = neighbors[grid.to_index(state.player)]
         crates = state.crates
-        if player not in self.layout.walkable:
+        if player_cell == NO_CELL:
             # If we try to walk into a wall, then this action is wrong
             raise Exception(f"Invalid action {action} in state:" + "\n" + str(state))
+        player = grid.points[player_cell]
+        # The key of the successor is updated incrementally from the key of the state
+        keys = self.layout.zobrist.keys
+        key = state.key ^ keys[ZOBRIST_PLAYER][grid.to_index(state.player)] ^ keys[ZOBRIST_PLAYER][player_cell]
         if player in crates:
-            crate_position = player + action.to_vector()
-            if crate_position not in self.layout.walkable or crate_position in crates:
+            crate_cell = neighbors[player_cell]
+            crate_position = None if crate_cell == NO_CELL else grid.points[crate_cell]
+            if crate_position is None or crate_position in crates:
                 # If we try to push a crate into a wall or another crate, then this action is wrong
                 raise Exception(f"Invalid action {action} in state:" + "\n" + str(state))
             # If we walk to a crate, we push it
             crates = crates.symmetric_difference({player,crate_position})
-        return SokobanState(state.layout, player, crates)
+            key ^= keys[ZOBRIST_CRATE][player_cell] ^ keys[ZOBRIST_CRATE][crate_cell]
+        return SokobanState(state.layout, player, crates, key)
 
     def get_cost(self, state: SokobanState, action: Direction) -> float:
+        return self._move_cost(action)
+
+    # The cost of an action (used by both get_cost and get_successors)
+    def _move_cost(self, action: Direction) -> float:
         # All actions have the same cost
         return 1
 
+    # Generate all the successors in one call (see Problem.get_successors)
+    # The actions returned by get_actions are valid, so the successors are built without checking them again
+    def get_successors(self, state: SokobanState) -> List[Tuple[Direction, SokobanState, float]]:
+        if self.successor_methods_replaced():
+            return super().get_successors(state)
+        layout = self.layout
+        grid = layout.grid
+        neighbors, points = grid.neighbors, grid.points
+        player_keys, crate_keys = layout.zobrist.keys[ZOBRIST_PLAYER], layout.zobrist.keys[ZOBRIST_CRATE]
+        cell = grid.to_index(state.player)
+        player_key = state.key ^ player_keys[cell]
+        successors = []
+        for action in self.get_actions(state):
+            player_cell = neighbors[action][cell]
+            player = points[player_cell]
+            crates, key = state.crates, player_key ^ player_keys[player_cell]
+            if player in crates:
+                # If we walk to a crate, we push it
+                crate_cell = neighbors[action][player_cell]
+                crates = crates.symmetric_difference((player, points[crate_cell]))
+                key ^= crate_keys[player_cell] ^ crate_keys[crate_cell]
+            successors.append((action, SokobanState(layout, player, crates, key), self._move_cost(action)))
+        return successors
+
     # Read a sokoban problem from text containing a grid of tiles
     @staticmethod
-    def from_text(text: str) -> 'SokobanProblem':
+    def from_text(text: str, prune_dead_squares: bool = False) -> 'SokobanProblem':
         walkable, crates, goals =  set(), set(), set()
         player: Point = None
         lines = [line for line in (line.strip() for line in text.splitlines()) if line]
@@ -143,12 +251,146 @@ class SokobanProblem(Problem[SokobanState, Direction]):
                         crates.add(Point(x, y))
                         goals.add(Point(x, y))
         problem = SokobanProblem()
-        problem.layout = SokobanLayout(width, height, frozenset(walkable), frozenset(goals))
+        problem.prune_dead_squares = prune_dead_squares
+        walkable, goals = frozenset(walkable), frozenset(goals)
+        grid = GridKernel(width, height, walkable)
+        problem.layout = SokobanLayout(
+            width, height, walkable, goals, compute_dead_squares(walkable, goals),
+            ZobristTable(grid.stride, height, 2), grid
+        )
         problem.initial_state = SokobanState(problem.layout, player, frozenset(crates))
         return problem
 
     # Read a sokoban problem from file containing a grid of tiles
     @staticmethod
-    def from_file(path: str) -> 'SokobanProblem':
+    def from_file(path: str, prune_dead_squares: bool = False) -> 'SokobanProblem':
         with open(path, 'r') as f:
-            return SokobanProblem.from_text(f.read())
\ No newline at end of file
+            return SokobanProblem.from_text(f.read(), prune_dead_squares)
+
+
+# This is an alternative engine for the sokoban problem where the board is stored in bitboards
+# Every cell is stored as its linear index in the grid kernel of the layout (see grid_kernel.py)
+# A set of cells is a python int whose bit i is set if the cell with index i is in the set,
+# so moving a crate is two bit flips and a state is hashed and compared as a tuple of two ints.
+# The state is a tuple (player, crates) where player is the index of the player cell and crates is the bitboard of the crates
+BitboardSokobanState = Tuple[int, int]
+
+class BitboardSokobanProblem(Problem[BitboardSokobanState, Direction]):
+    # If True, get_actions does not return the pushes that move a crate to a dead square (like SokobanProblem.prune_dead_squares)
+    prune_dead_squares: bool = False
+
+    def __init__(self, layout: SokobanLayout, initial_state: SokobanState) -> None:
+        super().__init__()
+        self.layout = layout                        # The original layout (used to convert the states back to SokobanState)
+        self.grid = layout.grid
+        self.width = layout.width
+        self.height = layout.height
+        self.stride = self.grid.stride
+        self.walkable = self.grid.walkable_mask
+        self.goals = self.to_bitboard(layout.goals)
+        self.dead_squares = self.to_bitboard(layout.dead_squares)
+        # The index offset of every direction (in the same order as Direction so the actions are returned in the same order)
+        self.offsets = self.grid.offsets
+        self.initial_state = self.from_sokoban_state(initial_state)
+
+    def get_initial_state(self) -> BitboardSokobanState:
+        return self.initial_state
+
+    def is_goal(self, state: BitboardSokobanState) -> bool:
+        return state[1] == self.goals
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def get_actions(self, state: BitboardSokobanState) -> Iterable[Direction]:
+        player, crates = state
+        walkable = self.walkable
+        actions = []
+        for direction, offset in zip(Direction, self.offsets):
+            position = player + offset
+            # Disallow walking into walls (and outside the board)
+            if position < 0 or not (walkable >> position) & 1: continue
+            # Check if walking into a crate
+            if (crates >> position) & 1:
+                # make sure that the crate is not pushed into a wall or another crate
+                crate_position = position + offset
+                if crate_position < 0 or not ((walkable & ~crates) >> crate_position) & 1:
+                    continue
+                if self.prune_dead_squares and (self.dead_squares >> crate_position) & 1:
+                    continue
+            actions.append(direction)
+        return actions
+
+    def get_successor(self, state: BitboardSokobanState, action: Direction) -> BitboardSokobanState:
+        player, crates = state
+        offset = self.offsets[action]
+        position = player + offset
+        if position < 0 or not (self.walkable >> position) & 1:
+            # If we try to walk into a wall, then this action is wrong
+            raise Exception(f"Invalid action {action} in state:" + "\n" + str(self.to_sokoban_state(state)))
+        if (crates >> position) & 1:
+            crate_position = position + offset
+            if crate_position < 0 or not ((self.walkable & ~crates) >> crate_position) & 1:
+                # If we try to push a crate into a wall or another crate, then this action is wrong
+                raise Exception(f"Invalid action {action} in state:" + "\n" + str(self.to_sokoban_state(state)))
+            # If we walk to a crate, we push it
+            crates ^= (1 << position) | (1 << crate_position)
+        return (position, crates)
+
+    def get_cost(self, state: BitboardSokobanState, action: Direction) -> float:
+        # All actions have the same cost
+        return 1
+
+    # Convert a point to its cell index
+    def to_index(self, point: Point) -> int:
+        return self.grid.to_index(point)
+
+    # Convert a cell index to its point
+    def to_point(self, index: int) -> Point:
+        return self.grid.to_point(index)
+
+    # Convert a set of points to a bitboard
+    def to_bitboard(self, points: Iterable[Point]) -> int:
+        return self.grid.to_mask(points)
+
+    # Convert a bitboard to the list of its points
+    def to_points(self, bits: int) -> List[Point]:
+        return self.grid.to_points(bits)
+
+    # Convert a state of the original engine to this engine and back
+    def from_sokoban_state(self, state: SokobanState) -> BitboardSokobanState:
+        return (self.to_index(state.player), self.to_bitboard(state.crates))
+
+    def to_sokoban_state(self, state: BitboardSokobanState) -> SokobanState:
+        player, crates = state
+        return SokobanState(self.layout, self.to_point(player), frozenset(self.to_points(crates)))
+
+    # Create the bitboard version of a SokobanProblem (with the same dead square pruning)
+    @staticmethod
+    def from_problem(problem: SokobanProblem) -> 'BitboardSokobanProblem':
+        board = BitboardSokobanProblem(problem.layout, problem.initial_state)
+        board.prune_dead_squares = problem.prune_dead_squares
+        return board
+
+    @staticmethod
+    def from_text(text: str, prune_dead_squares: bool = False) -> 'BitboardSokobanProblem':
+        return BitboardSokobanProblem.from_problem(SokobanProblem.from_text(text, prune_dead_squares))
+
+    @staticmethod
+    def from_file(path: str, prune_dead_squares: bool = False) -> 'BitboardSokobanProblem':
+        return BitboardSokobanProblem.from_problem(SokobanProblem.from_file(path, prune_dead_squares))
+
+# Iterate over the indices of the set bits of a bitboard (from the lowest to the highest)
+iterate_bits = iterate_cells
+
+# Run a heuristic of the original engine on the bitboard engine by converting every state to a SokobanState
+# The heuristic gets a SokobanProblem with the same layout (kept in the problem cache) so it can use its own cache
+def bitboard_heuristic(heuristic):
+    def wrapped(problem: BitboardSokobanProblem, state: BitboardSokobanState) -> float:
+        original = problem.cache().get("original_problem")
+        if original is None:
+            original = SokobanProblem()
+            original.layout = problem.layout
+            original.initial_state = problem.to_sokoban_state(problem.initial_state)
+            problem.cache()["original_problem"] = original
+        return heuristic(original, problem.to_sokoban_state(state))
+    return wrapped
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from sokoban import SokobanLayout
+from mathutils import Direction, Point
+
+# This file contains a deadlock detector for sokoban
+# A deadlock is a state from which the level cannot be solved. The detector finds two kinds of deadlocks
+# (on top of the dead squares that are precomputed in the layout):
+#
+# 1- Freeze deadlocks: a crate is frozen if it cannot move along either axis. A crate is blocked along an axis if:
+#       - there is a wall on one of its two sides, or
+#       - there are dead squares on both sides (so moving it along this axis is a deadlock anyway), or
+#       - there is a frozen crate on one of its sides (while checking that crate, the first crate is treated as a wall).
+#    If any frozen crate is not on a goal, the level cannot be solved.
+#    Freezing only depends on the walls and on the chain of crates that touch each other,
+#    so the result is cached for every 4-connected group of crates.
+#
+# 2- Bipartite deadlocks: every crate must end on a different goal, but a crate can only reach the goals that it can be pushed to
+#    (ignoring the other crates). If there is no assignment of the crates to distinct reachable goals, the level cannot be solved.
+#    This is checked with a maximum bipartite matching (using augmenting paths) and the result is cached for every set of crates.
+#
+# Both kinds are permanent: a frozen crate can never move again and a crate can only lose reachable goals when it is pushed,
+# so a detected state stays detected in all its successors and the detector can be used by a consistent heuristic.
+
+# The detector counts how many times it was called and how many states it rejected
+@dataclass
+class DeadlockStats:
+    checks: int = 0                 # The number of checked states
+    dead_square_deadlocks: int = 0  # The states rejected because a crate is on a dead square
+    freeze_deadlocks: int = 0       # The states rejected because of a frozen crate that is not on a goal
+    bipartite_deadlocks: int = 0    # The states rejected because the crates cannot be assigned to distinct goals
+    cache_hits: int = 0             # The checks that were answered from the caches
+
+    @property
+    def deadlocks(self) -> int:
+        return self.dead_square_deadlocks + self.freeze_deadlocks + self.bipartite_deadlocks
+
+class DeadlockDetector:
+    def __init__(self, layout: SokobanLayout, cache_limit: int = 2**16) -> None:
+        self.layout = layout
+        self.cache_limit = cache_limit
+        self.stats = DeadlockStats()
+        self.goals: List[Point] = sorted(layout.goals, key=lambda point: (point.y, point.x))
+        # reachable_goals[cell] = the indices of the goals that a single crate at this cell can be pushed to
+        self.reachable_goals: Dict[Point, List[int]] = {}
+        for index, goal in enumerate(self.goals):
+            for cell in self._pull_region(goal):
+                self.reachable_goals.setdefault(cell, []).append(index)
+        self._freeze_cache: Dict[FrozenSet[Point], bool] = {}
+        self._matching_cache: Dict[FrozenSet[Point], bool] = {}
+
+    # Returns the cells from which a single crate can be pushed to the goal (by pulling it backward from the goal)
+    def _pull_region(self, goal: Point) -> Set[Point]:
+        walkable = self.layout.walkable
+        region = {goal}
+        stack = [goal]
+        while stack:
+            position = stack.pop()
+            for direction in Direction:
+                vector = direction.to_vector()
+                pulled = position + vector
+                if pulled in walkable and pulled + vector in walkable and pulled not in region:
+                    region.add(pulled)
+                    stack.append(pulled)
+        return region
+
+    # Returns True if the crates are in a deadlock
+    # If moved is given, only the freeze deadlocks around this crate are checked (it is the only crate that moved since the last check)
+    def is_deadlock(self, crates: FrozenSet[Point], moved: Optional[Point] = None) -> bool:
+        self.stats.checks += 1
+        if any(crate in self.layout.dead_squares for crate in crates):
+            self.stats.dead_square_deadlocks += 1
+            return True
+        if moved is not None:
+            groups = [self._group(moved, crates)]
+        else:
+            groups, grouped = [], set()
+            for crate in crates:
+                if crate in grouped: continue
+                group = self._group(crate, crates)
+                grouped |= group
+                groups.append(group)
+        for group in groups:
+            if self._has_frozen_crate(group):
+                self.stats.freeze_deadlocks += 1
+                return True
+        if not self._has_matching(crates):
+            self.stats.bipartite_deadlocks += 1
+            return True
+        return False
+
+    # Returns the 4-connected group of crates that contains the crate
+    def _group(self, crate: Point, crates: FrozenSet[Point]) -> FrozenSet[Point]:
+        group = {crate}
+        stack = [crate]
+        while stack:
+            position = stack.pop()
+            for direction in Direction:
+                neighbor = position + direction.to_vector()
+                if neighbor in crates and neighbor not in group:
+                    group.add(neighbor)
+                    stack.append(neighbor)
+        return frozenset(group)
+
+    # Returns True if a crate of the group is frozen and not on a goal
+    def _has_frozen_crate(self, group: FrozenSet[Point]) -> bool:
+        cached = self._freeze_cache.get(group)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return cached
+        goals = self.layout.goals
+        # A group where all the crates are on goals is never a deadlock
+        result = any(crate not in goals and self._is_frozen(crate, group, set()) for crate in group)
+        self._store(self._freeze_cache, group, result)
+        return result
+
+    def _is_frozen(self, crate: Point, crates: FrozenSet[Point], walls: Set[Point]) -> bool:
+        # The crate is treated as a wall while checking its neighbors (to stop the recursion from going back to it)
+        walls = walls | {crate}
+        for first, second in ((Direction.LEFT, Direction.RIGHT), (Direction.UP, Direction.DOWN)):
+            if not self._is_blocked(crate + first.to_vector(), crate + second.to_vector(), crates, walls):
+                return False
+        return True
+
+    # Check if a crate with the given two neighbors (along one axis) cannot move along this axis
+    def _is_blocked(self, first: Point, second: Point, crates: FrozenSet[Point], walls: Set[Point]) -> bool:
+        walkable = self.layout.walkable
+        if first not in walkable or second not in walkable or first in walls or second in walls:
+            return True
+        dead_squares = self.layout.dead_squares
+        if first in dead_squares and second in dead_squares:
+            return True
+        return (first in crates and self._is_frozen(first, crates, walls)) or (second in crates and self._is_frozen(second, crates, walls))
+
+    # Returns True if every crate can be assigned to a different goal that it can reach
+    def _has_matching(self, crates: FrozenSet[Point]) -> bool:
+        cached = self._matching_cache.get(crates)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return cached
+        # owner[goal] = the index of the crate assigned to the goal
+        owner: List[int] = [-1] * len(self.goals)
+        options = [self.reachable_goals.get(crate, []) for crate in crates]
+        def assign(crate: int, visited: List[bool]) -> bool:
+            for goal in options[crate]:
+                if visited[goal]: continue
+                visited[goal] = True
+                if owner[goal] == -1 or assign(owner[goal], visited):
+                    owner[goal] = crate
+                    return True
+            return False
+        result = all(assign(crate, [False] * len(self.goals)) for crate in range(len(options)))
+        self._store(self._matching_cache, crates, result)
+        return result
+
+    # The caches are cleared when they get too large to keep the memory bounded
+    def _store(self, cache: Dict[FrozenSet[Point], bool], key: FrozenSet[Point], value: bool) -> None:
+        if len(cache) >= self.cache_limit:
+            cache.clear()
+        cache[key] = value
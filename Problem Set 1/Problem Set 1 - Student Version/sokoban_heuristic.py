@@ -9,6 +9,7 @@ def weak_heuristic(problem: SokobanProblem, state: SokobanState):
 
 #TODO: Import any modules and write any functions you want to use
 import math
+from sokoban_matching import matching_cost
 
 
 def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
@@ -19,55 +20,54 @@ def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
     #NOTE: you can use problem.cache() to get a dictionary in which you can store information that will persist between calls of this function
     # This could be useful if you want to store the results heavy computations that can be cached and used across multiple calls of this function
 
+    # the first part of the heuristic is the number of pushes (see strong_push_heuristic)
+    crates_heuristic = strong_push_heuristic(problem, state)
+
+    # the last part of the heuristic is the distance from the player to the nearest crate (like the weak heuristic)
+    # it is only added if some crate is not on a goal yet so the heuristic stays 0 at the goal
+    # a push starts and ends next to a crate, so this part never decreases by more than 1 per action (the heuristic stays consistent)
+    if(crates_heuristic == 0 or crates_heuristic == math.inf):
+        return crates_heuristic
+    return crates_heuristic + min(manhattan_distance(state.player, crate) for crate in state.crates) - 1
+
+# The part of the strong heuristic that only counts the pushes (infinity for a deadlock, otherwise the matching cost)
+# Unlike strong_heuristic, it does not count the walking of the player, so it stays admissible for the push search
+# where the walking is free (see sokoban_push.py)
+def strong_push_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
     # get the crates, goals and walkable points
     crates = state.crates
     goals = problem.layout.goals
     walkable = problem.layout.walkable
 
-    # get the cached values
-    prev_crate = problem.cache().get("prev_crate", None)
-    prev_heuristic = problem.cache().get("prev_heuristic", None)
+    # the heuristic only depends on the crates, so it is cached for every set of crates
+    # (many states only differ in the player position)
+    crates_heuristics = problem.cache().setdefault("crates_heuristics", {})
 
-    # if the boxes are not changed, return the cached value
-    if(crates == prev_crate):
-        return prev_heuristic
-    
-    # update the cached values
-    problem.cache()["prev_crate"] = crates
-    problem.cache()["prev_heuristic"] = math.inf
-
-    # prev_heuristic is used to calculated the heuristic for the current state 
-    prev_heuristic = math.inf
+    # if the boxes were seen before, use the cached value
+    cached = crates_heuristics.get(crates)
+    if(cached is not None):
+        return cached
 
     # check if there is a deadlock for the current crate
     def is_deadlock(crate):
+        # the crate is on a dead square (a corner, or along a wall without any goal, ...)
+        # these squares are precomputed once per layout (see compute_dead_squares in sokoban.py)
+        if(crate in problem.layout.dead_squares):
+            return True
+
         # get all surrounding walls of the crate
         directions_walls = [False]*4
         # get all surrounding crates of the crate
         directions_crates = [False]*4
 
-        # count number of non walkable
-        cnt = 0
-
         for direction in Direction:
 
             if(crate + direction.to_vector() not in walkable):
                 directions_walls[direction] = True
-                cnt+=1
             
             if(crate + direction.to_vector() in crates):
                 directions_crates[direction] = True
 
-        
-        # (left or right) and (up or down) are blocked
-        # for the four corners
-        if(directions_walls[Direction.LEFT] or directions_walls[Direction.RIGHT]) and (directions_walls[Direction.UP] or directions_walls[Direction.DOWN]):
-            return True
-        
-        # if there are more than two surrounding walls then it is a deadlock
-        if(cnt>2):
-            return True
-        
         # make a list of all surrounding walls or crates
         directions_all = [False]*4
         for i in range(4):
@@ -106,49 +106,24 @@ def strong_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
             if(left_up in crates):
                 return True
             
-        # crate against the goal
-
-        #get the nearest goal
-        goal = None
-        for it_goal in goals:
-            if(it_goal in crates):
-                continue
-            if(goal is None or manhattan_distance(it_goal,crate)<manhattan_distance(goal,crate)):
-                goal = it_goal
-        # if the crate stuck in the far left and the goal is in the right
-        if(crate.x==1 and goal.x>1):
-            return True
-        # if the crate stuck in the far right and the goal is in the left
-        if(crate.x==problem.layout.width-2 and goal.x<problem.layout.width-2):
-            return True
-        # if the crate stuck in the far up and the goal is in the down
-        if(crate.y==1 and goal.y>1):   
-            return True
-        # if the crate stuck in the far down and the goal is in the up
-        if(crate.y==problem.layout.height-2 and goal.y<problem.layout.height-2):
-            return True
-        return False        
+        return False
     
     # check if there are deadlocks
+    # if the problem has a deadlock detector (see sokoban_deadlock.py), it also finds the freeze and bipartite deadlocks
+    if(problem.deadlock_detector is not None and problem.deadlock_detector.is_deadlock(crates)):
+        crates_heuristics[crates] = math.inf
+        return math.inf
     for crate in crates:
         if(crate in goals):
             continue
         if(is_deadlock(crate)):
+            crates_heuristics[crates] = math.inf
             return math.inf
     
-    # the second part of the heuristic if there are no deadlocks
-    # get the unassigned crates
-    unassigned_crates = crates.difference(goals)
-    sum = 0
-    # get the sum of the distance between the unassigned crates and the nearest goal
-    for crate in unassigned_crates:
-        # get the distance to the nearest goal
-        min_distance = math.inf
-        for goal in goals:
-            distance = manhattan_distance(crate, goal)
-            if(distance < min_distance):
-                min_distance = distance
-        sum += min_distance
-    prev_heuristic = sum
-    problem.cache()["prev_heuristic"] = prev_heuristic
-    return sum
\ No newline at end of file
+    # if there are no deadlocks
+    # the minimum number of pushes to move every crate to a different goal (see sokoban_matching.py)
+    # it uses the real push distances (around the walls) instead of the manhattan distance to the nearest goal
+    # and it does not let two crates count the same goal
+    crates_heuristic = matching_cost(problem, state)
+    crates_heuristics[crates] = crates_heuristic
+    return crates_heuristic
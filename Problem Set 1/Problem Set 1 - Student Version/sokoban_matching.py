@@ -0,0 +1,168 @@
+from collections import deque
+from typing import Dict, FrozenSet, List, Optional
+import math
+
+from sokoban import SokobanLayout, SokobanProblem, SokobanState
+from mathutils import Direction, Point, manhattan_distance
+
+# This file contains a sokoban heuristic based on a minimum cost matching between the crates and the goals
+#
+# 1- The push distance from a cell to a goal is the minimum number of pushes needed to move a single crate from the cell to the goal
+#    (ignoring the other crates). It is computed once per layout with a BFS over pull moves starting from every goal.
+#    Unlike the manhattan distance, it goes around the walls and it is infinite if the crate can never reach the goal.
+#
+# 2- Every crate must end on a different goal, so the crates need at least as many pushes as the minimum cost perfect matching
+#    between the crates and the goals (where the cost of a pair is its push distance). The matching is found by the Hungarian algorithm.
+#    Since a push moves one crate by one cell, it changes the matching cost by at most 1, so the matching cost is consistent.
+#
+# 3- Most states differ from their parent by a single pushed crate, so instead of solving every matching from scratch,
+#    the matching of the parent (if it is cached) is updated by removing the row of the pushed crate and adding it again with its new costs,
+#    which is a single phase of the Hungarian algorithm (O(n^2) instead of O(n^3)).
+
+# Push distances that are unreachable are replaced by this large cost inside the Hungarian algorithm
+UNREACHABLE = 10**6
+
+# The push distance from every cell to every goal
+class PushDistanceTable:
+    def __init__(self, layout: SokobanLayout) -> None:
+        self.goals: List[Point] = sorted(layout.goals, key=lambda point: (point.y, point.x))
+        # distances[cell][j] = the push distance from the cell to the goal j
+        self.distances: Dict[Point, List[float]] = {cell: [math.inf] * len(self.goals) for cell in layout.walkable}
+        for j, goal in enumerate(self.goals):
+            self.distances[goal][j] = 0
+            queue = deque([goal])
+            while queue:
+                position = queue.popleft()
+                distance = self.distances[position][j] + 1
+                for direction in Direction:
+                    vector = direction.to_vector()
+                    # A crate at "pulled" can be pushed to "position" by a player standing at "pulled + vector"
+                    pulled = position + vector
+                    if pulled in layout.walkable and pulled + vector in layout.walkable and self.distances[pulled][j] == math.inf:
+                        self.distances[pulled][j] = distance
+                        queue.append(pulled)
+
+    # Returns the cost row of a crate for the Hungarian algorithm (1-indexed, so the entry 0 is unused)
+    def costs(self, crate: Point) -> List[int]:
+        return [0] + [UNREACHABLE if distance == math.inf else distance for distance in self.distances[crate]]
+
+# A minimum cost assignment of n rows (crates) to m columns (goals) where n <= m
+# It keeps the dual potentials u and v of the Hungarian algorithm so that it can be updated when the costs of a single row change
+# The arrays are 1-indexed like the classic implementation: owner[j] is the row assigned to the column j (0 if none)
+class MinCostMatching:
+    def __init__(self, costs: List[List[int]], u: List[int], v: List[int], owner: List[int]) -> None:
+        self.costs = costs
+        self.u = u
+        self.v = v
+        self.owner = owner
+
+    @property
+    def cost(self) -> float:
+        total = sum(self.costs[i][j] for j, i in enumerate(self.owner) if i != 0)
+        return math.inf if total >= UNREACHABLE else total
+
+    # Solve the assignment from scratch by adding the rows one by one
+    @staticmethod
+    def solve(rows: List[List[int]]) -> 'MinCostMatching':
+        n, m = len(rows), len(rows[0]) - 1 if rows else 0
+        matching = MinCostMatching([[0] * (m + 1)] + rows, [0] * (n + 1), [0] * (m + 1), [0] * (m + 1))
+        for i in range(1, n + 1):
+            matching._add_row(i)
+        return matching
+
+    # Returns a new matching where the costs of the row i are replaced
+    # The row is removed from the assignment, its potential is lowered to keep the potentials feasible,
+    # then it is added again with a single phase of the algorithm
+    # This is only valid if n == m (otherwise the potentials of the freed column may not be optimal)
+    def replace_row(self, i: int, row: List[int]) -> 'MinCostMatching':
+        costs = self.costs.copy()
+        costs[i] = row
+        v, owner = self.v.copy(), self.owner.copy()
+        owner[owner.index(i)] = 0
+        u = self.u.copy()
+        u[i] = min(row[j] - v[j] for j in range(1, len(row)))
+        matching = MinCostMatching(costs, u, v, owner)
+        matching._add_row(i)
+        return matching
+
+    # A single phase of the Hungarian algorithm: find the shortest augmenting path from the row i (using the reduced costs) and apply it
+    def _add_row(self, i: int) -> None:
+        costs, u, v, owner = self.costs, self.u, self.v, self.owner
+        m = len(v) - 1
+        owner[0] = i
+        column = 0
+        min_reduced = [math.inf] * (m + 1)
+        previous = [0] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[column] = True
+            row, delta, next_column = owner[column], math.inf, 0
+            for j in range(1, m + 1):
+                if used[j]: continue
+                reduced = costs[row][j] - u[row] - v[j]
+                if reduced < min_reduced[j]:
+                    min_reduced[j], previous[j] = reduced, column
+                if min_reduced[j] < delta:
+                    delta, next_column = min_reduced[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_reduced[j] -= delta
+            column = next_column
+            if owner[column] == 0: break
+        # Flip the assignments along the augmenting path
+        while column:
+            previous_column = previous[column]
+            owner[column] = owner[previous_column]
+            column = previous_column
+        owner[0] = 0
+
+# The matching of a set of crates (with the crate of every row)
+class CrateMatching:
+    def __init__(self, crates: List[Point], matching: MinCostMatching) -> None:
+        self.crates = crates
+        self.matching = matching
+
+# Returns the minimum number of pushes needed to move the crates to distinct goals (or infinity if they cannot all reach a goal)
+# The push distances and the matchings of the recent crate sets are stored in the problem cache
+def matching_cost(problem: SokobanProblem, state: SokobanState, cache_limit: int = 2**16) -> float:
+    cache = problem.cache()
+    table: Optional[PushDistanceTable] = cache.get("push_distances")
+    if table is None:
+        table = cache["push_distances"] = PushDistanceTable(problem.layout)
+    matchings: Dict[FrozenSet[Point], CrateMatching] = cache.setdefault("crate_matchings", {})
+    crates = state.crates
+    result = matchings.get(crates)
+    if result is None:
+        if len(crates) > len(table.goals): return math.inf
+        # If the state was reached by a push, the player stands where the pushed crate was, so the parent crates are known
+        if len(crates) == len(table.goals):
+            for direction in Direction:
+                pushed = state.player + direction.to_vector()
+                if pushed not in crates: continue
+                parent = matchings.get(crates.difference((pushed,)).union((state.player,)))
+                if parent is None: continue
+                row = parent.crates.index(state.player)
+                crate_list = parent.crates.copy()
+                crate_list[row] = pushed
+                result = CrateMatching(crate_list, parent.matching.replace_row(row + 1, table.costs(pushed)))
+                break
+        if result is None:
+            crate_list = list(crates)
+            result = CrateMatching(crate_list, MinCostMatching.solve([table.costs(crate) for crate in crate_list]))
+        if len(matchings) >= cache_limit:
+            matchings.clear()
+        matchings[crates] = result
+    return result.matching.cost
+
+# This heuristic is the matching cost plus the distance from the player to the nearest crate (minus 1)
+# The player term is only added when some crate still needs to be pushed, so the heuristic is 0 at the goal.
+# It stays consistent: a step that does not push changes the player term by at most 1 and leaves the matching cost unchanged,
+# and a push can only start and end next to a crate (so the player term is 0 before and after it)
+def matching_heuristic(problem: SokobanProblem, state: SokobanState) -> float:
+    cost = matching_cost(problem, state)
+    if cost == 0 or cost == math.inf:
+        return cost
+    return cost + min(manhattan_distance(state.player, crate) for crate in state.crates) - 1
@@ -0,0 +1,194 @@
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sokoban import BitboardSokobanProblem, BitboardSokobanState, SokobanProblem, SokobanState, iterate_bits
+from mathutils import Direction
+from problem import HeuristicFunction, Problem, Solution
+from helpers.utils import track_call_count
+
+# This file contains a formulation of the sokoban problem where every action is a crate push (a macro action)
+# In SokobanProblem, every player step creates a new state, so most of the states only differ in where the player walked.
+# Here, the player walks (for free in the search tree) to any cell it can reach without pushing a crate, then pushes one crate.
+# The states are built on the bitboard engine (see BitboardSokobanProblem): a state is a tuple (player, crates).
+#
+# There are two modes:
+# - normalize=True: the player cell is replaced by a canonical cell of its reachable region (the top-left cell, which is the
+#   lowest set bit of the region), so all the states where the player stands anywhere in the same region are the same state.
+#   Every push costs 1, so the searches are optimal in the number of pushes (not in the number of moves).
+#   This gives the smallest search space.
+# - normalize=False: the player stays where the push left it (the old cell of the pushed crate) and every push costs
+#   the number of steps walked to reach the crate plus the push itself, so the searches are optimal in the number of moves.
+#   The walking cost depends on the exact player cell, which is why the player cannot be normalized in this mode.
+#
+# A solution (a list of pushes) is expanded back into the list of Directions that the SokobanProblem agents expect
+# by walking along a shortest path to every push.
+
+# A push of the crate at the cell index "crate" in the given direction after walking "walk" steps (the walk is 0 if normalize is True)
+class Push(NamedTuple):
+    crate: int
+    direction: Direction
+    walk: int
+
+    def __str__(self) -> str:
+        return f"{self.crate}{self.direction}"
+
+class PushSokobanProblem(Problem[BitboardSokobanState, Push]):
+    # If True, get_actions does not return the pushes that move a crate to a dead square
+    # Unlike SokobanProblem, it is enabled by default since this problem has no expected expansion counts to keep
+    prune_dead_squares: bool = True
+
+    def __init__(self, board: BitboardSokobanProblem, normalize: bool = True) -> None:
+        super().__init__()
+        self.board = board
+        self.normalize = normalize
+        self.initial_state = self.from_bitboard_state(board.initial_state)
+
+    def get_initial_state(self) -> BitboardSokobanState:
+        return self.initial_state
+
+    def is_goal(self, state: BitboardSokobanState) -> bool:
+        return state[1] == self.board.goals
+
+    # Returns the bitboard of the cells that the player can reach without pushing a crate
+    def reachable(self, player: int, crates: int) -> int:
+        stride, free = self.board.stride, self.board.walkable & ~crates
+        reached = frontier = 1 << player
+        while frontier:
+            frontier = ((frontier << 1) | (frontier >> 1) | (frontier << stride) | (frontier >> stride)) & free & ~reached
+            reached |= frontier
+        return reached
+
+    # Returns the number of steps to every cell that the player can reach without pushing a crate
+    def walking_distances(self, player: int, crates: int) -> Dict[int, int]:
+        stride, free = self.board.stride, self.board.walkable & ~crates
+        distances = {player: 0}
+        reached = frontier = 1 << player
+        steps = 0
+        while frontier:
+            steps += 1
+            frontier = ((frontier << 1) | (frontier >> 1) | (frontier << stride) | (frontier >> stride)) & free & ~reached
+            reached |= frontier
+            for cell in iterate_bits(frontier):
+                distances[cell] = steps
+        return distances
+
+    # Returns the canonical player cell of the region reachable from the player
+    def canonical_player(self, player: int, crates: int) -> int:
+        reached = self.reachable(player, crates)
+        return (reached & -reached).bit_length() - 1
+
+    # We use @track_call_count to track the number of times this function was called to count the number of explored nodes
+    @track_call_count
+    def get_actions(self, state: BitboardSokobanState) -> Iterable[Push]:
+        player, crates = state
+        free = self.board.walkable & ~crates
+        if self.prune_dead_squares:
+            free &= ~self.board.dead_squares
+        if self.normalize:
+            reached, distances = self.reachable(player, crates), None
+        else:
+            distances = self.walking_distances(player, crates)
+        actions = []
+        for crate in iterate_bits(crates):
+            for direction, offset in zip(Direction, self.board.offsets):
+                # The player must stand behind the crate and the cell in front of the crate must be free (and alive if pruning)
+                behind, target = crate - offset, crate + offset
+                if behind < 0 or target < 0 or not (free >> target) & 1: continue
+                if distances is None:
+                    if (reached >> behind) & 1:
+                        actions.append(Push(crate, direction, 0))
+                elif behind in distances:
+                    actions.append(Push(crate, direction, distances[behind]))
+        return actions
+
+    def get_successor(self, state: BitboardSokobanState, action: Push) -> BitboardSokobanState:
+        _, crates = state
+        target = action.crate + self.board.offsets[action.direction]
+        if not (crates >> action.crate) & 1 or target < 0 or not ((self.board.walkable & ~crates) >> target) & 1:
+            # If we try to push a missing crate or to push a crate into a wall or another crate, then this action is wrong
+            raise Exception(f"Invalid push {action} in state:" + "\n" + str(self.to_sokoban_state(state)))
+        crates ^= (1 << action.crate) | (1 << target)
+        # After the push, the player stands where the crate was
+        player = action.crate
+        if self.normalize:
+            player = self.canonical_player(player, crates)
+        return (player, crates)
+
+    def get_cost(self, state: BitboardSokobanState, action: Push) -> float:
+        return 1 if self.normalize else action.walk + 1
+
+    # Convert a state of the bitboard engine to this problem (by normalizing the player if needed)
+    def from_bitboard_state(self, state: BitboardSokobanState) -> BitboardSokobanState:
+        player, crates = state
+        return (self.canonical_player(player, crates) if self.normalize else player, crates)
+
+    def from_sokoban_state(self, state: SokobanState) -> BitboardSokobanState:
+        return self.from_bitboard_state(self.board.from_sokoban_state(state))
+
+    # Note that if normalize is True, the player of the returned state is the canonical cell and not the real player cell
+    def to_sokoban_state(self, state: BitboardSokobanState) -> SokobanState:
+        return self.board.to_sokoban_state(state)
+
+    # Expand a list of pushes into the list of player moves starting from the given state of the bitboard engine
+    # (the real player cell is needed since the canonical cell is not where the player actually stands)
+    def to_directions(self, state: BitboardSokobanState, pushes: List[Push]) -> List[Direction]:
+        player, crates = state
+        directions = []
+        for push in pushes:
+            offset = self.board.offsets[push.direction]
+            directions.extend(self._walk(player, push.crate - offset, crates))
+            directions.append(push.direction)
+            crates ^= (1 << push.crate) | (1 << (push.crate + offset))
+            player = push.crate
+        return directions
+
+    # Returns the directions of a shortest walk from the player to the destination without pushing any crate
+    def _walk(self, player: int, destination: int, crates: int) -> List[Direction]:
+        free = self.board.walkable & ~crates
+        parents: Dict[int, Optional[int]] = {player: None}
+        queue = deque([player])
+        while queue and destination not in parents:
+            cell = queue.popleft()
+            for offset in self.board.offsets:
+                next_cell = cell + offset
+                if next_cell < 0 or next_cell in parents or not (free >> next_cell) & 1: continue
+                parents[next_cell] = cell
+                queue.append(next_cell)
+        if destination not in parents:
+            raise Exception(f"The player cannot walk from cell {player} to cell {destination}")
+        directions = []
+        cell = destination
+        while parents[cell] is not None:
+            directions.append(Direction(self.board.offsets.index(cell - parents[cell])))
+            cell = parents[cell]
+        directions.reverse()
+        return directions
+
+    @staticmethod
+    def from_problem(problem: SokobanProblem, normalize: bool = True) -> 'PushSokobanProblem':
+        return PushSokobanProblem(BitboardSokobanProblem.from_problem(problem), normalize)
+
+# Run a heuristic of the original engine on the push problem by converting every state to a SokobanState
+# When normalize is True, the player sees the canonical cell and the walking is free, so the heuristic must only count pushes
+# (like sokoban_matching.matching_cost or sokoban_heuristic.strong_push_heuristic, see get_heuristic in play_sokoban.py).
+# The heuristics that also count the walking (weak, strong and matching) are admissible only if normalize is False
+def push_heuristic(heuristic: HeuristicFunction, original: SokobanProblem) -> HeuristicFunction:
+    return lambda problem, state: heuristic(original, problem.to_sokoban_state(state))
+
+# Wrap a search function so that it solves a SokobanProblem by searching over pushes
+# The wrapped function has the same interface as the original one (with or without a heuristic)
+# and it returns the solution as a list of Directions, so it can be used by the agents in agents.py
+def push_search(search_fn, normalize: bool = True):
+    def search(problem: SokobanProblem, initial_state: SokobanState, heuristic: Optional[HeuristicFunction] = None, **kwargs) -> Solution:
+        push_problem: Optional[PushSokobanProblem] = problem.cache().get(("push_problem", normalize))
+        if push_problem is None:
+            push_problem = PushSokobanProblem.from_problem(problem, normalize)
+            problem.cache()[("push_problem", normalize)] = push_problem
+        state = push_problem.board.from_sokoban_state(initial_state)
+        if heuristic is None:
+            pushes = search_fn(push_problem, push_problem.from_bitboard_state(state), **kwargs)
+        else:
+            pushes = search_fn(push_problem, push_problem.from_bitboard_state(state), push_heuristic(heuristic, problem), **kwargs)
+        # None and BudgetExceeded (see search_budget.py) are returned as they are
+        return push_problem.to_directions(state, pushes) if isinstance(pushes, list) else pushes
+    return search
@@ -4,6 +4,7 @@ from typing import Iterable, List, Optional, Set, Tuple
 from enum import Enum
 
 from mathutils import Direction, Point
+from grid_kernel import GridKernel
 from game import Game
 from helpers.utils import track_call_count
 from helpers.mt19937 import RandomGenerator
@@ -25,12 +26,18 @@ class DungeonTile(str, Enum):
     KEY = "K"
 
 # Dungeon layout specifies the walkable locations and the exit location
+# It also holds the grid kernel of the walkable locations, which is used to generate the moves on cell indices (see grid_kernel.py)
 @dataclass
 class DungeonLayout:
     width: int
     height: int
     walkable: Set[Point]
     exit: Point
+    grid: GridKernel = None
+
+    def __post_init__(self):
+        if self.grid is None:
+            self.grid = GridKernel(self.width, self.height, self.walkable)
 
     def __deepcopy__(self, memo):
         return self
@@ -136,21 +143,20 @@ class DungeonGame(Game[DungeonState, Direction]):
         return state.turn
 
     def get_actions(self, state: DungeonState) -> Iterable[Direction]:
+        # The moves are generated on cell indices: grid.moves holds the walkable neighbors of every cell
+        grid = state.layout.grid
         if state.turn == 0:
             # Find an return actions to be done by the player
-            position_position = state.player.position
-            positions = ((direction, position_position + direction.to_vector()) for direction in Direction)
             # prevent the player from getting into a wall
-            return [direction for direction, position in positions if position in state.layout.walkable]
+            return [direction for direction, _ in grid.moves[grid.to_index(state.player.position)]]
         else:
             # Find an return actions to be done by a monster
             index = state.turn - 1
             if not state.monsters[index].alive: return []
-            monster_locations = {monster.position for i, monster in enumerate(state.monsters) if i != index and monster.alive} 
-            monster_position = state.monsters[index].position
-            positions = ((direction, monster_position + direction.to_vector()) for direction in Direction)
+            monster_cells = {grid.to_index(monster.position) for i, monster in enumerate(state.monsters) if i != index and monster.alive}
+            monster_cell = grid.to_index(state.monsters[index].position)
             # prevent the monster from getting into a wall or another monster
-            return [direction for direction, position in positions if position in state.layout.walkable and position not in monster_locations]
+            return [direction for direction, cell in grid.moves[monster_cell] if cell not in monster_cells]
 
     def get_successor(self, state: DungeonState, action: Direction) -> DungeonState:
         state = deepcopy(state)
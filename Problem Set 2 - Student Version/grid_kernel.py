@@ -0,0 +1,74 @@
+from typing import Iterable, Iterator, List, Tuple
+
+from mathutils import Direction, Point
+
+# This file contains the geometry of a grid where every cell is an integer index instead of a Point
+# Every cell (x, y) gets the linear index y * stride + x where stride = width + 1,
+# so the extra column at x = width is never walkable and a move to the left or the right can never wrap into the next row.
+# A set of cells can be stored as a bitmask (a python int whose bit i is set if the cell with index i is in the set).
+#
+# Adding a direction vector to a Point allocates a new Point and hashing it hashes its two fields,
+# while moving a cell index is an addition and all the neighbor lookups are done in precomputed tables:
+#   neighbors[direction][cell] = the walkable neighbor of the cell in the given direction (or NO_CELL)
+#   moves[cell] = the (direction, neighbor) pairs of the walkable neighbors of the cell (in the order of Direction)
+#   points[cell] = the Point of the cell (allocated once, so the problems that still need Points do not allocate new ones)
+# The dungeon game builds a kernel once for its layout (see DungeonLayout).
+
+# The neighbor of a cell that is outside the grid or that is not walkable
+NO_CELL = -1
+
+class GridKernel:
+    def __init__(self, width: int, height: int, walkable: Iterable[Point]) -> None:
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        self.size = self.stride * height
+        # The index offset of every direction (in the same order as Direction)
+        self.offsets: List[int] = [vector.y * self.stride + vector.x for vector in (direction.to_vector() for direction in Direction)]
+        self.points: List[Point] = [Point(index % self.stride, index // self.stride) for index in range(self.size)]
+        # The bitmask of the cells inside the grid and the bitmask of the walkable cells
+        self.bounds_mask = self.to_mask(point for point in self.points if point.x < width)
+        self.walkable_mask = self.to_mask(walkable) & self.bounds_mask
+        # is_walkable[cell] is 1 if the cell is walkable (a list lookup is faster than testing a bit of a large int)
+        self.is_walkable = bytearray((self.walkable_mask >> index) & 1 for index in range(self.size))
+        self.neighbors: List[List[int]] = [
+            [self._neighbor(cell, offset) for cell in range(self.size)] for offset in self.offsets
+        ]
+        self.moves: List[Tuple[Tuple[Direction, int], ...]] = [
+            tuple((direction, self.neighbors[direction][cell]) for direction in Direction if self.neighbors[direction][cell] != NO_CELL)
+            for cell in range(self.size)
+        ]
+
+    def _neighbor(self, cell: int, offset: int) -> int:
+        neighbor = cell + offset
+        if not self.is_walkable[cell] or neighbor < 0 or neighbor >= self.size or not self.is_walkable[neighbor]:
+            return NO_CELL
+        return neighbor
+
+    # Convert a point to its cell index and back
+    def to_index(self, point: Point) -> int:
+        return point.y * self.stride + point.x
+
+    def to_point(self, cell: int) -> Point:
+        return self.points[cell]
+
+    # Returns True if the point is inside the grid
+    def in_bounds(self, point: Point) -> bool:
+        return 0 <= point.x < self.width and 0 <= point.y < self.height
+
+    # Convert a set of points to a bitmask and back
+    def to_mask(self, points: Iterable[Point]) -> int:
+        mask = 0
+        for point in points:
+            mask |= 1 << (point.y * self.stride + point.x)
+        return mask
+
+    def to_points(self, mask: int) -> List[Point]:
+        return [self.points[cell] for cell in iterate_cells(mask)]
+
+# Iterate over the indices of the set bits of a bitmask (from the lowest to the highest)
+def iterate_cells(mask: int) -> Iterator[int]:
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest